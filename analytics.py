@@ -0,0 +1,246 @@
+# analytics.py
+# Snapshots de analítica generados fuera de línea.
+#
+# El proceso batch lee calificaciones, comentarios (también los archivados)
+# y usuarios por bloques, agrupa por día con NumPy y escribe un .npz columnar
+# en ANALYTICS_DIR:
+#   dias, votos, suma_calificaciones, comentarios, usuarios_activos, registros
+#   peliculas, votos_pelicula, suma_pelicula, comentarios_pelicula
+# Las rutas /admin/analytics/* leen solo el snapshot más reciente, así los
+# reportes nunca consultan la base de datos que atiende a los usuarios.
+#
+# Uso (mejor contra un secundario):
+#   python analytics.py
+#   python analytics.py --lote 100000
+import argparse
+import glob
+import itertools
+import os
+import time
+from datetime import datetime
+
+from pymongo import ReadPreference
+
+from database import cliente_cli
+
+ANALYTICS_DIR = os.getenv(
+    "ANALYTICS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "analytics")
+)
+TAMANO_BLOQUE = 50000
+MAX_SNAPSHOTS = 30
+
+
+# ==================== AGRUPACIÓN ====================
+def _bloques(filas, tamano):
+    filas = iter(filas)
+    while True:
+        bloque = list(itertools.islice(filas, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+def _dias(np, fechas):
+    """Días desde 1970-01-01 de una lista de datetime"""
+    return np.array(fechas, dtype="datetime64[ms]").astype("datetime64[D]").astype(np.int64)
+
+
+def _sumar(np, acumulado, indices, pesos=None):
+    conteo = np.bincount(indices, weights=pesos, minlength=acumulado.shape[0]).astype(np.int64)
+    if conteo.shape[0] > acumulado.shape[0]:
+        acumulado = np.concatenate([acumulado, np.zeros(conteo.shape[0] - acumulado.shape[0], dtype=np.int64)])
+    acumulado += conteo
+    return acumulado
+
+
+class _Acumulador:
+    def __init__(self, np):
+        self.np = np
+        self.peliculas = {}
+        self.usuarios = {}
+        vacio = lambda: np.zeros(0, dtype=np.int64)
+        self.por_dia = {c: vacio() for c in ("votos", "suma_calificaciones", "comentarios", "registros")}
+        self.por_pelicula = {c: vacio() for c in ("votos_pelicula", "suma_pelicula", "comentarios_pelicula")}
+        self._actividad = []
+
+    def _indices(self, claves, tabla):
+        return self.np.array([tabla.setdefault(c, len(tabla)) for c in claves], dtype=self.np.int64)
+
+    def _sumar_dia(self, campo, dias, pesos=None):
+        self.por_dia[campo] = _sumar(self.np, self.por_dia[campo], dias, pesos)
+
+    def _sumar_pelicula(self, campo, indices, pesos=None):
+        self.por_pelicula[campo] = _sumar(self.np, self.por_pelicula[campo], indices, pesos)
+
+    def _registrar_actividad(self, dias, usuarios):
+        # Pares únicos (día, usuario) del bloque codificados en un int64
+        self._actividad.append(self.np.unique((dias << 32) | self._indices(usuarios, self.usuarios)))
+
+    def calificaciones(self, bloque):
+        np = self.np
+        dias = _dias(np, [c["fecha"] for c in bloque])
+        estrellas = np.array([c["calificacion"] for c in bloque], dtype=np.int64)
+        peliculas = self._indices([c["pelicula"] for c in bloque], self.peliculas)
+        self._sumar_dia("votos", dias)
+        self._sumar_dia("suma_calificaciones", dias, estrellas)
+        self._sumar_pelicula("votos_pelicula", peliculas)
+        self._sumar_pelicula("suma_pelicula", peliculas, estrellas)
+        self._registrar_actividad(dias, [c["usuario"] for c in bloque])
+
+    def comentarios(self, bloque):
+        dias = _dias(self.np, [c["fecha"] for c in bloque])
+        self._sumar_dia("comentarios", dias)
+        self._sumar_pelicula("comentarios_pelicula", self._indices([c["pelicula"] for c in bloque], self.peliculas))
+        self._registrar_actividad(dias, [c["usuario"] for c in bloque])
+
+    def registros(self, bloque):
+        self._sumar_dia("registros", _dias(self.np, [u["fecha_registro"] for u in bloque]))
+
+    def resultado(self):
+        np = self.np
+        activos = np.zeros(0, dtype=np.int64)
+        if self._actividad:
+            pares = np.unique(np.concatenate(self._actividad))
+            activos = np.bincount(pares >> 32)
+
+        # Todas las columnas diarias al mismo largo y recortadas al rango con datos
+        columnas = dict(self.por_dia, usuarios_activos=activos)
+        largo = max(len(v) for v in columnas.values())
+        columnas = {campo: np.pad(v, (0, largo - len(v))) for campo, v in columnas.items()}
+        con_datos = np.flatnonzero(np.vstack(list(columnas.values())).sum(axis=0))
+        primero, ultimo = (int(con_datos[0]), int(con_datos[-1]) + 1) if len(con_datos) else (0, 0)
+        serie = {campo: v[primero:ultimo] for campo, v in columnas.items()}
+        serie["dias"] = np.arange(primero, ultimo).astype("datetime64[D]")
+
+        n = len(self.peliculas)
+        peliculas = {campo: np.pad(valores, (0, n - len(valores))) for campo, valores in self.por_pelicula.items()}
+        peliculas["peliculas"] = np.array(list(self.peliculas), dtype=str)
+        return {**serie, **peliculas}
+
+
+# ==================== LECTURA DE MONGODB ====================
+def _comentarios_archivados(db):
+    for bucket in db.comentarios_archivo.find({}, {"pelicula": 1, "usuarios": 1, "c.u": 1, "c.f": 1}):
+        for c in bucket["c"]:
+            yield {"pelicula": bucket["pelicula"], "usuario": bucket["usuarios"][c["u"]][0], "fecha": c["f"]}
+
+
+def generar_snapshot(db, directorio=ANALYTICS_DIR, tamano_bloque=TAMANO_BLOQUE):
+    """Recorre las colecciones por bloques y escribe un snapshot .npz; devuelve (ruta, segundos)"""
+    import numpy as np
+
+    inicio = time.perf_counter()
+    acumulador = _Acumulador(np)
+
+    for bloque in _bloques(db.calificaciones.find(
+        {"fecha": {"$type": "date"}}, {"usuario": 1, "pelicula": 1, "calificacion": 1, "fecha": 1, "_id": 0}
+    ).batch_size(tamano_bloque), tamano_bloque):
+        acumulador.calificaciones(bloque)
+
+    comentarios = itertools.chain(
+        db.comentarios.find({}, {"usuario": 1, "pelicula": 1, "fecha": 1, "_id": 0}).batch_size(tamano_bloque),
+        _comentarios_archivados(db)
+    )
+    for bloque in _bloques(comentarios, tamano_bloque):
+        acumulador.comentarios(bloque)
+
+    for bloque in _bloques(db.usuarios.find(
+        {"fecha_registro": {"$type": "date"}}, {"fecha_registro": 1, "_id": 0}
+    ).batch_size(tamano_bloque), tamano_bloque):
+        acumulador.registros(bloque)
+
+    columnas = acumulador.resultado()
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"snapshot-{datetime.now().strftime('%Y%m%d-%H%M%S')}.npz")
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+        np.savez_compressed(f, generado=np.datetime64(datetime.now(), "s"), **columnas)
+    os.replace(temporal, ruta)
+
+    for viejo in sorted(glob.glob(os.path.join(directorio, "snapshot-*.npz")))[:-MAX_SNAPSHOTS]:
+        os.remove(viejo)
+    return ruta, round(time.perf_counter() - inicio, 3)
+
+
+# ==================== API DE LECTURA ====================
+_cargado = {"ruta": None, "mtime": None, "datos": None}
+
+
+def cargar(directorio=ANALYTICS_DIR):
+    """Columnas del snapshot más reciente (en memoria hasta que aparezca otro), o None"""
+    snapshots = sorted(glob.glob(os.path.join(directorio, "snapshot-*.npz")))
+    if not snapshots:
+        return None
+    ruta = snapshots[-1]
+    mtime = os.path.getmtime(ruta)
+    if _cargado["ruta"] != ruta or _cargado["mtime"] != mtime:
+        import numpy as np
+        with np.load(ruta, allow_pickle=False) as npz:
+            datos = {nombre: npz[nombre] for nombre in npz.files}
+        _cargado.update(ruta=ruta, mtime=mtime, datos=datos)
+    return _cargado["datos"]
+
+
+def serie_diaria(datos, desde=None, hasta=None):
+    """Una fila por día entre desde y hasta (date), ambos incluidos"""
+    dias = datos["dias"].astype("datetime64[D]")
+    seleccion = slice(None)
+    if desde or hasta:
+        import numpy as np
+        mascara = np.ones(len(dias), dtype=bool)
+        if desde:
+            mascara &= dias >= np.datetime64(desde, "D")
+        if hasta:
+            mascara &= dias <= np.datetime64(hasta, "D")
+        seleccion = mascara
+
+    filas = []
+    columnas = {c: datos[c][seleccion].tolist()
+                for c in ("votos", "suma_calificaciones", "comentarios", "usuarios_activos", "registros")}
+    for i, dia in enumerate(dias[seleccion].tolist()):
+        votos = columnas["votos"][i]
+        filas.append({
+            "dia": dia.isoformat(),
+            "votos": votos,
+            "promedio": round(columnas["suma_calificaciones"][i] / votos, 2) if votos else None,
+            "comentarios": columnas["comentarios"][i],
+            "usuarios_activos": columnas["usuarios_activos"][i],
+            "registros": columnas["registros"][i],
+        })
+    return filas
+
+
+def resumen_peliculas(datos, orden="comentarios", limite=20):
+    """Películas ordenadas por comentarios o votos"""
+    campo = {"comentarios": "comentarios_pelicula", "votos": "votos_pelicula"}[orden]
+    seleccion = datos[campo].argsort()[::-1][:limite]
+    return [
+        {
+            "titulo": str(datos["peliculas"][i]),
+            "votos": int(datos["votos_pelicula"][i]),
+            "promedio": round(int(datos["suma_pelicula"][i]) / int(datos["votos_pelicula"][i]), 2)
+            if datos["votos_pelicula"][i] else None,
+            "comentarios": int(datos["comentarios_pelicula"][i]),
+        }
+        for i in seleccion
+    ]
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Genera un snapshot de analítica")
+    parser.add_argument("--lote", type=int, default=TAMANO_BLOQUE, help="Documentos por bloque")
+    parser.add_argument("--directorio", default=ANALYTICS_DIR, help="Dónde escribir el snapshot")
+    args = parser.parse_args()
+
+    # Leer de un secundario si lo hay, para no cargar al primario que atiende la app
+    client = cliente_cli(read_preference=ReadPreference.SECONDARY_PREFERRED)
+    print("🚀 Generando snapshot de analítica...")
+    ruta, segundos = generar_snapshot(client.cineTecDB, args.directorio, args.lote)
+    client.close()
+    print(f"✅ Snapshot escrito en {ruta} ({segundos} s)")
+
+
+if __name__ == "__main__":
+    main()
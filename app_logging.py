@@ -0,0 +1,178 @@
+# app_logging.py
+# Logging de la aplicación sin bloquear el hilo de la petición.
+#
+# Los handlers solo meten el registro en una cola en memoria; un hilo aparte
+# (QueueListener) lo formatea y lo escribe en stdout. Cada registro lleva el
+# request_id, la ruta y el usuario de la petición en curso.
+#
+# Variables de entorno:
+#   LOG_LEVEL        DEBUG / INFO / WARNING / ERROR (por defecto INFO)
+#   LOG_FORMAT       "json" o "texto" (por defecto texto)
+#   LOG_SAMPLE_RATE  fracción de líneas INFO de alto volumen que se escriben (0-1)
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request, session
+
+logger = logging.getLogger("cinetec")
+
+TAMANO_COLA = 10000
+
+# X-Request-ID del cliente solo se acepta con este formato; si no, se genera uno
+REQUEST_ID_VALIDO = re.compile(r"[A-Za-z0-9-]{1,64}")
+
+# Atributos estándar de LogRecord que no se copian como campos extra
+_ATRIBUTOS_BASE = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "muestrear"}
+
+
+class ContextoPeticionFilter(logging.Filter):
+    """Añade request_id, ruta y usuario de la petición actual al registro"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = getattr(g, "request_id", None)
+            record.ruta = request.path
+            record.usuario = session.get("usuario")
+        else:
+            record.request_id = record.ruta = record.usuario = None
+        return True
+
+
+class MuestreoFilter(logging.Filter):
+    """Deja pasar solo una fracción de los registros INFO marcados con extra={'muestrear': True}"""
+
+    def __init__(self, tasa):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record):
+        if getattr(record, "muestrear", False) and record.levelno <= logging.INFO:
+            return random.random() < self.tasa
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_BASE and valor is not None:
+                datos[clave] = valor
+        if record.exc_text:
+            datos["excepcion"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class TextoFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        return super().format(record)
+
+
+class ColaPorProcesoHandler(logging.handlers.QueueHandler):
+    """QueueHandler que arranca su listener en cada proceso y descarta si la cola está llena"""
+
+    def __init__(self, destino):
+        super().__init__(queue.Queue(TAMANO_COLA))
+        self.destino = destino
+        self.descartados = 0
+        self._listener = None
+        self._pid = None
+
+    def prepare(self, record):
+        # Se resuelve el mensaje aquí porque los args pueden cambiar antes de que
+        # el listener lo escriba; el traceback se guarda aparte para el formato JSON
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # Los hilos no sobreviven al fork de gunicorn: cada worker arranca su listener
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._listener = logging.handlers.QueueListener(self.queue, self.destino, respect_handler_level=True)
+            self._listener.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+    def detener(self):
+        if self._listener and self._pid == os.getpid():
+            self._listener.stop()
+
+
+def _handler_del_proceso():
+    # El logger 'cinetec' es global del proceso: se configura con la primera app
+    # y las siguientes reutilizan el mismo handler en lugar de reemplazarlo
+    for handler in logger.handlers:
+        if isinstance(handler, ColaPorProcesoHandler):
+            return handler
+
+    nivel = os.getenv("LOG_LEVEL", "INFO").upper()
+    tasa = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+    destino = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "texto").lower() == "json":
+        destino.setFormatter(JsonFormatter())
+    else:
+        destino.setFormatter(TextoFormatter())
+
+    handler = ColaPorProcesoHandler(destino)
+    # Los filtros corren en el hilo de la petición, donde existe el contexto de Flask
+    handler.addFilter(MuestreoFilter(tasa))
+    handler.addFilter(ContextoPeticionFilter())
+
+    logger.handlers = [handler]
+    logger.setLevel(nivel)
+    logger.propagate = False
+    atexit.register(handler.detener)
+    return handler
+
+
+def configurar_logging(app):
+    """Configura el logger 'cinetec' y registra los hooks de inicio/fin de petición"""
+    handler = _handler_del_proceso()
+    app.extensions["app_logging"] = handler
+
+    @app.before_request
+    def _iniciar_peticion():
+        recibido = request.headers.get("X-Request-ID", "")
+        g.request_id = recibido if REQUEST_ID_VALIDO.fullmatch(recibido) else uuid.uuid4().hex[:16]
+        g.inicio_peticion = time.perf_counter()
+
+    @app.after_request
+    def _finalizar_peticion(response):
+        duracion_ms = round((time.perf_counter() - g.get("inicio_peticion", time.perf_counter())) * 1000, 1)
+        response.headers["X-Request-ID"] = g.get("request_id", "")
+        logger.info(
+            "%s %s %s %.1fms", request.method, request.path, response.status_code, duracion_ms,
+            extra={"metodo": request.method, "status": response.status_code,
+                   "duracion_ms": duracion_ms, "muestrear": response.status_code < 400}
+        )
+        return response
+
+    return handler
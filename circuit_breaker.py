@@ -0,0 +1,79 @@
+# circuit_breaker.py
+# Circuit breaker para dependencias externas (MongoDB).
+#
+# cerrado      -> las llamadas pasan; tras N fallos seguidos se abre
+# abierto      -> se falla de inmediato sin intentar conectar
+# semi_abierto -> pasado el tiempo de reintento se deja pasar UNA llamada
+#                 de prueba; si funciona se cierra, si falla se vuelve a abrir
+import logging
+import threading
+import time
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMI_ABIERTO = "semi_abierto"
+
+logger = logging.getLogger("cinetec.circuit_breaker")
+
+
+class CircuitBreaker:
+    """Corta el acceso a un recurso después de fallos consecutivos"""
+
+    def __init__(self, nombre, umbral_fallos=3, tiempo_reintento=15.0):
+        self.nombre = nombre
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_reintento = tiempo_reintento
+        self._estado = CERRADO
+        self._fallos = 0
+        self._abierto_desde = 0.0
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self):
+        with self._lock:
+            return self._estado
+
+    def permitir(self):
+        """True si la llamada puede intentarse ahora"""
+        with self._lock:
+            if self._estado == CERRADO:
+                return True
+
+            if self._estado == ABIERTO:
+                if time.monotonic() - self._abierto_desde < self.tiempo_reintento:
+                    return False
+                self._estado = SEMI_ABIERTO
+                self._prueba_en_curso = False
+
+            # Semi-abierto: solo una llamada de prueba a la vez
+            if self._prueba_en_curso:
+                return False
+            self._prueba_en_curso = True
+            return True
+
+    def registrar_exito(self):
+        with self._lock:
+            if self._estado != CERRADO:
+                logger.warning("Circuito %s cerrado: servicio recuperado", self.nombre)
+            self._estado = CERRADO
+            self._fallos = 0
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self):
+        with self._lock:
+            self._fallos += 1
+            self._prueba_en_curso = False
+            if self._estado == SEMI_ABIERTO or self._fallos >= self.umbral_fallos:
+                if self._estado != ABIERTO:
+                    logger.error("Circuito %s abierto tras %d fallos", self.nombre, self._fallos)
+                self._estado = ABIERTO
+                self._abierto_desde = time.monotonic()
+
+    def segundos_para_reintento(self):
+        """Segundos que faltan para la próxima prueba (0 si el circuito no está abierto)"""
+        with self._lock:
+            if self._estado != ABIERTO:
+                return 0
+            restante = self.tiempo_reintento - (time.monotonic() - self._abierto_desde)
+            return max(0, int(restante + 0.999))
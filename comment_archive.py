@@ -0,0 +1,174 @@
+# comment_archive.py
+# Archivo de comentarios antiguos.
+#
+# Mueve de comentarios a comentarios_archivo los comentarios más viejos que
+# --dias o los que quedan por detrás de los --max-por-pelicula más recientes.
+# Se guardan en "buckets" compactos de hasta TAMANO_BUCKET comentarios de una
+# misma película, con claves cortas y el nombre de cada usuario una sola vez:
+#   {pelicula, desde, hasta, n,
+#    usuarios: [[usuario, nombre_usuario], ...],
+#    c: [{i: _id, u: índice en usuarios, t: texto, f: fecha, l, d, s}, ...]}
+# Los comentarios de cada bucket van del más nuevo al más viejo.
+#
+# Uso:
+#   python comment_archive.py --dias 365
+#   python comment_archive.py --max-por-pelicula 200 --simular
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from database import cliente_cli
+
+
+TAMANO_BUCKET = 100
+DIAS_POR_DEFECTO = int(os.getenv("COMMENT_ARCHIVE_DAYS", "365"))
+MAX_POR_PELICULA = int(os.getenv("COMMENT_ARCHIVE_KEEP", "500"))
+
+
+# ==================== COMPACTACIÓN ====================
+def compactar(pelicula, comentarios):
+    """Bucket de archivo a partir de comentarios ordenados del más nuevo al más viejo"""
+    indices = {}
+    usuarios = []
+    compactos = []
+    for c in comentarios:
+        if c["usuario"] not in indices:
+            indices[c["usuario"]] = len(usuarios)
+            usuarios.append([c["usuario"], c.get("nombre_usuario", c["usuario"])])
+        compactos.append({
+            "i": c["_id"],
+            "u": indices[c["usuario"]],
+            "t": c["comentario"],
+            "f": c["fecha"],
+            "l": c.get("likes", 0),
+            "d": c.get("dislikes", 0),
+            "s": c.get("score", 0),
+        })
+    return {
+        "pelicula": pelicula,
+        "desde": compactos[-1]["f"],
+        "hasta": compactos[0]["f"],
+        "n": len(compactos),
+        "usuarios": usuarios,
+        "c": compactos,
+    }
+
+
+def expandir(bucket):
+    """Comentarios de un bucket con la misma forma que los de la colección comentarios"""
+    usuarios = bucket["usuarios"]
+    return [
+        {
+            "_id": c["i"],
+            "usuario": usuarios[c["u"]][0],
+            "nombre_usuario": usuarios[c["u"]][1],
+            "comentario": c["t"],
+            "fecha": c["f"],
+            "likes": c["l"],
+            "dislikes": c["d"],
+            "score": c["s"],
+            "archivado": True,
+        }
+        for c in bucket["c"]
+    ]
+
+
+# ==================== LECTURA ====================
+def leer_archivo(db, pelicula, antes_fecha, antes_id, limite):
+    """Comentarios archivados anteriores a (antes_fecha, antes_id), del más nuevo al más viejo"""
+    resultado = []
+    for bucket in db.comentarios_archivo.find(
+        {"pelicula": pelicula, "desde": {"$lte": antes_fecha}}
+    ).sort("hasta", -1):
+        for c in expandir(bucket):
+            if (c["fecha"], c["_id"]) < (antes_fecha, antes_id):
+                resultado.append(c)
+                if len(resultado) >= limite:
+                    return resultado
+    return resultado
+
+
+# ==================== ARCHIVADO ====================
+def _a_archivar(db, pelicula, limite_fecha, max_por_pelicula):
+    # Los recientes que se quedan: dentro de la edad límite y entre los N más nuevos
+    conservados = db.comentarios.find(
+        {"pelicula": pelicula, "fecha": {"$gte": limite_fecha}}, {"fecha": 1}
+    ).sort([("fecha", -1), ("_id", -1)]).limit(max_por_pelicula)
+    ultimo = None
+    for ultimo in conservados:
+        pass
+
+    if ultimo is None:
+        filtro = {"pelicula": pelicula}
+    else:
+        filtro = {"pelicula": pelicula, "$or": [
+            {"fecha": {"$lt": ultimo["fecha"]}},
+            {"fecha": ultimo["fecha"], "_id": {"$lt": ultimo["_id"]}},
+        ]}
+    return db.comentarios.find(filtro).sort([("fecha", -1), ("_id", -1)])
+
+
+def archivar(db, dias=DIAS_POR_DEFECTO, max_por_pelicula=MAX_POR_PELICULA, simular=False):
+    """Mueve los comentarios viejos de cada película a buckets de comentarios_archivo"""
+    limite_fecha = datetime.now() - timedelta(days=dias)
+    stats = {"peliculas": 0, "comentarios": 0, "buckets": 0}
+    inicio = time.perf_counter()
+
+    for pelicula in db.comentarios.distinct("pelicula"):
+        cursor = _a_archivar(db, pelicula, limite_fecha, max_por_pelicula)
+        lote = []
+        movidos = 0
+        for comentario in cursor:
+            lote.append(comentario)
+            if len(lote) >= TAMANO_BUCKET:
+                movidos += _mover(db, pelicula, lote, simular)
+                stats["buckets"] += 1
+                lote = []
+        if lote:
+            movidos += _mover(db, pelicula, lote, simular)
+            stats["buckets"] += 1
+        if movidos:
+            stats["peliculas"] += 1
+            stats["comentarios"] += movidos
+
+    stats["segundos"] = round(time.perf_counter() - inicio, 3)
+    return stats
+
+
+def _mover(db, pelicula, lote, simular):
+    if simular:
+        return len(lote)
+    # Primero se escribe el bucket y luego se borra: si el proceso se corta
+    # entre ambos pasos, como mucho un bucket queda repetido
+    db.comentarios_archivo.insert_one(compactar(pelicula, lote))
+    db.comentarios.delete_many({"_id": {"$in": [c["_id"] for c in lote]}})
+    db.reacciones_comentarios.delete_many({"comentario_id": {"$in": [c["_id"] for c in lote]}})
+    return len(lote)
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Archiva comentarios antiguos")
+    parser.add_argument("--dias", type=int, default=DIAS_POR_DEFECTO,
+                        help="Archiva comentarios con más de estos días")
+    parser.add_argument("--max-por-pelicula", type=int, default=MAX_POR_PELICULA,
+                        help="Comentarios recientes que se conservan por película")
+    parser.add_argument("--simular", action="store_true", help="Cuenta lo que se archivaría sin mover nada")
+    args = parser.parse_args()
+    if args.max_por_pelicula < 1:
+        parser.error("--max-por-pelicula debe ser al menos 1")
+
+    client = cliente_cli()
+    print(f"🚀 Archivando comentarios (más de {args.dias} días o fuera de los "
+          f"{args.max_por_pelicula} más recientes por película)...")
+    stats = archivar(client.cineTecDB, args.dias, args.max_por_pelicula, args.simular)
+    client.close()
+
+    accion = "Se archivarían" if args.simular else "Archivados"
+    print(f"✅ {accion} {stats['comentarios']} comentarios de {stats['peliculas']} películas "
+          f"en {stats['buckets']} buckets ({stats['segundos']} s)")
+
+
+if __name__ == "__main__":
+    main()
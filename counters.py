@@ -0,0 +1,93 @@
+# counters.py
+# Contadores en memoria que acumulan incrementos y los escriben a MongoDB
+# cada cierto tiempo con un solo bulk_write de $inc, para que un documento
+# muy popular no reciba una escritura por cada clic.
+import atexit
+import logging
+import os
+import threading
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger("cinetec.counters")
+
+
+class ContadorBuffer:
+    """Acumula deltas por documento y los vacía periódicamente con $inc"""
+
+    def __init__(self, obtener_cliente, coleccion, intervalo=2.0, max_pendientes=500):
+        self.obtener_cliente = obtener_cliente
+        self.coleccion = coleccion
+        self.intervalo = intervalo
+        self.max_pendientes = max_pendientes
+        self._pendientes = {}
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._pid = None
+        self._despertar = threading.Event()
+        atexit.register(self.flush)
+
+    def incrementar(self, doc_id, deltas):
+        """Suma deltas ({campo: n}) al documento doc_id; se escriben en el próximo flush"""
+        self._asegurar_hilo()
+        with self._lock:
+            actuales = self._pendientes.setdefault(doc_id, {})
+            for campo, delta in deltas.items():
+                actuales[campo] = actuales.get(campo, 0) + delta
+            lleno = len(self._pendientes) >= self.max_pendientes
+        if lleno:
+            self._despertar.set()
+
+    def pendientes(self, doc_id):
+        """Deltas aún no escritos para un documento"""
+        with self._lock:
+            return dict(self._pendientes.get(doc_id, {}))
+
+    def flush(self):
+        """Escribe todos los deltas acumulados; si falla, los devuelve al buffer"""
+        with self._lock:
+            lote, self._pendientes = self._pendientes, {}
+
+        operaciones = [
+            UpdateOne({"_id": doc_id}, {"$inc": deltas})
+            for doc_id, deltas in lote.items()
+            if any(deltas.values())
+        ]
+        if not operaciones:
+            return 0
+
+        client = self.obtener_cliente()
+        try:
+            if not client:
+                raise ConnectionError("Sin conexión a MongoDB")
+            client.cineTecDB[self.coleccion].bulk_write(operaciones, ordered=False)
+            return len(operaciones)
+        except Exception as e:
+            logger.warning("Error escribiendo contadores de %s: %s", self.coleccion, e)
+            with self._lock:
+                for doc_id, deltas in lote.items():
+                    actuales = self._pendientes.setdefault(doc_id, {})
+                    for campo, delta in deltas.items():
+                        actuales[campo] = actuales.get(campo, 0) + delta
+            return 0
+        finally:
+            if client:
+                client.close()
+
+    def _asegurar_hilo(self):
+        # Con preload_app los hilos del master no sobreviven al fork:
+        # cada worker arranca el suyo la primera vez que lo necesita
+        if self._pid == os.getpid() and self._hilo and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._hilo and self._hilo.is_alive():
+                return
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._bucle, name=f"flush-{self.coleccion}", daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            self.flush()
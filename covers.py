@@ -0,0 +1,161 @@
+# covers.py
+# Proxy de portadas con caché local en disco.
+#
+# Cada portada se descarga UNA vez desde su origen (Amazon/TMDB) y se guardan
+# variantes redimensionadas en WebP y JPEG. Las variantes se identifican por
+# el hash de la URL de origen, así que si cambia la portada cambia la clave.
+#
+# Precalentar la caché de todo el catálogo:
+#   python covers.py --prewarm
+import argparse
+import hashlib
+import io
+import logging
+import os
+import threading
+import urllib.request
+
+logger = logging.getLogger("cinetec.covers")
+
+COVER_CACHE_DIR = os.getenv(
+    "COVER_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "covers")
+)
+
+ANCHOS = (160, 300, 600)
+ANCHO_POR_DEFECTO = 300
+FORMATOS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+CALIDAD = {"webp": 80, "jpeg": 82}
+
+
+def descargar_url(url, timeout=10):
+    """Fetcher por defecto: descarga la imagen original por HTTP"""
+    peticion = urllib.request.Request(url, headers={"User-Agent": "CineTec-Covers/1.0"})
+    with urllib.request.urlopen(peticion, timeout=timeout) as respuesta:
+        return respuesta.read()
+
+
+def clave_portada(url):
+    """Clave estable para una URL de origen (sirve también como versión)"""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+def ajustar_ancho(ancho):
+    """El ancho permitido más pequeño que cubre el pedido"""
+    for permitido in ANCHOS:
+        if ancho <= permitido:
+            return permitido
+    return ANCHOS[-1]
+
+
+class CacheCovers:
+    """Descarga, redimensiona y guarda portadas en disco.
+
+    fetcher es cualquier función url -> bytes; en pruebas se puede pasar una
+    que lea imágenes locales en lugar de salir a internet.
+    """
+
+    def __init__(self, directorio=COVER_CACHE_DIR, fetcher=descargar_url):
+        self.directorio = directorio
+        self.fetcher = fetcher
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, clave):
+        with self._locks_lock:
+            return self._locks.setdefault(clave, threading.Lock())
+
+    def _ruta(self, clave, ancho, formato):
+        return os.path.join(self.directorio, f"{clave}-{ancho}.{formato}")
+
+    def _escribir(self, ruta, datos):
+        # Escritura atómica: otro worker nunca ve un archivo a medias
+        os.makedirs(self.directorio, exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+
+    def variante(self, url, ancho=ANCHO_POR_DEFECTO, formato="webp"):
+        """Ruta en disco de la variante pedida; la genera si no existe"""
+        clave = clave_portada(url)
+        ancho = ajustar_ancho(ancho)
+        ruta = self._ruta(clave, ancho, formato)
+        if os.path.exists(ruta):
+            return ruta
+
+        with self._lock(clave):
+            if os.path.exists(ruta):
+                return ruta
+            original = self._original(clave, url)
+            self._generar_variantes(clave, original)
+        return ruta
+
+    def _original(self, clave, url):
+        ruta = os.path.join(self.directorio, f"{clave}.orig")
+        if os.path.exists(ruta):
+            with open(ruta, "rb") as f:
+                return f.read()
+        datos = self.fetcher(url)
+        self._escribir(ruta, datos)
+        logger.info("Portada descargada: %s (%d KB)", url, len(datos) // 1024)
+        return datos
+
+    def _generar_variantes(self, clave, original):
+        # Pillow solo se carga al generar variantes, no al arrancar el worker
+        from PIL import Image
+
+        imagen = Image.open(io.BytesIO(original))
+        imagen = imagen.convert("RGB")
+        for ancho in ANCHOS:
+            if imagen.width > ancho:
+                alto = round(imagen.height * ancho / imagen.width)
+                redimensionada = imagen.resize((ancho, alto), Image.LANCZOS)
+            else:
+                redimensionada = imagen
+            for formato in FORMATOS:
+                salida = io.BytesIO()
+                redimensionada.save(salida, format=formato.upper(), quality=CALIDAD[formato], optimize=True)
+                self._escribir(self._ruta(clave, ancho, formato), salida.getvalue())
+
+    def prewarm(self, catalogo):
+        """Genera las variantes de todas las portadas del catálogo ({titulo: {'portada': url}})"""
+        resultados = {"ok": 0, "errores": 0}
+        for titulo, info in catalogo.items():
+            url = info.get("portada")
+            if not url:
+                continue
+            try:
+                self.variante(url)
+                resultados["ok"] += 1
+            except Exception as e:
+                resultados["errores"] += 1
+                logger.warning("No se pudo cachear la portada de %s: %s", titulo, e)
+        return resultados
+
+
+def etag_archivo(ruta):
+    """ETag barato a partir del tamaño y la fecha de modificación"""
+    info = os.stat(ruta)
+    return f"{info.st_size:x}-{info.st_mtime_ns:x}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caché local de portadas")
+    parser.add_argument("--prewarm", action="store_true", help="Descarga y redimensiona todo el catálogo")
+    parser.add_argument("--dir", default=COVER_CACHE_DIR, help="Directorio de la caché")
+    args = parser.parse_args()
+
+    if not args.prewarm:
+        parser.print_help()
+        return
+
+    from peliculas import PELICULAS_INFO
+
+    print(f"🚀 Precalentando {len(PELICULAS_INFO)} portadas en {args.dir}...")
+    resultados = CacheCovers(args.dir).prewarm(PELICULAS_INFO)
+    print(f"✅ {resultados['ok']} portadas listas, {resultados['errores']} errores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# database.py
+# Conexión a MongoDB compartida por la app y los scripts de mantenimiento.
+#
+# La URI sale siempre de MONGODB_URI; ningún script debe llevarla escrita.
+# Importar este módulo no abre conexiones ni carga Flask.
+import logging
+import os
+import sys
+
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure
+
+NOMBRE_DB = "cineTecDB"
+
+logger = logging.getLogger("cinetec.database")
+
+OPCIONES_CLIENTE = {
+    "serverSelectionTimeoutMS": 5000,
+    "connectTimeoutMS": 5000,
+    "retryWrites": True,
+    "w": "majority",
+}
+
+
+def crear_cliente(uri=None, **opciones):
+    """MongoClient con las opciones de la app; lanza ValueError si no hay URI"""
+    uri = uri or os.getenv("MONGODB_URI")
+    if not uri:
+        raise ValueError("No se encontró MONGODB_URI en las variables de entorno")
+    return MongoClient(uri, **{**OPCIONES_CLIENTE, **opciones})
+
+
+def cliente_cli(**opciones):
+    """Cliente para scripts: termina con un mensaje si falta MONGODB_URI"""
+    try:
+        return crear_cliente(**opciones)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+# ==================== ÍNDICES ====================
+# Índices de los que depende la app: (colección, claves, opciones). Crearlos es
+# idempotente y no toca los datos, así que la app los asegura al conectar
+# (ver server._conectar) y una base ya desplegada los recibe sin setup_database.py
+INDICES = [
+    ("calificaciones", [("usuario", 1), ("pelicula", 1)], {"unique": True}),
+    ("comentarios", [("pelicula", 1), ("fecha", -1), ("_id", -1)], {}),
+    ("comentarios", [("pelicula", 1), ("score", -1), ("fecha", -1)], {}),
+    # /search_comments ($text) falla sin este índice
+    ("comentarios", [("comentario", "text")], {"default_language": "spanish", "name": "comentarios_texto"}),
+    ("comentarios_archivo", [("pelicula", 1), ("hasta", -1)], {}),
+    ("reacciones_comentarios", [("comentario_id", 1), ("usuario", 1)], {"unique": True}),
+    ("usuarios", [("usuario", 1)], {"unique": True}),
+    ("usuarios", [("email", 1)], {"unique": True}),
+    # Actividad reciente que leaderboards.cargar relee (VENTANA_DIAS = 7)
+    ("calificaciones", [("fecha", 1)], {}),
+    ("comentarios", [("fecha", 1)], {}),
+    ("actividad_favoritos", [("usuario", 1), ("pelicula", 1)], {"unique": True}),
+    ("actividad_favoritos", [("fecha", 1)], {"expireAfterSeconds": 7 * 24 * 3600}),
+]
+
+
+def nombre_indice(claves, opciones):
+    """Nombre que MongoDB da al índice (usuario_1, email_1...) salvo que se indique otro"""
+    return opciones.get("name") or "_".join(f"{campo}_{orden}" for campo, orden in claves)
+
+
+def asegurar_indices(db, colecciones=None):
+    """Crea los índices que falten; devuelve {"coleccion.indice": error} de los que no se pudieron crear
+
+    Un índice único falla si ya hay documentos repetidos: se registra y se
+    sigue con los demás. Los errores de conexión sí se propagan.
+    """
+    fallidos = {}
+    for coleccion, claves, opciones in INDICES:
+        if colecciones is not None and coleccion not in colecciones:
+            continue
+        try:
+            db[coleccion].create_index(claves, **opciones)
+        except OperationFailure as e:
+            nombre = f"{coleccion}.{nombre_indice(claves, opciones)}"
+            logger.error("No se pudo crear el índice %s: %s", nombre, e)
+            fallidos[nombre] = str(e)
+    return fallidos
@@ -1,7 +1,9 @@
 # gunicorn_config.py
 # Configuración para evitar crash en Render
+import os
 
-workers = 2
+# También en el entorno: passwords.py deja un worker libre de hashes
+workers = int(os.environ.setdefault("WEB_CONCURRENCY", "2"))
 worker_class = 'sync'
 worker_connections = 1000
 timeout = 30
@@ -18,4 +20,10 @@ errorlog = '-'
 loglevel = 'info'
 
 # Manejo de señales
-graceful_timeout = 30
\ No newline at end of file
+graceful_timeout = 30
+
+# Calentamiento: cada worker nuevo (deploy o reciclado por max_requests) abre
+# su pool de MongoDB, compila plantillas y llena cachés antes de recibir tráfico
+def post_fork(arbiter, worker):
+    from server import calentar_worker
+    calentar_worker()
@@ -0,0 +1,30 @@
+# import_files.py
+# Lectura de archivos de carga masiva (import_ratings.py, provision_users.py,
+# rating_stats.py --desde): NDJSON o CSV, fila a fila.
+#
+# Las líneas NDJSON que no son JSON válido se devuelven como None para que
+# quien las consume las cuente como inválidas.
+import csv
+import json
+import sys
+
+
+def leer_filas(ruta):
+    """Genera filas (dict) de un archivo NDJSON o CSV sin cargarlo completo"""
+    archivo = sys.stdin if ruta == "-" else open(ruta, encoding="utf-8", newline="")
+    try:
+        if ruta.lower().endswith(".csv"):
+            for fila in csv.DictReader(archivo):
+                yield fila
+        else:
+            for linea in archivo:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    yield json.loads(linea)
+                except ValueError:
+                    yield None
+    finally:
+        if archivo is not sys.stdin:
+            archivo.close()
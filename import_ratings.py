@@ -0,0 +1,224 @@
+# import_ratings.py
+# Importación masiva de calificaciones (NDJSON o CSV) hacia MongoDB.
+#
+# Uso:
+#   python import_ratings.py calificaciones.ndjson
+#   python import_ratings.py calificaciones.csv --lote 2000
+#
+# Cada fila necesita "usuario", "pelicula" y "calificacion" (1-5);
+# "nombre_usuario" y "fecha" (ISO 8601) son opcionales. Si un usuario califica
+# la misma película varias veces en el archivo, vale la última fila.
+#
+# Al terminar se actualiza lo que la app deriva de calificaciones (igual que
+# en /rate_movies): histogramas, vistas de usuario y caché de promedios.
+import argparse
+import time
+from collections import Counter
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import rating_stats
+import user_views
+from database import cliente_cli
+from import_files import leer_filas
+from shared_cache import CLAVE_RATINGS, CacheCompartida
+
+TAMANO_LOTE = 1000
+# Con más usuarios afectados que esto se reconstruyen todos los histogramas
+# y vistas de una vez en lugar de uno por uno
+MAX_USUARIOS_PARCIAL = 1000
+
+
+# ==================== VALIDACIÓN ====================
+def normalizar_fila(fila):
+    """Valida una fila y la convierte al formato de la colección, o None si es inválida"""
+    if not isinstance(fila, dict):
+        return None
+
+    usuario = str(fila.get("usuario") or "").strip()
+    pelicula = str(fila.get("pelicula") or "").strip()
+    if not usuario or not pelicula:
+        return None
+
+    try:
+        calificacion = int(fila.get("calificacion"))
+    except (TypeError, ValueError):
+        return None
+    if calificacion < 1 or calificacion > 5:
+        return None
+
+    fecha = fila.get("fecha")
+    if isinstance(fecha, str) and fecha:
+        try:
+            fecha = datetime.fromisoformat(fecha)
+        except ValueError:
+            return None
+    elif not isinstance(fecha, datetime):
+        fecha = datetime.now()
+
+    return {
+        "usuario": usuario,
+        "pelicula": pelicula,
+        "calificacion": calificacion,
+        "fecha": fecha,
+        "nombre_usuario": str(fila.get("nombre_usuario") or usuario)
+    }
+
+
+# ==================== ESCRITURA ====================
+def _escribir_lote(db, lote, stats, escritas):
+    operaciones = [
+        UpdateOne(
+            {"usuario": c["usuario"], "pelicula": c["pelicula"]},
+            {"$set": {
+                "calificacion": c["calificacion"],
+                "fecha": c["fecha"],
+                "nombre_usuario": c["nombre_usuario"]
+            }},
+            upsert=True
+        )
+        for c in lote
+    ]
+
+    try:
+        resultado = db.calificaciones.bulk_write(operaciones, ordered=False)
+        detalles = resultado.bulk_api_result
+    except BulkWriteError as e:
+        # Con ordered=False el resto del lote se aplica aunque fallen algunas filas
+        detalles = e.details
+        stats["errores"] += len(detalles.get("writeErrors", []))
+
+    stats["insertadas"] += detalles.get("nUpserted", 0)
+    stats["actualizadas"] += detalles.get("nModified", 0)
+    fallidas = {error["index"] for error in detalles.get("writeErrors", [])}
+    escritas.update(c["pelicula"] for i, c in enumerate(lote) if i not in fallidas)
+
+
+def importar_calificaciones(db, filas, tamano_lote=TAMANO_LOTE):
+    """Escribe las filas en lotes con bulk_write sin orden y actualiza los resúmenes al final
+
+    Devuelve (stats, resumenes por película, usuarios con calificaciones escritas,
+    Counter de calificaciones escritas por película): las filas inválidas y las
+    repetidas de una misma clave no cuentan
+    """
+    stats = {"procesadas": 0, "insertadas": 0, "actualizadas": 0, "invalidas": 0, "repetidas": 0, "errores": 0}
+    peliculas, usuarios = set(), set()
+    escritas = Counter()
+    # Un lote sin orden no puede llevar dos upserts de la misma clave: gana la última fila
+    lote = {}
+    inicio = time.perf_counter()
+
+    for fila in filas:
+        stats["procesadas"] += 1
+        calificacion = normalizar_fila(fila)
+        if calificacion is None:
+            stats["invalidas"] += 1
+            continue
+
+        clave = (calificacion["usuario"], calificacion["pelicula"])
+        if clave in lote:
+            stats["repetidas"] += 1
+        lote[clave] = calificacion
+        peliculas.add(calificacion["pelicula"])
+        usuarios.add(calificacion["usuario"])
+        if len(lote) >= tamano_lote:
+            _escribir_lote(db, list(lote.values()), stats, escritas)
+            lote = {}
+
+    if lote:
+        _escribir_lote(db, list(lote.values()), stats, escritas)
+
+    resumenes = actualizar_resumenes(db, peliculas)
+
+    segundos = time.perf_counter() - inicio
+    stats["segundos"] = round(segundos, 3)
+    stats["filas_por_segundo"] = round(stats["procesadas"] / segundos, 1) if segundos > 0 else 0
+    return stats, resumenes, usuarios, escritas
+
+
+def actualizar_resumenes(db, peliculas):
+    """Recalcula promedio y total de votos de varias películas con una sola agregación"""
+    if not peliculas:
+        return {}
+
+    resultados = db.calificaciones.aggregate([
+        {'$match': {'pelicula': {'$in': list(peliculas)}}},
+        {'$group': {
+            '_id': '$pelicula',
+            'promedio': {'$avg': '$calificacion'},
+            'suma': {'$sum': '$calificacion'},
+            'total_votos': {'$sum': 1}
+        }}
+    ])
+
+    resumenes = {}
+    operaciones = []
+    for resultado in resultados:
+        promedio = round(resultado['promedio'], 1)
+        resumenes[resultado['_id']] = {
+            'promedio': promedio,
+            'suma': resultado['suma'],
+            'total_votos': resultado['total_votos']
+        }
+        operaciones.append(UpdateOne(
+            {"titulo": resultado['_id']},
+            {"$set": {
+                "calificacion_promedio": promedio,
+                "total_calificaciones": resultado['total_votos']
+            }}
+        ))
+
+    if operaciones:
+        db.peliculas.bulk_write(operaciones, ordered=False)
+
+    return resumenes
+
+
+# ==================== DATOS DERIVADOS ====================
+def actualizar_derivados(db, peliculas, usuarios, cache):
+    """Histogramas, vistas de usuario y caché de promedios tras escribir calificaciones"""
+    if len(usuarios) > MAX_USUARIOS_PARCIAL:
+        rating_stats.reconstruir(db, rating_stats.leer_coleccion(db))
+        user_views.verificar(db, reparar=True)
+    else:
+        rating_stats.recalcular(db, peliculas=list(peliculas), usuarios=list(usuarios))
+        for usuario in usuarios:
+            user_views.construir(db, usuario)
+    cache.invalidar(CLAVE_RATINGS)
+
+
+# ==================== CLI ====================
+def main():
+    parser = argparse.ArgumentParser(description="Importa calificaciones masivamente a MongoDB")
+    parser.add_argument("archivo", help="Archivo .ndjson/.jsonl o .csv ('-' para stdin en NDJSON)")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por bulk_write")
+    args = parser.parse_args()
+
+    client = cliente_cli()
+    db = client.cineTecDB
+
+    print(f"🚀 Importando calificaciones desde {args.archivo}...")
+    stats, resumenes, usuarios, _ = importar_calificaciones(db, leer_filas(args.archivo), args.lote)
+
+    print(f"✅ Procesadas: {stats['procesadas']} "
+          f"(insertadas {stats['insertadas']}, actualizadas {stats['actualizadas']}, "
+          f"inválidas {stats['invalidas']}, repetidas {stats['repetidas']}, errores {stats['errores']})")
+    print(f"✅ Resúmenes actualizados: {len(resumenes)} películas")
+
+    # Los workers de esta máquina dejan de servir los promedios cacheados;
+    # en otras máquinas caducan solos (SHARED_CACHE_TTL)
+    inicio = time.perf_counter()
+    try:
+        actualizar_derivados(db, resumenes, usuarios, CacheCompartida())
+        print(f"✅ Histogramas y vistas actualizados: {len(usuarios)} usuarios "
+              f"({round(time.perf_counter() - inicio, 3)} s)")
+    except OSError as e:
+        print(f"⚠️ No se pudo invalidar la caché compartida: {e}")
+    client.close()
+    print(f"⏱️ {stats['segundos']} s — {stats['filas_por_segundo']} filas/s")
+
+
+if __name__ == "__main__":
+    main()
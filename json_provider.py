@@ -0,0 +1,44 @@
+# json_provider.py
+# Serialización JSON de la app con orjson.
+#
+# Los documentos de MongoDB se pueden devolver tal cual desde los handlers:
+#   - ObjectId -> str
+#   - datetime / date -> ISO 8601 (orjson, sin perder segundos ni zona horaria);
+#     el formato de pantalla lo decide la plantilla
+# orjson escribe directamente bytes, así que jsonify() no pasa por str.
+import json
+
+import orjson
+from bson import ObjectId
+from flask.json.provider import JSONProvider
+
+_OPCIONES = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _convertir(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+class OrjsonProvider(JSONProvider):
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_convertir, option=_OPCIONES).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            # La sesión de Flask (TaggedJSONSerializer) necesita object_hook para
+            # recuperar tuplas, bytes, etc.; orjson no lo admite
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_convertir, option=_OPCIONES),
+            mimetype=self.mimetype
+        )
@@ -0,0 +1,224 @@
+# leaderboards.py
+# Rankings "mejor calificadas" y "tendencia" mantenidos en memoria.
+#
+# - Mejor calificadas: promedio bayesiano (C * m + suma) / (C + votos), donde
+#   m es el promedio global y C el número de votos "virtuales" del prior, para
+#   que una película con un solo 5 no supere a una con cien votos de 4.8.
+# - Tendencia: suma de actividad (calificaciones, comentarios, favoritos) con
+#   decaimiento exponencial. Se guarda cada evento escalado a un instante de
+#   referencia t0, así añadir actividad no obliga a recalcular las demás.
+#
+# Ambos rankings se actualizan en cada escritura y se leen en O(n). La recarga
+# periódica relee las calificaciones, los comentarios y los favoritos recientes
+# (colección actividad_favoritos, con su fecha), así no se pierde nada de lo
+# registrado en memoria.
+import bisect
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("cinetec.leaderboards")
+
+PRIOR_VOTOS = 5
+VIDA_MEDIA_HORAS = 24
+VENTANA_DIAS = 7
+PESO_CALIFICACION = 1.0
+PESO_COMENTARIO = 2.0
+PESO_FAVORITO = 3.0
+
+# Cada worker tiene su propia copia; se recarga desde MongoDB cada cierto
+# tiempo para absorber lo escrito por los demás workers
+RECARGA_SEGUNDOS = 300
+
+
+class Ranking:
+    """Lista ordenada de (valor desc, clave) con actualización O(log n) + inserción"""
+
+    def __init__(self):
+        self._valores = {}
+        self._orden = []
+
+    def actualizar(self, clave, valor):
+        anterior = self._valores.get(clave)
+        if anterior is not None:
+            del self._orden[bisect.bisect_left(self._orden, (-anterior, clave))]
+        self._valores[clave] = valor
+        bisect.insort(self._orden, (-valor, clave))
+
+    def valor(self, clave):
+        return self._valores.get(clave)
+
+    def top(self, n):
+        return [(clave, -negativo) for negativo, clave in self._orden[:n]]
+
+    def items(self):
+        return list(self._valores.items())
+
+    def limpiar(self):
+        self._valores.clear()
+        self._orden.clear()
+
+
+class Leaderboards:
+    def __init__(self, prior_votos=PRIOR_VOTOS, vida_media_horas=VIDA_MEDIA_HORAS):
+        self.prior_votos = prior_votos
+        self.decaimiento = math.log(2) / (vida_media_horas * 3600)
+        self.mejor_calificadas = Ranking()
+        self.tendencia = Ranking()
+        self._sumas = {}
+        self._votos = {}
+        self._suma_total = 0
+        self._votos_total = 0
+        self._media_usada = 0.0
+        self._t0 = time.time()
+        self._cargado_en = None
+        self._recargando = False
+        self._lock = threading.RLock()
+
+    # ---------- carga ----------
+    def cargado(self):
+        return self._cargado_en is not None
+
+    def necesita_carga(self):
+        return self._cargado_en is None or time.monotonic() - self._cargado_en > RECARGA_SEGUNDOS
+
+    def reservar_recarga(self):
+        """True para un solo llamador hasta que llame a liberar_recarga()"""
+        with self._lock:
+            if self._recargando:
+                return False
+            self._recargando = True
+            return True
+
+    def liberar_recarga(self):
+        self._recargando = False
+
+    def cargar(self, db):
+        """Reconstruye ambos rankings con una agregación y la actividad reciente"""
+        sumas, votos = {}, {}
+        for r in db.calificaciones.aggregate([
+            {'$group': {'_id': '$pelicula', 'suma': {'$sum': '$calificacion'}, 'votos': {'$sum': 1}}}
+        ]):
+            sumas[r['_id']] = r['suma']
+            votos[r['_id']] = r['votos']
+
+        desde = datetime.now() - timedelta(days=VENTANA_DIAS)
+        eventos = [
+            (c['pelicula'], PESO_CALIFICACION, c['fecha'])
+            for c in db.calificaciones.find({'fecha': {'$gte': desde}}, {'pelicula': 1, 'fecha': 1, '_id': 0})
+        ]
+        eventos += [
+            (c['pelicula'], PESO_COMENTARIO, c['fecha'])
+            for c in db.comentarios.find({'fecha': {'$gte': desde}}, {'pelicula': 1, 'fecha': 1, '_id': 0})
+        ]
+        eventos += [
+            (c['pelicula'], PESO_FAVORITO, c['fecha'])
+            for c in db.actividad_favoritos.find({'fecha': {'$gte': desde}}, {'pelicula': 1, 'fecha': 1, '_id': 0})
+        ]
+
+        with self._lock:
+            self._sumas, self._votos = sumas, votos
+            self._suma_total, self._votos_total = sum(sumas.values()), sum(votos.values())
+            self._recalcular_mejor_calificadas()
+
+            self._t0 = time.time()
+            self.tendencia.limpiar()
+            for pelicula, peso, fecha in eventos:
+                self._sumar_actividad(pelicula, peso, fecha.timestamp())
+
+            self._cargado_en = time.monotonic()
+        logger.info("Rankings cargados: %d películas, %d eventos recientes", len(votos), len(eventos))
+
+    # ---------- actualizaciones incrementales ----------
+    def registrar_calificacion(self, pelicula, nueva, anterior=None):
+        """Aplica una calificación nueva o modificada (anterior = valor previo del usuario)"""
+        with self._lock:
+            if self._cargado_en is None:
+                return
+            if anterior is None:
+                self._votos[pelicula] = self._votos.get(pelicula, 0) + 1
+                self._votos_total += 1
+                anterior = 0
+            self._sumas[pelicula] = self._sumas.get(pelicula, 0) + nueva - anterior
+            self._suma_total += nueva - anterior
+            self._actualizar_pelicula(pelicula)
+            self._sumar_actividad(pelicula, PESO_CALIFICACION, time.time())
+
+    def fijar_resumen(self, pelicula, suma, votos, actividad=0):
+        """Sustituye suma y votos de una película (p. ej. tras una importación masiva)"""
+        with self._lock:
+            if self._cargado_en is None:
+                return
+            self._suma_total += suma - self._sumas.get(pelicula, 0)
+            self._votos_total += votos - self._votos.get(pelicula, 0)
+            self._sumas[pelicula] = suma
+            self._votos[pelicula] = votos
+            self._actualizar_pelicula(pelicula)
+            if actividad:
+                self._sumar_actividad(pelicula, PESO_CALIFICACION * actividad, time.time())
+
+    def registrar_actividad(self, pelicula, peso):
+        with self._lock:
+            if self._cargado_en is None:
+                return
+            self._sumar_actividad(pelicula, peso, time.time())
+
+    # ---------- lectura ----------
+    def top(self, n):
+        with self._lock:
+            return [
+                {'titulo': pelicula, 'puntuacion': round(valor, 3),
+                 'promedio': round(self._sumas[pelicula] / self._votos[pelicula], 1),
+                 'total_votos': self._votos[pelicula]}
+                for pelicula, valor in self.mejor_calificadas.top(n)
+            ]
+
+    def trending(self, n):
+        with self._lock:
+            factor = math.exp(-self.decaimiento * (time.time() - self._t0))
+            return [
+                {'titulo': pelicula, 'puntuacion': round(valor * factor, 3)}
+                for pelicula, valor in self.tendencia.top(n)
+            ]
+
+    # ---------- internos ----------
+    def _media_global(self):
+        return self._suma_total / self._votos_total if self._votos_total else 0.0
+
+    def _bayesiano(self, pelicula, media):
+        votos = self._votos.get(pelicula, 0)
+        return (self.prior_votos * media + self._sumas.get(pelicula, 0)) / (self.prior_votos + votos)
+
+    def _recalcular_mejor_calificadas(self):
+        self._media_usada = self._media_global()
+        self.mejor_calificadas.limpiar()
+        for pelicula, votos in self._votos.items():
+            if votos > 0:
+                self.mejor_calificadas.actualizar(pelicula, self._bayesiano(pelicula, self._media_usada))
+
+    def _actualizar_pelicula(self, pelicula):
+        # La media global afecta a todas las películas; solo se reordena todo
+        # cuando se ha movido lo suficiente como para cambiar el ranking
+        if abs(self._media_global() - self._media_usada) > 0.05:
+            self._recalcular_mejor_calificadas()
+        elif self._votos.get(pelicula, 0) > 0:
+            self.mejor_calificadas.actualizar(pelicula, self._bayesiano(pelicula, self._media_usada))
+
+    def _sumar_actividad(self, pelicula, peso, cuando):
+        exponente = self.decaimiento * (cuando - self._t0)
+        if exponente > 50:
+            self._reescalar(cuando)
+            exponente = 0.0
+        actual = self.tendencia.valor(pelicula) or 0.0
+        self.tendencia.actualizar(pelicula, actual + peso * math.exp(exponente))
+
+    def _reescalar(self, nuevo_t0):
+        # Mueve la referencia t0 para que los valores no crezcan sin límite
+        factor = math.exp(-self.decaimiento * (nuevo_t0 - self._t0))
+        valores = [(pelicula, valor * factor) for pelicula, valor in self.tendencia.items()]
+        self.tendencia.limpiar()
+        for pelicula, valor in valores:
+            self.tendencia.actualizar(pelicula, valor)
+        self._t0 = nuevo_t0
@@ -0,0 +1,220 @@
+# passwords.py
+# Hash de contraseñas con KDF configurable.
+#
+# Formatos guardados en usuarios.password:
+#   scrypt$n=16384,r=8,p=1$<sal b64>$<hash b64>
+#   pbkdf2_sha256$<iteraciones>$<sal b64>$<hash b64>
+#   <64 hex>                      SHA-256 sin sal (formato antiguo)
+# Los parámetros viajan con cada hash, así que se puede subir el coste sin
+# invalidar contraseñas: al hacer login con un hash antiguo o de menor coste
+# se vuelve a calcular con el esquema actual.
+#
+# Cada hash ocupa un núcleo durante decenas de milisegundos. Se limita cuántos
+# se calculan a la vez en toda la máquina (todos los workers de gunicorn, con
+# SemaforoCompartido); si no hay plaza se rechaza el login al instante en
+# lugar de dejar a todos los workers ocupados en scrypt. El hash se calcula
+# en el hilo de la petición: con workers sync un pool de hilos no añadiría
+# nada, y con workers de hilos scrypt y pbkdf2_hmac ya liberan el GIL.
+#
+# Con workers sync cada hash ocupa un worker entero, así que por defecto hay
+# una plaza menos que workers (WEB_CONCURRENCY, que fija gunicorn_config.py),
+# con mínimo 1 y sin pasar del número de núcleos: una ráfaga de logins deja
+# siempre al menos un worker libre para las demás rutas. PASSWORD_WORKERS
+# fija otro valor.
+#
+# Para elegir el coste en una máquina concreta:
+#   python passwords.py --benchmark
+import argparse
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shared_cache import SemaforoCompartido, directorio_compartido
+
+logger = logging.getLogger("cinetec.passwords")
+
+ESQUEMA = os.getenv("PASSWORD_HASHER", "scrypt")
+SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", "16384"))
+SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+SCRYPT_P = 1
+PBKDF2_ITERACIONES = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "600000"))
+TAMANO_SAL = 16
+TAMANO_HASH = 32
+
+
+def plazas_por_defecto():
+    """Workers de gunicorn (WEB_CONCURRENCY) menos uno, entre 1 y el número de núcleos"""
+    workers = int(os.getenv("WEB_CONCURRENCY") or 1)
+    return max(min(workers - 1, os.cpu_count() or 1), 1)
+
+
+# Hashes simultáneos en la máquina
+MAX_SIMULTANEOS = int(os.getenv("PASSWORD_WORKERS") or plazas_por_defecto())
+
+
+class HashSaturado(Exception):
+    """Demasiados hashes en curso en la máquina; se debe reintentar más tarde"""
+
+
+def _b64(datos):
+    return base64.b64encode(datos).decode("ascii")
+
+
+# ==================== ESQUEMAS ====================
+def _scrypt(password, sal, n, r, p):
+    # maxmem holgado: scrypt necesita 128 * n * r bytes
+    return hashlib.scrypt(password.encode("utf-8"), salt=sal, n=n, r=r, p=p,
+                          maxmem=256 * n * r, dklen=TAMANO_HASH)
+
+
+def _pbkdf2(password, sal, iteraciones):
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), sal, iteraciones, dklen=TAMANO_HASH)
+
+
+def hash_password(password, esquema=None, n=None, iteraciones=None):
+    """Hash nuevo con sal aleatoria en el esquema configurado"""
+    esquema = esquema or ESQUEMA
+    sal = os.urandom(TAMANO_SAL)
+    if esquema == "scrypt":
+        n = n or SCRYPT_N
+        return f"scrypt$n={n},r={SCRYPT_R},p={SCRYPT_P}${_b64(sal)}${_b64(_scrypt(password, sal, n, SCRYPT_R, SCRYPT_P))}"
+    if esquema == "pbkdf2_sha256":
+        iteraciones = iteraciones or PBKDF2_ITERACIONES
+        return f"pbkdf2_sha256${iteraciones}${_b64(sal)}${_b64(_pbkdf2(password, sal, iteraciones))}"
+    raise ValueError(f"Esquema de contraseña desconocido: {esquema}")
+
+
+def _es_antiguo(almacenado):
+    return "$" not in almacenado and len(almacenado) == 64
+
+
+def verificar_password(password, almacenado):
+    """True si la contraseña corresponde al hash guardado (en cualquier formato)"""
+    if not almacenado:
+        return False
+    if _es_antiguo(almacenado):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), almacenado)
+
+    try:
+        esquema, parametros, sal, esperado = almacenado.split("$")
+        sal, esperado = base64.b64decode(sal), base64.b64decode(esperado)
+        if esquema == "scrypt":
+            valores = dict(p.split("=") for p in parametros.split(","))
+            calculado = _scrypt(password, sal, int(valores["n"]), int(valores["r"]), int(valores["p"]))
+        elif esquema == "pbkdf2_sha256":
+            calculado = _pbkdf2(password, sal, int(parametros))
+        else:
+            return False
+    except (ValueError, KeyError, IndexError, TypeError):
+        # Parámetros que faltan o no son números: se trata como contraseña incorrecta
+        logger.warning("Hash de contraseña con formato inválido")
+        return False
+    return hmac.compare_digest(calculado, esperado)
+
+
+def necesita_rehash(almacenado):
+    """True si el hash es del formato antiguo o de otro esquema/coste que el configurado"""
+    if _es_antiguo(almacenado):
+        return True
+    if ESQUEMA == "scrypt":
+        return not almacenado.startswith(f"scrypt$n={SCRYPT_N},r={SCRYPT_R},p={SCRYPT_P}$")
+    return not almacenado.startswith(f"pbkdf2_sha256${PBKDF2_ITERACIONES}$")
+
+
+# ==================== ADMISIÓN ====================
+class LimiteHash:
+    """Admite como máximo 'plazas' hashes a la vez entre todos los procesos"""
+
+    def __init__(self, plazas=MAX_SIMULTANEOS, directorio=None):
+        self.plazas = plazas
+        self.directorio = directorio or os.getenv("PASSWORD_LOCK_DIR") or directorio_compartido("passwords")
+        self._semaforo = None
+
+    def ejecutar(self, funcion, *args):
+        if self._semaforo is None:
+            self._semaforo = SemaforoCompartido(self.directorio, "hash", self.plazas)
+        plaza = self._semaforo.adquirir()
+        if plaza is None:
+            raise HashSaturado()
+        try:
+            return funcion(*args)
+        finally:
+            self._semaforo.liberar(plaza)
+
+
+limite = LimiteHash()
+
+
+def verificar_con_limite(password, almacenado):
+    return limite.ejecutar(verificar_password, password, almacenado)
+
+
+def hash_con_limite(password):
+    return limite.ejecutar(hash_password, password)
+
+
+# ==================== BENCHMARK ====================
+def benchmark(esquema, costes, hilos, segundos):
+    """Verificaciones por segundo con 'hilos' logins simultáneos para cada coste"""
+    resultados = []
+    for coste in costes:
+        if esquema == "scrypt":
+            almacenado = hash_password("contraseña-de-prueba", esquema, n=coste)
+        else:
+            almacenado = hash_password("contraseña-de-prueba", esquema, iteraciones=coste)
+
+        inicio = time.perf_counter()
+        verificar_password("contraseña-de-prueba", almacenado)
+        latencia = time.perf_counter() - inicio
+
+        with ThreadPoolExecutor(max_workers=hilos) as executor:
+            inicio = time.perf_counter()
+            total = 0
+            while time.perf_counter() - inicio < segundos:
+                list(executor.map(lambda _: verificar_password("contraseña-de-prueba", almacenado), range(hilos)))
+                total += hilos
+            transcurrido = time.perf_counter() - inicio
+        resultados.append({"coste": coste, "latencia_ms": round(latencia * 1000, 1),
+                           "logins_por_segundo": round(total / transcurrido, 1)})
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash de contraseñas")
+    parser.add_argument("--benchmark", action="store_true", help="Mide logins por segundo según el coste")
+    parser.add_argument("--esquema", default=ESQUEMA, choices=("scrypt", "pbkdf2_sha256"))
+    parser.add_argument("--hilos", type=int, default=MAX_SIMULTANEOS, help="Logins simultáneos (PASSWORD_WORKERS)")
+    parser.add_argument("--segundos", type=float, default=2.0, help="Duración de cada medición")
+    parser.add_argument("--objetivo-ms", type=float, default=100.0, help="Latencia máxima aceptable por login")
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return
+
+    if args.esquema == "scrypt":
+        costes = [2 ** e for e in range(12, 18)]
+        variable = "PASSWORD_SCRYPT_N"
+    else:
+        costes = [100000, 200000, 400000, 600000, 1000000]
+        variable = "PASSWORD_PBKDF2_ITERATIONS"
+
+    print(f"🚀 Midiendo {args.esquema} con {args.hilos} logins simultáneos...")
+    recomendado = None
+    for r in benchmark(args.esquema, costes, args.hilos, args.segundos):
+        print(f"   coste {r['coste']:>8}: {r['latencia_ms']:>7} ms por login, {r['logins_por_segundo']:>7} logins/s")
+        if r["latencia_ms"] <= args.objetivo_ms:
+            recomendado = r["coste"]
+
+    if recomendado:
+        print(f"✅ Coste recomendado (≤ {args.objetivo_ms} ms): {variable}={recomendado}")
+    else:
+        print(f"⚠️ Ningún coste baja de {args.objetivo_ms} ms en esta máquina")
+
+
+if __name__ == "__main__":
+    main()
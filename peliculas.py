@@ -0,0 +1,125 @@
+# peliculas.py
+# Catálogo de películas que muestra la app (título -> descripción, portada, plataforma).
+# Es solo datos: lo importan server.py y covers.py sin cargar Flask.
+PELICULAS_INFO = {
+    "El Resplandor": {
+        "titulo": "El Resplandor",
+        "portada": "https://m.media-amazon.com/images/M/MV5BZWFlYmY2MGEtZjVkYS00YzU4LTg0YjQtYzY1ZGE3NTA5NGQxXkEyXkFqcGdeQXVyMTQxNzMzNDI@._V1_.jpg",
+        "plataforma": "Amazon Prime",
+        "descripcion": "Un escritor acepta un trabajo de cuidador en un hotel aislado durante el invierno, donde su cordura se desmorona lentamente."
+    },
+    "El Padrino": {
+        "titulo": "El Padrino",
+        "portada": "https://m.media-amazon.com/images/M/MV5BM2MyNjYxNmUtYTAwNi00MTYxLWJmNWYtYzZlODY3ZTk3OTFlXkEyXkFqcGdeQXVyNzkwMjQ5NzM@._V1_.jpg",
+        "plataforma": "Netflix",
+        "descripcion": "La saga de la familia Corleone, una poderosa dinastía de la mafia italiana en Nueva York."
+    },
+    "El Caballero Oscuro": {
+        "titulo": "El Caballero Oscuro",
+        "portada": "https://m.media-amazon.com/images/M/MV5BMTMxNTMwODM0NF5BMl5BanBnXkFtZTcwODAyMTk2Mw@@._V1_.jpg",
+        "plataforma": "HBO Max",
+        "descripcion": "Batman se enfrenta al Joker, un criminal psicótico que quiere sumir a Gotham en la anarquía."
+    },
+    "La Lista de Schindler": {
+        "titulo": "La Lista de Schindler",
+        "portada": "https://m.media-amazon.com/images/M/MV5BNDE4OTMxMTctNmRhYy00NWE2LTg3YzItYTk3M2UwOTU5Njg4XkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
+        "plataforma": "Disney+",
+        "descripcion": "Un empresario alemán salva a más de mil refugiados judíos durante el Holocausto."
+    },
+    "Matrix": {
+        "titulo": "Matrix",
+        "portada": "https://m.media-amazon.com/images/M/MV5BNzQzOTk3OTAtNDQ0Zi00ZTVkLWI0MTEtMDllZjNkYzNjNTc4L2ltYWdlXkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
+        "plataforma": "HBO Max",
+        "descripcion": "Un hacker descubre que su realidad es una simulación creada por máquinas inteligentes."
+    },
+    "Origen": {
+        "titulo": "Origen",
+        "portada": "https://m.media-amazon.com/images/M/MV5BMjAxMzY3NjcxNF5BMl5BanBnXkFtZTcwNTI5OTM0Mw@@._V1_.jpg",
+        "plataforma": "Netflix",
+        "descripcion": "Un ladrón que roba secretos corporativos mediante el uso de tecnología para compartir sueños."
+    },
+    "Pulp Fiction": {
+        "titulo": "Pulp Fiction",
+        "portada": "https://m.media-amazon.com/images/M/MV5BNGNhMDIzZTUtNTBlZi00MTRlLWFjM2ItYzViMjE3YzI5MjljXkEyXkFqcGdeQXVyNzkwMjQ5NzM@._V1_.jpg",
+        "plataforma": "Amazon Prime",
+        "descripcion": "Las vidas de dos matones, un boxeador y una pareja de atracadores se entrelazan."
+    },
+    "El Señor de los Anillos": {
+        "titulo": "El Señor de los Anillos",
+        "portada": "https://m.media-amazon.com/images/M/MV5BN2EyZjM3NzUtNWUzMi00MTgxLWI0NTctMzY4M2VlOTdjZWRiXkEyXkFqcGdeQXVyNDUzOTQ5MjY@._V1_.jpg",
+        "plataforma": "HBO Max",
+        "descripcion": "Un hobbit debe destruir un anillo poderoso en el Monte del Destino para salvar la Tierra Media."
+    },
+    "Forrest Gump": {
+        "titulo": "Forrest Gump",
+        "portada": "https://m.media-amazon.com/images/M/MV5BNWIwODRlZTUtY2U3ZS00Yzg1LWJhNzYtMmZiYmEyNmU1NjMzXkEyXkFqcGdeQXVyMTQxNzMzNDI@._V1_.jpg",
+        "plataforma": "Netflix",
+        "descripcion": "La vida de un hombre con discapacidad intelectual que vive eventos históricos cruciales."
+    },
+    "Interestelar": {
+        "titulo": "Interestelar",
+        "portada": "https://m.media-amazon.com/images/M/MV5BZjdkOTU3MDktN2IxOS00OGEyLWFmMjktY2FiMmZkNWIyODZiXkEyXkFqcGdeQXVyMTMxODk2OTU@._V1_.jpg",
+        "plataforma": "Amazon Prime",
+        "descripcion": "Un grupo de exploradores viaja a través de un agujero de gusano en el espacio para asegurar la supervivencia humana."
+    },
+    "El Rey León": {
+        "titulo": "El Rey León",
+        "portada": "https://m.media-amazon.com/images/M/MV5BYTYxNGMyZTYtMjE3MS00MzNjLWFjNmYtMDk3N2FmM2JiM2M1XkEyXkFqcGdeQXVyNjY5NDU4NzI@._V1_.jpg",
+        "plataforma": "Disney+",
+        "descripcion": "Simba, un león joven, debe reclamar su lugar como rey después de la muerte de su padre."
+    },
+    "Gladiador": {
+        "titulo": "Gladiador",
+        "portada": "https://m.media-amazon.com/images/M/MV5BMDliMmNhNDEtODUyOS00MjNlLTgxODEtN2U3NzIxMGVkZTA1L2ltYWdlXkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
+        "plataforma": "Netflix",
+        "descripcion": "Un general romano traicionado se convierte en gladiador para vengar la muerte de su familia."
+    },
+    "Reservoir Dogs": {
+        "titulo": "Reservoir Dogs",
+        "portada": "https://m.media-amazon.com/images/M/MV5BZmExNmEwYWItYmQzOS00YjA5LTk2MjktZjEyZDE1Y2QxNjA1XkEyXkFqcGdeQXVyMTQxNzMzNDI@._V1_.jpg",
+        "plataforma": "Amazon Prime",
+        "descripcion": "Después de un robo fallido, los criminales sospechan que hay un informante entre ellos."
+    },
+    "Titanic": {
+        "titulo": "Titanic",
+        "portada": "https://m.media-amazon.com/images/M/MV5BMDdmZGU3NDQtY2E5My00ZTliLWIzOTUtMTY4ZGI1YjdiNjk3XkEyXkFqcGdeQXVyNTA4NzY1MzY@._V1_.jpg",
+        "plataforma": "Netflix",
+        "descripcion": "Una joven de alta sociedad y un artista pobre se enamoran a bordo del lujoso trasatlántico."
+    },
+    "Jurassic Park": {
+        "titulo": "Jurassic Park",
+        "portada": "https://m.media-amazon.com/images/M/MV5BMjM2MDgxMDg0Nl5BMl5BanBnXkFtZTgwNTM2OTM5NDE@._V1_.jpg",
+        "plataforma": "Amazon Prime",
+        "descripcion": "Un parque temático con dinosaurios clonados se convierte en una pesadilla cuando los animales escapan."
+    },
+    "El Silencio de los Inocentes": {
+        "titulo": "El Silencio de los Inocentes",
+        "portada": "https://m.media-amazon.com/images/M/MV5BNjNhZTk0ZmEtNjJhMi00YzFlLWE1MmEtYzM1M2ZmMGMwMTU4XkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
+        "plataforma": "HBO Max",
+        "descripcion": "Una joven agente del FBI busca la ayuda de un brillante asesino en serie para atrapar a otro."
+    },
+    "Star Wars": {
+        "titulo": "Star Wars: Una Nueva Esperanza",
+        "portada": "https://image.tmdb.org/t/p/w300/6FfCtAuVAW8XJjZ7eWeLibRLWTw.jpg",
+        "plataforma": "Disney+",
+        "descripcion": "Luke Skywalker se une a la rebelión para rescatar a la princesa Leia y derrotar al Imperio Galáctico."
+    },
+    "Terminator 2": {
+        "titulo": "Terminator 2: El Juicio Final",
+        "portada": "https://m.media-amazon.com/images/M/MV5BMGU2NzRmZjUtOGUxYS00ZjdjLWEwZWItY2NlM2JhNjkxNTFmXkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
+        "plataforma": "Netflix",
+        "descripcion": "Un cyborg es enviado del futuro para proteger al joven John Connor de un Terminator más avanzado."
+    },
+    "Avatar": {
+        "titulo": "Avatar",
+        "portada": "https://m.media-amazon.com/images/M/MV5BMTYwOTEwNjAzMl5BMl5BanBnXkFtZTcwODc5MTUwMw@@._V1_.jpg",
+        "plataforma": "Disney+",
+        "descripcion": "Un marine parapléjico es enviado a la luna Pandora en una misión única, pero se enfrenta a un dilema moral."
+    },
+    "El Gran Hotel Budapest": {
+        "titulo": "El Gran Hotel Budapest",
+        "portada": "https://m.media-amazon.com/images/M/MV5BMzM5NjUxOTEyMl5BMl5BanBnXkFtZTgwNjEyMDM0MDE@._V1_.jpg",
+        "plataforma": "Amazon Prime",
+        "descripcion": "Las aventuras de Gustave H, un legendario conserje de hotel, y Zero Moustafa, su joven amigo."
+    }
+}
@@ -0,0 +1,149 @@
+# profiling.py
+# Perfilado bajo demanda de peticiones individuales.
+#
+# Un hilo muestrea cada pocos milisegundos la pila del hilo que atiende la
+# petición y acumula pilas colapsadas ("a;b;c N"), formato que abren
+# directamente speedscope.app y flamegraph.pl. Cada muestra se atribuye a una
+# fase: mongo (pymongo/bson), jinja (jinja2/plantillas) o python (el resto).
+#
+# Se activa por petición con la cabecera X-Profile (admins o PROFILE_TOKEN)
+# o al azar con PROFILE_SAMPLE_RATE. Los perfiles quedan en PROFILE_DIR.
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger("cinetec.profiling")
+
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+INTERVALO_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+TASA_MUESTREO = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+MAX_PERFILES = 50
+
+
+def _fase(pila):
+    # La fase la decide el frame marcado más cercano a la hoja
+    for frame in reversed(pila):
+        if frame.startswith("[mongo]"):
+            return "mongo"
+        if frame.startswith("[jinja]"):
+            return "jinja"
+    return "python"
+
+
+class PerfiladorMuestreo:
+    """Muestrea la pila de un hilo a intervalos fijos hasta detener()"""
+
+    def __init__(self, hilo_id, intervalo_ms=INTERVALO_MS):
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo_ms / 1000.0
+        self.pilas = Counter()
+        self.fases = Counter()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="perfilador", daemon=True)
+        self.inicio = None
+        self.duracion = 0.0
+
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+        self.duracion = time.perf_counter() - self.inicio
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo):
+            frame = sys._current_frames().get(self.hilo_id)
+            if frame is None:
+                continue
+            pila = []
+            while frame is not None:
+                archivo = frame.f_code.co_filename
+                nombre = f"{frame.f_code.co_name} ({os.path.basename(archivo)}:{frame.f_lineno})"
+                if "pymongo" in archivo or "bson" in archivo:
+                    nombre = "[mongo] " + nombre
+                elif "jinja2" in archivo or archivo.endswith(".html"):
+                    nombre = "[jinja] " + nombre
+                pila.append(nombre.replace(";", ","))
+                frame = frame.f_back
+            pila.reverse()
+            self.pilas[";".join(pila)] += 1
+            self.fases[_fase(pila)] += 1
+
+    def resumen(self):
+        muestras = sum(self.fases.values())
+        return {
+            "duracion_ms": round(self.duracion * 1000, 1),
+            "intervalo_ms": self.intervalo * 1000,
+            "muestras": muestras,
+            "fases_ms": {fase: round(n * self.intervalo * 1000, 1) for fase, n in self.fases.items()},
+            "fases_pct": {fase: round(100 * n / muestras, 1) for fase, n in self.fases.items()} if muestras else {},
+        }
+
+
+def debe_perfilar(cabecera, es_admin, token=None):
+    """Decide si la petición actual se perfila"""
+    if cabecera:
+        token = token or os.getenv("PROFILE_TOKEN")
+        if es_admin or (token and cabecera == token):
+            return True
+    return TASA_MUESTREO > 0 and random.random() < TASA_MUESTREO
+
+
+def guardar_perfil(perfilador, ruta, request_id, directorio=PROFILE_DIR):
+    """Escribe <nombre>.collapsed y <nombre>.json; devuelve el nombre base"""
+    os.makedirs(directorio, exist_ok=True)
+    # request_id puede venir de la cabecera X-Request-ID: nunca va tal cual al nombre
+    ruta_segura = re.sub(r"[^A-Za-z0-9_-]+", "_", ruta.strip("/")) or "index"
+    id_seguro = re.sub(r"[^A-Za-z0-9_-]+", "_", str(request_id))[:64] or "sin-id"
+    nombre = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{ruta_segura[:40]}-{id_seguro}"
+
+    with open(os.path.join(directorio, f"{nombre}.collapsed"), "w", encoding="utf-8") as f:
+        for pila, n in perfilador.pilas.most_common():
+            f.write(f"{pila} {n}\n")
+
+    resumen = {"ruta": ruta, "request_id": request_id, **perfilador.resumen()}
+    with open(os.path.join(directorio, f"{nombre}.json"), "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+
+    _purgar(directorio)
+    logger.info("Perfil guardado: %s (%s)", nombre, resumen["fases_ms"])
+    return nombre
+
+
+def listar_perfiles(directorio=PROFILE_DIR):
+    """Resúmenes de los perfiles más recientes primero"""
+    if not os.path.isdir(directorio):
+        return []
+    perfiles = []
+    for archivo in sorted(os.listdir(directorio), reverse=True):
+        if not archivo.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directorio, archivo), encoding="utf-8") as f:
+                perfiles.append({"nombre": archivo[:-5], **json.load(f)})
+        except (OSError, ValueError):
+            continue
+    return perfiles
+
+
+def _purgar(directorio):
+    nombres = sorted({a.rsplit(".", 1)[0] for a in os.listdir(directorio)}, reverse=True)
+    for viejo in nombres[MAX_PERFILES:]:
+        for extension in (".collapsed", ".json"):
+            try:
+                os.remove(os.path.join(directorio, viejo + extension))
+            except OSError:
+                pass
@@ -0,0 +1,129 @@
+# provision_users.py
+# Alta de usuarios apoyada en los índices únicos de usuarios (usuario, email).
+#
+# El registro inserta directamente y traduce DuplicateKeyError al campo
+# repetido: un solo viaje a MongoDB y sin carreras entre dos altas simultáneas.
+# Los índices los crea database.asegurar_indices (la app al conectar); mientras
+# falte el de email por repetidos antiguos, /register comprueba el email a mano.
+#
+# Uso:
+#   python provision_users.py usuarios.ndjson        (alta masiva para migraciones)
+#   python provision_users.py usuarios.csv --lote 500
+#
+# Cada fila necesita "usuario", "nombre", "email" y "password" (texto plano)
+# o "password_hash" (hash ya calculado, también SHA-256 antiguo: se migra en
+# el primer login); "rol" es opcional.
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from pymongo.errors import BulkWriteError
+
+from database import asegurar_indices, cliente_cli
+from import_files import leer_filas
+from passwords import hash_password
+
+TAMANO_LOTE = 1000
+DESCRIPCION_INICIAL = "Hola, soy nuevo en CineTec!"
+FOTO_INICIAL = "https://cdn-icons-png.flaticon.com/512/3135/3135715.png"
+
+
+def documento_usuario(usuario, nombre, email, password_hash, rol="usuario"):
+    return {
+        "usuario": usuario,
+        "nombre": nombre,
+        "email": email,
+        "password": password_hash,
+        "descripcion": DESCRIPCION_INICIAL,
+        "foto_perfil": FOTO_INICIAL,
+        "fecha_registro": datetime.now(),
+        "favoritos": [],
+        "rol": rol
+    }
+
+
+def campo_duplicado(detalles):
+    """'usuario' o 'email' a partir de los detalles de un error de clave duplicada"""
+    detalles = detalles or {}
+    patron = detalles.get("keyPattern") or detalles.get("keyValue") or {}
+    for campo in ("usuario", "email"):
+        if campo in patron:
+            return campo
+    # Servidores antiguos solo incluyen el nombre del índice en el mensaje
+    mensaje = detalles.get("errmsg", "")
+    for campo in ("usuario", "email"):
+        if f"{campo}_1" in mensaje:
+            return campo
+    return None
+
+
+# ==================== ALTA MASIVA ====================
+def provisionar(db, filas, tamano_lote=TAMANO_LOTE):
+    """Inserta usuarios en lotes sin orden; los repetidos se cuentan, no detienen la carga"""
+    stats = {"procesadas": 0, "insertadas": 0, "invalidas": 0, "usuario_repetido": 0, "email_repetido": 0}
+    lote = []
+    inicio = time.perf_counter()
+
+    def vaciar():
+        try:
+            stats["insertadas"] += len(db.usuarios.insert_many(lote, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            errores = e.details.get("writeErrors", [])
+            stats["insertadas"] += e.details.get("nInserted", 0)
+            for error in errores:
+                campo = campo_duplicado(error) if error.get("code") == 11000 else None
+                stats[f"{campo}_repetido" if campo else "invalidas"] += 1
+
+    for fila in filas:
+        stats["procesadas"] += 1
+        if not isinstance(fila, dict):
+            stats["invalidas"] += 1
+            continue
+        datos = {c: str(fila.get(c) or "").strip() for c in ("usuario", "nombre", "email", "password", "password_hash")}
+        if not datos["usuario"] or not datos["email"] or not (datos["password"] or datos["password_hash"]):
+            stats["invalidas"] += 1
+            continue
+        lote.append(documento_usuario(
+            datos["usuario"], datos["nombre"] or datos["usuario"], datos["email"],
+            datos["password_hash"] or hash_password(datos["password"]),
+            fila.get("rol") or "usuario"
+        ))
+        if len(lote) >= tamano_lote:
+            vaciar()
+            lote = []
+    if lote:
+        vaciar()
+
+    stats["segundos"] = round(time.perf_counter() - inicio, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alta masiva de usuarios")
+    parser.add_argument("archivo", help="Archivo .ndjson/.jsonl o .csv ('-' para stdin en NDJSON)")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Usuarios por insert_many")
+    args = parser.parse_args()
+
+    client = cliente_cli()
+    db = client.cineTecDB
+
+    # Sin los índices únicos el alta crearía usuarios o emails repetidos
+    fallidos = asegurar_indices(db, ["usuarios"])
+    if fallidos:
+        for nombre, error in fallidos.items():
+            print(f"❌ No se pudo crear el índice {nombre}: {error}")
+        print("❌ Elimina los usuarios repetidos antes de dar de alta más")
+        client.close()
+        sys.exit(1)
+    print(f"🚀 Dando de alta usuarios desde {args.archivo}...")
+    stats = provisionar(db, leer_filas(args.archivo), args.lote)
+    client.close()
+    print(f"✅ Procesadas: {stats['procesadas']} (insertadas {stats['insertadas']}, "
+          f"usuario repetido {stats['usuario_repetido']}, email repetido {stats['email_repetido']}, "
+          f"inválidas {stats['invalidas']})")
+    print(f"⏱️ {stats['segundos']} s")
+
+
+if __name__ == "__main__":
+    main()
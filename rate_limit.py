@@ -0,0 +1,192 @@
+# rate_limit.py
+# Control de admisión:
+#   - token bucket por ruta y por cliente (usuario de la sesión o IP) -> 429
+#   - límite de peticiones simultáneas en rutas costosas              -> 503
+# En ambos casos se responde al instante con Retry-After en lugar de dejar
+# la petición en cola hasta el timeout de gunicorn.
+#
+# Los buckets son por proceso. La concurrencia se cuenta para todos los
+# workers de la máquina con archivos bloqueados con flock (uno por plaza):
+# con workers sync cada proceso atiende una sola petición, así que un
+# semáforo en memoria nunca se llenaría.
+#
+# La IP es la de la conexión (remote_addr). Detrás de un proxy hay que
+# indicar cuántos saltos son de confianza con TRUSTED_PROXIES para que se
+# use X-Forwarded-For; sin eso la cabecera la controla el cliente.
+import json
+import logging
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request, session
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from shared_cache import SemaforoCompartido, directorio_compartido
+
+logger = logging.getLogger("cinetec.rate_limit")
+
+# Límites por defecto (endpoint de Flask -> configuración).
+#   por_minuto:   tokens que se recargan por minuto
+#   rafaga:       tamaño del bucket (peticiones seguidas permitidas)
+#   concurrencia: peticiones simultáneas en la máquina (todos los workers)
+# Se pueden sobreescribir con RATE_LIMITS='{"rate_movie": {"por_minuto": 60}}'
+LIMITES_POR_DEFECTO = {
+    "login": {"por_minuto": 10, "rafaga": 5},
+    "register": {"por_minuto": 5, "rafaga": 3},
+    "rate_movie": {"por_minuto": 60, "rafaga": 15},
+    "rate_movies": {"por_minuto": 6, "rafaga": 2},
+    "add_comment": {"por_minuto": 10, "rafaga": 5},
+    "react_comment": {"por_minuto": 60, "rafaga": 20},
+    "search_comments": {"por_minuto": 30, "rafaga": 10},
+    "upload_photo": {"por_minuto": 4, "rafaga": 2, "concurrencia": 1},
+    "pelispy": {"por_minuto": 60, "rafaga": 20, "concurrencia": 4},
+}
+
+MAX_BUCKETS = 10000
+
+
+def cargar_limites(extra=None):
+    """Límites por defecto con extra (dict) o RATE_LIMITS encima"""
+    limites = {ruta: dict(config) for ruta, config in LIMITES_POR_DEFECTO.items()}
+    if extra is None:
+        try:
+            extra = json.loads(os.getenv("RATE_LIMITS", "{}"))
+        except ValueError:
+            logger.warning("RATE_LIMITS no es JSON válido, usando límites por defecto")
+            extra = {}
+    if not isinstance(extra, dict):
+        logger.warning("RATE_LIMITS debe ser un objeto JSON, usando límites por defecto")
+        extra = {}
+    for ruta, config in extra.items():
+        if not isinstance(config, dict):
+            logger.warning("Límite de %s ignorado: debe ser un objeto", ruta)
+            continue
+        limites.setdefault(ruta, {}).update(config)
+    return limites
+
+
+class TokenBucket:
+    """Bucket de tokens con recarga continua"""
+
+    def __init__(self, capacidad, por_segundo):
+        self.capacidad = capacidad
+        self.por_segundo = por_segundo
+        self.tokens = float(capacidad)
+        self.ultimo = time.monotonic()
+
+    def tomar(self):
+        """Devuelve (permitido, segundos hasta el próximo token)"""
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultimo) * self.por_segundo)
+        self.ultimo = ahora
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0
+        return False, (1 - self.tokens) / self.por_segundo
+
+    def lleno(self):
+        ahora = time.monotonic()
+        return self.tokens + (ahora - self.ultimo) * self.por_segundo >= self.capacidad
+
+
+class RateLimiter:
+    """Buckets por (ruta, cliente) y semáforos compartidos por ruta"""
+
+    def __init__(self, limites, directorio=None):
+        self.limites = limites
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.directorio = directorio or os.getenv("RATE_LIMIT_DIR") or directorio_compartido("limites")
+        self._semaforos = None
+
+    def consumir(self, ruta, cliente):
+        """Devuelve (permitido, retry_after) para una petición de cliente a ruta"""
+        config = self.limites.get(ruta)
+        if not config or not config.get("por_minuto"):
+            return True, 0
+
+        with self._lock:
+            clave = (ruta, cliente)
+            bucket = self._buckets.get(clave)
+            if bucket is None:
+                if len(self._buckets) >= MAX_BUCKETS:
+                    self._purgar()
+                bucket = TokenBucket(config.get("rafaga", config["por_minuto"]), config["por_minuto"] / 60.0)
+                self._buckets[clave] = bucket
+            return bucket.tomar()
+
+    def semaforo(self, ruta):
+        # Se crean en la primera petición para que crear la app no toque el disco
+        if self._semaforos is None:
+            with self._lock:
+                if self._semaforos is None:
+                    self._semaforos = {
+                        r: SemaforoCompartido(self.directorio, r, config["concurrencia"])
+                        for r, config in self.limites.items()
+                        if config.get("concurrencia")
+                    }
+        return self._semaforos.get(ruta)
+
+    def _purgar(self):
+        # Los buckets llenos equivalen a uno nuevo: se pueden descartar
+        for clave in [c for c, b in self._buckets.items() if b.lleno()]:
+            del self._buckets[clave]
+
+
+def configurar_limites(app):
+    """Crea el limitador de la app; config['RATE_LIMITS'], ['RATE_LIMIT_DIR'] y
+    ['TRUSTED_PROXIES'] tienen prioridad sobre las variables de entorno"""
+    app.extensions["rate_limit"] = RateLimiter(
+        cargar_limites(app.config.get("RATE_LIMITS")), app.config.get("RATE_LIMIT_DIR")
+    )
+    saltos = int(app.config.get("TRUSTED_PROXIES", os.getenv("TRUSTED_PROXIES", "0")))
+    if saltos:
+        # remote_addr pasa a ser la IP que añadió el último proxy de confianza
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=saltos)
+
+
+def cliente_actual():
+    """Identifica al cliente por usuario de sesión o, si no hay sesión, por IP"""
+    if 'usuario' in session:
+        return f"u:{session['usuario']}"
+    return f"ip:{request.remote_addr}"
+
+
+def rechazar(codigo, mensaje, retry_after):
+    retry_after = max(1, math.ceil(retry_after))
+    if request.accept_mimetypes.best == "text/html":
+        headers = {"Retry-After": str(retry_after), "Content-Type": "text/plain; charset=utf-8"}
+        return f"{mensaje}. Intenta de nuevo en {retry_after} s.", codigo, headers
+    respuesta = jsonify({"success": False, "error": mensaje, "reintentar_en": retry_after})
+    respuesta.headers["Retry-After"] = str(retry_after)
+    return respuesta, codigo
+
+
+def limitar(ruta):
+    """Decorador: aplica el límite configurado para ruta antes de ejecutar la vista"""
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            limitador = current_app.extensions["rate_limit"]
+            permitido, espera = limitador.consumir(ruta, cliente_actual())
+            if not permitido:
+                logger.info("Límite de peticiones en %s para %s", ruta, cliente_actual(), extra={"muestrear": True})
+                return rechazar(429, "Demasiadas peticiones", espera)
+
+            semaforo = limitador.semaforo(ruta)
+            if semaforo is None:
+                return vista(*args, **kwargs)
+
+            plaza = semaforo.adquirir()
+            if plaza is None:
+                logger.warning("%s saturada, petición descartada", ruta)
+                return rechazar(503, "Servidor ocupado", 1)
+            try:
+                return vista(*args, **kwargs)
+            finally:
+                semaforo.liberar(plaza)
+        return envoltura
+    return decorador
@@ -0,0 +1,180 @@
+# rating_stats.py
+# Histogramas de calificaciones (1-5 estrellas) precalculados:
+#   estadisticas_peliculas: {_id: pelicula, hist: {"1": n, ..., "5": n}, total, suma}
+#   estadisticas_usuarios:  {_id: usuario,  hist: {...}, total, suma}
+#
+# Se mantienen con $inc en cada cambio de calificación; /rate_movies e
+# import_ratings.py los recalculan al terminar (import_ratings reconstruye
+# todo en bloque si el archivo afecta a muchos usuarios). Solo hace falta
+# reconstruirlos a mano tras escribir calificaciones directamente en MongoDB
+# (restaurar un backup, migraciones); se cuentan en bloque con NumPy:
+#   python rating_stats.py --rebuild
+#   python rating_stats.py --rebuild --desde export.ndjson
+import argparse
+import time
+
+from pymongo import ReplaceOne
+
+from database import cliente_cli
+from import_files import leer_filas
+
+ESTRELLAS = ("1", "2", "3", "4", "5")
+TAMANO_BLOQUE = 50000
+
+
+def _vacio():
+    return {"hist": {e: 0 for e in ESTRELLAS}, "total": 0, "suma": 0}
+
+
+def _documento(hist):
+    """Convierte una fila de 5 conteos en el documento que se guarda"""
+    conteos = [int(n) for n in hist]
+    return {
+        "hist": dict(zip(ESTRELLAS, conteos)),
+        "total": sum(conteos),
+        "suma": sum(n * (i + 1) for i, n in enumerate(conteos))
+    }
+
+
+def formatear(doc):
+    """Respuesta pública de un documento de estadísticas (o ceros si no existe)"""
+    doc = doc or _vacio()
+    hist = {e: doc.get("hist", {}).get(e, 0) for e in ESTRELLAS}
+    total = doc.get("total", 0)
+    return {
+        "histograma": hist,
+        "total": total,
+        "promedio": round(doc.get("suma", 0) / total, 2) if total else 0
+    }
+
+
+# ==================== ACTUALIZACIÓN INCREMENTAL ====================
+def registrar_cambio(db, usuario, pelicula, nueva, anterior=None):
+    """Mueve un voto de la estrella anterior a la nueva en ambos histogramas"""
+    if anterior == nueva:
+        return
+    incrementos = {f"hist.{nueva}": 1, "suma": nueva}
+    if anterior is None:
+        incrementos["total"] = 1
+    else:
+        incrementos[f"hist.{anterior}"] = -1
+        incrementos["suma"] -= anterior
+
+    db.estadisticas_peliculas.update_one({"_id": pelicula}, {"$inc": incrementos}, upsert=True)
+    db.estadisticas_usuarios.update_one({"_id": usuario}, {"$inc": incrementos}, upsert=True)
+
+
+def recalcular(db, peliculas=(), usuarios=()):
+    """Recalcula desde calificaciones los histogramas de algunas películas y usuarios"""
+    for campo, claves, coleccion in (
+        ("pelicula", peliculas, db.estadisticas_peliculas),
+        ("usuario", usuarios, db.estadisticas_usuarios),
+    ):
+        if not claves:
+            continue
+        conteos = {clave: [0] * 5 for clave in claves}
+        for r in db.calificaciones.aggregate([
+            {"$match": {campo: {"$in": list(claves)}}},
+            {"$group": {"_id": {"clave": f"${campo}", "estrellas": "$calificacion"}, "n": {"$sum": 1}}}
+        ]):
+            conteos[r["_id"]["clave"]][int(r["_id"]["estrellas"]) - 1] = r["n"]
+        coleccion.bulk_write(
+            [ReplaceOne({"_id": clave}, _documento(hist), upsert=True) for clave, hist in conteos.items()],
+            ordered=False
+        )
+
+
+# ==================== RECONSTRUCCIÓN EN LOTE ====================
+def _contar(np, claves, indices, estrellas, acumulado):
+    codigos = np.asarray(indices, dtype=np.int64) * 5 + (np.asarray(estrellas, dtype=np.int64) - 1)
+    conteo = np.bincount(codigos, minlength=len(claves) * 5).reshape(-1, 5)
+    if acumulado.shape[0] < conteo.shape[0]:
+        acumulado = np.vstack([acumulado, np.zeros((conteo.shape[0] - acumulado.shape[0], 5), dtype=np.int64)])
+    acumulado[:conteo.shape[0]] += conteo
+    return acumulado
+
+
+def leer_coleccion(db):
+    """Todas las calificaciones, solo con los campos que cuenta reconstruir()"""
+    return db.calificaciones.find({}, {"usuario": 1, "pelicula": 1, "calificacion": 1, "_id": 0},
+                                  batch_size=TAMANO_BLOQUE)
+
+
+def reconstruir(db, filas):
+    """Cuenta todas las filas por bloques con np.bincount y reescribe ambos histogramas"""
+    import numpy as np
+
+    inicio = time.perf_counter()
+    peliculas, usuarios = {}, {}
+    hist_peliculas = np.zeros((0, 5), dtype=np.int64)
+    hist_usuarios = np.zeros((0, 5), dtype=np.int64)
+    idx_p, idx_u, estrellas = [], [], []
+    procesadas = 0
+
+    def vaciar():
+        nonlocal hist_peliculas, hist_usuarios
+        if estrellas:
+            hist_peliculas = _contar(np, peliculas, idx_p, estrellas, hist_peliculas)
+            hist_usuarios = _contar(np, usuarios, idx_u, estrellas, hist_usuarios)
+            idx_p.clear(), idx_u.clear(), estrellas.clear()
+
+    for fila in filas:
+        try:
+            calificacion = int(fila.get("calificacion"))
+        except (TypeError, ValueError):
+            continue
+        if calificacion < 1 or calificacion > 5 or not fila.get("pelicula") or not fila.get("usuario"):
+            continue
+        idx_p.append(peliculas.setdefault(fila["pelicula"], len(peliculas)))
+        idx_u.append(usuarios.setdefault(fila["usuario"], len(usuarios)))
+        estrellas.append(calificacion)
+        procesadas += 1
+        if len(estrellas) >= TAMANO_BLOQUE:
+            vaciar()
+    vaciar()
+
+    for claves, hist, coleccion in (
+        (peliculas, hist_peliculas, db.estadisticas_peliculas),
+        (usuarios, hist_usuarios, db.estadisticas_usuarios),
+    ):
+        operaciones = [ReplaceOne({"_id": clave}, _documento(hist[i]), upsert=True) for clave, i in claves.items()]
+        for i in range(0, len(operaciones), 1000):
+            coleccion.bulk_write(operaciones[i:i + 1000], ordered=False)
+        # Lo que ya no tiene calificaciones se elimina
+        coleccion.delete_many({"_id": {"$nin": list(claves)}})
+
+    return {
+        "calificaciones": procesadas,
+        "peliculas": len(peliculas),
+        "usuarios": len(usuarios),
+        "segundos": round(time.perf_counter() - inicio, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Histogramas de calificaciones")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruye todos los histogramas")
+    parser.add_argument("--desde", help="Export NDJSON/CSV a usar en lugar de leer la colección")
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    client = cliente_cli()
+    db = client.cineTecDB
+
+    if args.desde:
+        filas = (f for f in leer_filas(args.desde) if isinstance(f, dict))
+    else:
+        filas = leer_coleccion(db)
+
+    print("🚀 Reconstruyendo histogramas...")
+    resultado = reconstruir(db, filas)
+    client.close()
+    print(f"✅ {resultado['calificaciones']} calificaciones, {resultado['peliculas']} películas, "
+          f"{resultado['usuarios']} usuarios en {resultado['segundos']} s")
+
+
+if __name__ == "__main__":
+    main()
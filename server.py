@@ -1,15 +1,41 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-from pymongo import MongoClient
+from flask import Blueprint, Flask, current_app, render_template, request, redirect, url_for, session, flash, jsonify, send_file, send_from_directory, g
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+from werkzeug.local import LocalProxy
 import os
+import tempfile
 from datetime import datetime
-import hashlib
 import base64
 import re
+import threading
+import time
+import logging
+
+from circuit_breaker import CircuitBreaker
+from comment_archive import leer_archivo
+from counters import ContadorBuffer
+from database import asegurar_indices, crear_cliente
+from covers import ANCHO_POR_DEFECTO, COVER_CACHE_DIR, FORMATOS, CacheCovers, clave_portada, descargar_url, etag_archivo
+from app_logging import configurar_logging
+from import_ratings import actualizar_derivados, importar_calificaciones
+from json_provider import OrjsonProvider
+import profiling
+from peliculas import PELICULAS_INFO
+from passwords import HashSaturado, hash_con_limite, necesita_rehash, verificar_con_limite
+from provision_users import campo_duplicado, documento_usuario
+from leaderboards import PESO_COMENTARIO, PESO_FAVORITO, Leaderboards
+from rate_limit import configurar_limites, limitar
+from shared_cache import CLAVE_RATINGS, CacheCompartida
+import analytics
+import rating_stats
+import user_views
 
 # ==================== CONFIGURACIÓN ====================
-app = Flask(__name__)
-app.secret_key = os.getenv("SECRET_KEY", "clave_temporal_123")
+# Las rutas viven en un blueprint; la app se construye en create_app()
+bp = Blueprint("cinetec", __name__)
+
+logger = logging.getLogger("cinetec")
 
 # Configuración para subir imágenes
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
@@ -17,157 +43,128 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# ==================== RECURSOS POR APLICACIÓN ====================
+# Cliente de MongoDB, circuit breaker, contadores, rankings, caché compartida y
+# caché de portadas viven en app.extensions['cinetec'] (ver create_app): dos apps del mismo
+# proceso no comparten estado. Los handlers los usan a través de estos proxies,
+# que se resuelven con current_app en cada acceso.
+def _recursos():
+    return current_app.extensions['cinetec']
+
+breaker_mongo = LocalProxy(lambda: _recursos()['breaker_mongo'])
+cache_compartida = LocalProxy(lambda: _recursos()['cache_compartida'])
+contador_reacciones = LocalProxy(lambda: _recursos()['contador_reacciones'])
+leaderboards = LocalProxy(lambda: _recursos()['leaderboards'])
+estado_calentamiento = LocalProxy(lambda: _recursos()['calentamiento'])
+cache_covers = LocalProxy(lambda: _recursos()['cache_covers'])
+
 # ==================== CONEXIÓN MONGODB ====================
-def get_mongo_client():
-    """Función para obtener conexión a MongoDB"""
+# Un MongoClient (con su pool de conexiones) por proceso. Se crea después
+# del fork de gunicorn: un cliente abierto en el master no sirve en los workers.
+# Una app creada con config={'MONGO_CLIENT': ...} usa ese cliente en su lugar
+_mongo = {'client': None, 'pid': None}
+
+class _ConexionPrestada:
+    """Envuelve el cliente del proceso; close() devuelve la conexión al pool en vez de cerrarlo"""
+    
+    def __init__(self, client):
+        self._client = client
+    
+    def __getattr__(self, nombre):
+        return getattr(self._client, nombre)
+    
+    def close(self):
+        pass
+
+def _cliente_del_proceso(recursos):
+    if recursos['mongo_client'] is not None:
+        return recursos['mongo_client']
+    if _mongo['client'] is None or _mongo['pid'] != os.getpid():
+        _mongo['client'] = crear_cliente()
+        _mongo['pid'] = os.getpid()
+    return _mongo['client']
+
+def _conectar(recursos):
+    # Si MongoDB falla varias veces seguidas dejamos de esperar el timeout de
+    # 5 segundos en cada petición y respondemos de inmediato hasta que se recupere
+    breaker = recursos['breaker_mongo']
+    if not breaker.permitir():
+        logger.warning("MongoDB no disponible (circuito abierto), fallando rápido", extra={"muestrear": True})
+        return None
+    
     try:
-        mongodb_uri = os.getenv("MONGODB_URI")
-        if not mongodb_uri:
-            raise ValueError("No se encontró MONGODB_URI en las variables de entorno")
-        
-        client = MongoClient(mongodb_uri, 
-                           serverSelectionTimeoutMS=5000,
-                           connectTimeoutMS=5000,
-                           retryWrites=True,
-                           w='majority')
+        client = _cliente_del_proceso(recursos)
         
-        # Test de conexión
+        # Test de conexión (sobre una conexión ya abierta del pool)
         client.admin.command('ping')
-        print("✅ Conexión MongoDB exitosa")
-        return client
+        breaker.registrar_exito()
+        logger.debug("Conexión MongoDB exitosa")
+        
+        # La primera conexión de cada app crea los índices que falten (idempotente)
+        if recursos['indices_fallidos'] is None:
+            recursos['indices_fallidos'] = asegurar_indices(client.cineTecDB)
+        return _ConexionPrestada(client)
     except Exception as e:
-        print(f"❌ Error de conexión MongoDB: {e}")
+        breaker.registrar_fallo()
+        logger.error("Error de conexión MongoDB: %s", e)
         return None
 
-# ==================== DICCIONARIO DE PELÍCULAS ====================
-# Información completa de todas las películas
-PELICULAS_INFO = {
-    "El Resplandor": {
-        "titulo": "El Resplandor",
-        "portada": "https://m.media-amazon.com/images/M/MV5BZWFlYmY2MGEtZjVkYS00YzU4LTg0YjQtYzY1ZGE3NTA5NGQxXkEyXkFqcGdeQXVyMTQxNzMzNDI@._V1_.jpg",
-        "plataforma": "Amazon Prime",
-        "descripcion": "Un escritor acepta un trabajo de cuidador en un hotel aislado durante el invierno, donde su cordura se desmorona lentamente."
-    },
-    "El Padrino": {
-        "titulo": "El Padrino",
-        "portada": "https://m.media-amazon.com/images/M/MV5BM2MyNjYxNmUtYTAwNi00MTYxLWJmNWYtYzZlODY3ZTk3OTFlXkEyXkFqcGdeQXVyNzkwMjQ5NzM@._V1_.jpg",
-        "plataforma": "Netflix",
-        "descripcion": "La saga de la familia Corleone, una poderosa dinastía de la mafia italiana en Nueva York."
-    },
-    "El Caballero Oscuro": {
-        "titulo": "El Caballero Oscuro",
-        "portada": "https://m.media-amazon.com/images/M/MV5BMTMxNTMwODM0NF5BMl5BanBnXkFtZTcwODAyMTk2Mw@@._V1_.jpg",
-        "plataforma": "HBO Max",
-        "descripcion": "Batman se enfrenta al Joker, un criminal psicótico que quiere sumir a Gotham en la anarquía."
-    },
-    "La Lista de Schindler": {
-        "titulo": "La Lista de Schindler",
-        "portada": "https://m.media-amazon.com/images/M/MV5BNDE4OTMxMTctNmRhYy00NWE2LTg3YzItYTk3M2UwOTU5Njg4XkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
-        "plataforma": "Disney+",
-        "descripcion": "Un empresario alemán salva a más de mil refugiados judíos durante el Holocausto."
-    },
-    "Matrix": {
-        "titulo": "Matrix",
-        "portada": "https://m.media-amazon.com/images/M/MV5BNzQzOTk3OTAtNDQ0Zi00ZTVkLWI0MTEtMDllZjNkYzNjNTc4L2ltYWdlXkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
-        "plataforma": "HBO Max",
-        "descripcion": "Un hacker descubre que su realidad es una simulación creada por máquinas inteligentes."
-    },
-    "Origen": {
-        "titulo": "Origen",
-        "portada": "https://m.media-amazon.com/images/M/MV5BMjAxMzY3NjcxNF5BMl5BanBnXkFtZTcwNTI5OTM0Mw@@._V1_.jpg",
-        "plataforma": "Netflix",
-        "descripcion": "Un ladrón que roba secretos corporativos mediante el uso de tecnología para compartir sueños."
-    },
-    "Pulp Fiction": {
-        "titulo": "Pulp Fiction",
-        "portada": "https://m.media-amazon.com/images/M/MV5BNGNhMDIzZTUtNTBlZi00MTRlLWFjM2ItYzViMjE3YzI5MjljXkEyXkFqcGdeQXVyNzkwMjQ5NzM@._V1_.jpg",
-        "plataforma": "Amazon Prime",
-        "descripcion": "Las vidas de dos matones, un boxeador y una pareja de atracadores se entrelazan."
-    },
-    "El Señor de los Anillos": {
-        "titulo": "El Señor de los Anillos",
-        "portada": "https://m.media-amazon.com/images/M/MV5BN2EyZjM3NzUtNWUzMi00MTgxLWI0NTctMzY4M2VlOTdjZWRiXkEyXkFqcGdeQXVyNDUzOTQ5MjY@._V1_.jpg",
-        "plataforma": "HBO Max",
-        "descripcion": "Un hobbit debe destruir un anillo poderoso en el Monte del Destino para salvar la Tierra Media."
-    },
-    "Forrest Gump": {
-        "titulo": "Forrest Gump",
-        "portada": "https://m.media-amazon.com/images/M/MV5BNWIwODRlZTUtY2U3ZS00Yzg1LWJhNzYtMmZiYmEyNmU1NjMzXkEyXkFqcGdeQXVyMTQxNzMzNDI@._V1_.jpg",
-        "plataforma": "Netflix",
-        "descripcion": "La vida de un hombre con discapacidad intelectual que vive eventos históricos cruciales."
-    },
-    "Interestelar": {
-        "titulo": "Interestelar",
-        "portada": "https://m.media-amazon.com/images/M/MV5BZjdkOTU3MDktN2IxOS00OGEyLWFmMjktY2FiMmZkNWIyODZiXkEyXkFqcGdeQXVyMTMxODk2OTU@._V1_.jpg",
-        "plataforma": "Amazon Prime",
-        "descripcion": "Un grupo de exploradores viaja a través de un agujero de gusano en el espacio para asegurar la supervivencia humana."
-    },
-    "El Rey León": {
-        "titulo": "El Rey León",
-        "portada": "https://m.media-amazon.com/images/M/MV5BYTYxNGMyZTYtMjE3MS00MzNjLWFjNmYtMDk3N2FmM2JiM2M1XkEyXkFqcGdeQXVyNjY5NDU4NzI@._V1_.jpg",
-        "plataforma": "Disney+",
-        "descripcion": "Simba, un león joven, debe reclamar su lugar como rey después de la muerte de su padre."
-    },
-    "Gladiador": {
-        "titulo": "Gladiador",
-        "portada": "https://m.media-amazon.com/images/M/MV5BMDliMmNhNDEtODUyOS00MjNlLTgxODEtN2U3NzIxMGVkZTA1L2ltYWdlXkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
-        "plataforma": "Netflix",
-        "descripcion": "Un general romano traicionado se convierte en gladiador para vengar la muerte de su familia."
-    },
-    "Reservoir Dogs": {
-        "titulo": "Reservoir Dogs",
-        "portada": "https://m.media-amazon.com/images/M/MV5BZmExNmEwYWItYmQzOS00YjA5LTk2MjktZjEyZDE1Y2QxNjA1XkEyXkFqcGdeQXVyMTQxNzMzNDI@._V1_.jpg",
-        "plataforma": "Amazon Prime",
-        "descripcion": "Después de un robo fallido, los criminales sospechan que hay un informante entre ellos."
-    },
-    "Titanic": {
-        "titulo": "Titanic",
-        "portada": "https://m.media-amazon.com/images/M/MV5BMDdmZGU3NDQtY2E5My00ZTliLWIzOTUtMTY4ZGI1YjdiNjk3XkEyXkFqcGdeQXVyNTA4NzY1MzY@._V1_.jpg",
-        "plataforma": "Netflix",
-        "descripcion": "Una joven de alta sociedad y un artista pobre se enamoran a bordo del lujoso trasatlántico."
-    },
-    "Jurassic Park": {
-        "titulo": "Jurassic Park",
-        "portada": "https://m.media-amazon.com/images/M/MV5BMjM2MDgxMDg0Nl5BMl5BanBnXkFtZTgwNTM2OTM5NDE@._V1_.jpg",
-        "plataforma": "Amazon Prime",
-        "descripcion": "Un parque temático con dinosaurios clonados se convierte en una pesadilla cuando los animales escapan."
-    },
-    "El Silencio de los Inocentes": {
-        "titulo": "El Silencio de los Inocentes",
-        "portada": "https://m.media-amazon.com/images/M/MV5BNjNhZTk0ZmEtNjJhMi00YzFlLWE1MmEtYzM1M2ZmMGMwMTU4XkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
-        "plataforma": "HBO Max",
-        "descripcion": "Una joven agente del FBI busca la ayuda de un brillante asesino en serie para atrapar a otro."
-    },
-    "Star Wars": {
-        "titulo": "Star Wars: Una Nueva Esperanza",
-        "portada": "https://m.media-amazon.com/images/M/MV5BNzVlY2MwMjktM2E4OS00Y2Y3LWE3ZjctYzhkZGM3YzA1ZWM2XkEyXkFqcGdeQXVyNzkwMjQ5NzM@._V1_.jpg",
-        "plataforma": "Disney+",
-        "descripcion": "Luke Skywalker se une a la rebelión para rescatar a la princesa Leia y derrotar al Imperio Galáctico."
-    },
-    "Terminator 2": {
-        "titulo": "Terminator 2: El Juicio Final",
-        "portada": "https://m.media-amazon.com/images/M/MV5BMGU2NzRmZjUtOGUxYS00ZjdjLWEwZWItY2NlM2JhNjkxNTFmXkEyXkFqcGdeQXVyNjU0OTQ0OTY@._V1_.jpg",
-        "plataforma": "Netflix",
-        "descripcion": "Un cyborg es enviado del futuro para proteger al joven John Connor de un Terminator más avanzado."
-    },
-    "Avatar": {
-        "titulo": "Avatar",
-        "portada": "https://m.media-amazon.com/images/M/MV5BMTYwOTEwNjAzMl5BMl5BanBnXkFtZTcwODc5MTUwMw@@._V1_.jpg",
-        "plataforma": "Disney+",
-        "descripcion": "Un marine parapléjico es enviado a la luna Pandora en una misión única, pero se enfrenta a un dilema moral."
-    },
-    "El Gran Hotel Budapest": {
-        "titulo": "El Gran Hotel Budapest",
-        "portada": "https://m.media-amazon.com/images/M/MV5BMzM5NjUxOTEyMl5BMl5BanBnXkFtZTgwNjEyMDM0MDE@._V1_.jpg",
-        "plataforma": "Amazon Prime",
-        "descripcion": "Las aventuras de Gustave H, un legendario conserje de hotel, y Zero Moustafa, su joven amigo."
-    }
-}
+def get_mongo_client():
+    """Función para obtener conexión a MongoDB (None si falla o el circuito está abierto)"""
+    return _conectar(_recursos())
+
+def indice_disponible(nombre):
+    """False si el índice ("coleccion.indice") no se pudo crear, p. ej. por datos repetidos"""
+    fallidos = _recursos()['indices_fallidos']
+    return fallidos is not None and nombre not in fallidos
+
+def error_conexion(mensaje="Error de conexión"):
+    """Respuesta JSON sin base de datos: 503 con Retry-After si el circuito está abierto"""
+    espera = breaker_mongo.segundos_para_reintento()
+    if espera:
+        respuesta = jsonify({
+            "success": False,
+            "error": "Base de datos no disponible temporalmente, intenta más tarde"
+        })
+        respuesta.headers['Retry-After'] = str(espera)
+        return respuesta, 503
+    return jsonify({"success": False, "error": mensaje}), 500
+
+# ==================== CACHÉ COMPARTIDA ====================
+# Resumen de calificaciones compartido por todos los workers de la máquina;
+# una calificación en cualquier worker lo invalida para todos
+
+def resumen_calificaciones(db):
+    """{titulo: {'promedio', 'total_votos'}} desde la caché compartida o con una agregación"""
+    version = cache_compartida.version(CLAVE_RATINGS)
+    ratings = cache_compartida.obtener(CLAVE_RATINGS)
+    if ratings is not None:
+        return ratings
+    
+    ratings = {}
+    for resultado in db.calificaciones.aggregate([
+        {'$group': {
+            '_id': '$pelicula',
+            'promedio': {'$avg': '$calificacion'},
+            'total_votos': {'$sum': 1}
+        }}
+    ]):
+        ratings[resultado['_id']] = {
+            'promedio': round(resultado['promedio'], 1),
+            'total_votos': resultado['total_votos']
+        }
+    cache_compartida.guardar(CLAVE_RATINGS, ratings, version)
+    return ratings
+
+def resumen_calificaciones_viejo():
+    """Último resumen guardado aunque esté invalidado (para el modo degradado)"""
+    return cache_compartida.obtener(CLAVE_RATINGS, permitir_viejo=True) or {}
 
 # ==================== FUNCIONES AUXILIARES ====================
-def hash_password(password):
-    """Convierte contraseña a hash"""
-    return hashlib.sha256(password.encode()).hexdigest()
+def foto_de_perfil(db, usuario):
+    """foto_perfil de usuarios; puede ser un base64 de varios MB, solo se lee donde se muestra"""
+    usuario_data = db.usuarios.find_one({"usuario": usuario}, {"foto_perfil": 1, "_id": 0}) or {}
+    return usuario_data.get('foto_perfil', user_views.FOTO_POR_DEFECTO)
 
 def validate_email(email):
     """Validar formato de email"""
@@ -185,34 +182,35 @@ def validate_username(username):
     return re.match(pattern, username) is not None
 
 # ==================== RUTAS PRINCIPALES ====================
-@app.route("/")
+@bp.route("/")
 def index():
     return render_template("index.html")
 
-@app.route("/iniciopy")
+@bp.route("/iniciopy")
 def iniciopy():
     return render_template("iniciopy.html")
 
-@app.route("/registrow")
+@bp.route("/registrow")
 def registrow():
     return render_template("registrow.html")
 
 # ==================== LOGIN MEJORADO ====================
-@app.route("/login", methods=["POST"])
+@bp.route("/login", methods=["POST"])
+@limitar("login")
 def login():
     usuario = request.form.get("usuario", "").strip()
     password = request.form.get("password", "").strip()
     
-    print(f"\n🔐 Intento de login para usuario: {usuario}")
+    logger.info("Intento de login para usuario: %s", usuario)
     
     if not usuario or not password:
         flash("Usuario y contraseña requeridos", "error")
-        return redirect(url_for('iniciopy'))
+        return redirect(url_for('.iniciopy'))
     
     client = get_mongo_client()
     if not client:
         flash("Error de conexión a la base de datos", "error")
-        return redirect(url_for('iniciopy'))
+        return redirect(url_for('.iniciopy'))
     
     try:
         db = client.cineTecDB
@@ -221,23 +219,43 @@ def login():
         usuario_data = db.usuarios.find_one({"usuario": usuario})
         
         if not usuario_data:
-            print(f"❌ Usuario no encontrado: {usuario}")
+            logger.info("Login fallido, usuario no encontrado: %s", usuario)
             flash("Usuario o contraseña incorrectos", "error")
             client.close()
-            return redirect(url_for('iniciopy'))
+            return redirect(url_for('.iniciopy'))
         
-        # Verificar contraseña
-        password_hash = hash_password(password)
-        if usuario_data["password"] != password_hash:
-            print(f"❌ Contraseña incorrecta para: {usuario}")
+        # Verificar contraseña (hashes simultáneos limitados en toda la máquina)
+        try:
+            password_valida = verificar_con_limite(password, usuario_data.get("password", ""))
+        except HashSaturado:
+            logger.warning("Demasiados hashes de contraseña en curso, login rechazado: %s", usuario)
+            flash("Hay muchos inicios de sesión en este momento, intenta en unos segundos", "error")
+            client.close()
+            return redirect(url_for('.iniciopy'))
+        
+        if not password_valida:
+            logger.info("Login fallido, contraseña incorrecta para: %s", usuario)
             flash("Usuario o contraseña incorrectos", "error")
             client.close()
-            return redirect(url_for('iniciopy'))
+            return redirect(url_for('.iniciopy'))
+        
+        # Hash antiguo (SHA-256) o de otro coste: se recalcula ahora que tenemos la contraseña
+        if necesita_rehash(usuario_data["password"]):
+            try:
+                db.usuarios.update_one(
+                    {"_id": usuario_data["_id"], "password": usuario_data["password"]},
+                    {"$set": {"password": hash_con_limite(password)}}
+                )
+                logger.info("Contraseña migrada al esquema actual: %s", usuario)
+            except HashSaturado:
+                # Se intentará de nuevo en el próximo login
+                pass
         
         # ÉXITO: Configurar sesión PERO SIN FOTO en base64
         session['usuario'] = usuario_data["usuario"]
         session['nombre'] = usuario_data["nombre"]
         session['user_id'] = str(usuario_data["_id"])
+        session['rol'] = usuario_data.get('rol', 'usuario')
         session['descripcion'] = usuario_data.get('descripcion', 'Hola, soy nuevo en CineTec')
         
         # NO guardar la foto completa en la sesión, solo la URL si no es base64
@@ -250,91 +268,71 @@ def login():
         
         session['favoritos'] = usuario_data.get('favoritos', [])
         
-        print(f"✅ Login exitoso para: {usuario}")
-        print(f"✅ Sesión establecida (tamaño reducido)")
+        logger.info("Login exitoso para: %s", usuario)
         
         flash(f"¡Bienvenido {usuario_data['nombre']}!", "success")
         client.close()
-        return redirect(url_for('pelispy'))
+        return redirect(url_for('.pelispy'))
             
     except Exception as e:
-        print(f"❌ Error en login: {e}")
+        logger.exception("Error en login: %s", e)
         client.close()
         flash(f"Error en el inicio de sesión: {str(e)}", "error")
-        return redirect(url_for('iniciopy'))
+        return redirect(url_for('.iniciopy'))
 
 # ==================== PELISPY ====================
-@app.route("/pelispy")
+@bp.route("/pelispy")
+@limitar("pelispy")
 def pelispy():
     if 'usuario' not in session:
-        print("❌ No hay sesión, redirigiendo a login")
+        logger.debug("No hay sesión, redirigiendo a login")
         flash("Debes iniciar sesión primero", "error")
-        return redirect(url_for('iniciopy'))
+        return redirect(url_for('.iniciopy'))
     
-    print(f"✅ Usuario autenticado: {session['usuario']}")
+    logger.debug("Usuario autenticado: %s", session['usuario'])
     
     client = get_mongo_client()
     if not client:
-        flash("Error de conexión a la base de datos", "error")
-        return redirect(url_for('iniciopy'))
+        return pelispy_sin_conexion()
     
     try:
         db = client.cineTecDB
         
-        # Verificar que el usuario aún existe
-        usuario_data = db.usuarios.find_one({"usuario": session['usuario']})
-        if not usuario_data:
-            print(f"❌ Usuario no encontrado en DB: {session['usuario']}")
+        # Todo el estado del usuario en una lectura; si no hay vista es que la cuenta ya no existe
+        vista = user_views.obtener(db, session['usuario'])
+        if not vista:
+            logger.warning("Usuario no encontrado en DB: %s", session['usuario'])
             session.clear()
             flash("Tu cuenta ya no existe", "error")
-            return redirect(url_for('iniciopy'))
+            return redirect(url_for('.iniciopy'))
         
         # Obtener datos actualizados del usuario
-        descripcion_actual = usuario_data.get('descripcion', 'Hola, soy nuevo en CineTec')
-        foto_actual = usuario_data.get('foto_perfil', 'https://cdn-icons-png.flaticon.com/512/3135/3135715.png')
-        favoritos_actual = usuario_data.get('favoritos', [])
+        descripcion_actual = vista['descripcion']
+        # La plantilla pide la foto a /get_user_preferences: aquí basta la de la sesión
+        foto_actual = session.get('foto_perfil', user_views.FOTO_POR_DEFECTO)
+        favoritos_actual = vista['favoritos']
+        
+        # Promedios de todas las películas (caché compartida o una sola agregación)
+        try:
+            ratings = resumen_calificaciones(db)
+        except Exception as e:
+            logger.warning("Error obteniendo calificaciones: %s", e)
+            ratings = resumen_calificaciones_viejo()
         
         # Obtener películas usando el diccionario PELICULAS_INFO
         peliculas = []
         for titulo, info in PELICULAS_INFO.items():
-            pelicula_info = {
+            rating = ratings.get(titulo, {})
+            peliculas.append({
                 'titulo': titulo,
                 'descripcion': info.get('descripcion', ''),
                 'portada': info.get('portada', ''),
                 'plataforma': info.get('plataforma', ''),
-                'calificacion_promedio': 0,
-                'total_calificaciones': 0
-            }
-            
-            # Intentar obtener calificaciones desde MongoDB
-            try:
-                calificacion_data = db.calificaciones.aggregate([
-                    {'$match': {'pelicula': titulo}},
-                    {'$group': {
-                        '_id': '$pelicula',
-                        'promedio': {'$avg': '$calificacion'},
-                        'total_votos': {'$sum': 1}
-                    }}
-                ])
-                
-                calificacion_result = list(calificacion_data)
-                if calificacion_result:
-                    pelicula_info['calificacion_promedio'] = round(calificacion_result[0]['promedio'], 1)
-                    pelicula_info['total_calificaciones'] = calificacion_result[0]['total_votos']
-            except Exception as e:
-                print(f"⚠️ Error obteniendo calificaciones para {titulo}: {e}")
-                # Continuar con valores por defecto
-            
-            peliculas.append(pelicula_info)
+                'calificacion_promedio': rating.get('promedio', 0),
+                'total_calificaciones': rating.get('total_votos', 0)
+            })
         
-        # Obtener calificaciones del usuario actual
-        calificaciones_usuario = {}
-        try:
-            user_ratings = db.calificaciones.find({"usuario": session['usuario']})
-            for cal in user_ratings:
-                calificaciones_usuario[cal['pelicula']] = cal['calificacion']
-        except Exception as e:
-            print(f"⚠️ Error obteniendo calificaciones del usuario: {e}")
+        calificaciones_usuario = vista['calificaciones']
         
         # Crear diccionarios de promedios y total_votos
         promedios = {}
@@ -345,7 +343,8 @@ def pelispy():
         
         client.close()
         
-        print(f"✅ Datos cargados: {len(peliculas)} películas, {len(favoritos_actual)} favoritos")
+        logger.info("Datos cargados: %d películas, %d favoritos", len(peliculas), len(favoritos_actual),
+                    extra={"muestrear": True})
         
         # Renderizar el template con los datos
         return render_template("pelispy.html", 
@@ -359,95 +358,125 @@ def pelispy():
                              calificaciones_usuario=calificaciones_usuario)
         
     except Exception as e:
-        print(f"❌ Error en pelispy: {e}")
-        import traceback
-        traceback.print_exc()  # Esto mostrará el error completo en la consola
+        logger.exception("Error en pelispy: %s", e)  # Incluye el traceback completo
         
         if 'client' in locals():
             client.close()
         
         flash("Error al cargar las películas", "error")
-        return redirect(url_for('iniciopy'))
+        return redirect(url_for('.iniciopy'))
+    
+def pelispy_sin_conexion():
+    """Renderiza el catálogo con los datos de la sesión y los últimos promedios conocidos"""
+    logger.warning("Sirviendo pelispy en modo degradado (sin MongoDB)")
+    flash("Algunos datos pueden estar desactualizados: la base de datos no está disponible", "error")
+    
+    ratings = resumen_calificaciones_viejo()
+    promedios = {titulo: r['promedio'] for titulo, r in ratings.items()}
+    total_votos = {titulo: r['total_votos'] for titulo, r in ratings.items()}
+    peliculas = [
+        {
+            'titulo': titulo,
+            'descripcion': info.get('descripcion', ''),
+            'portada': info.get('portada', ''),
+            'plataforma': info.get('plataforma', ''),
+            'calificacion_promedio': promedios.get(titulo, 0),
+            'total_calificaciones': total_votos.get(titulo, 0)
+        }
+        for titulo, info in PELICULAS_INFO.items()
+    ]
+    
+    return render_template("pelispy.html",
+                         usuario=session['usuario'],
+                         descripcion=session.get('descripcion', 'Hola, soy nuevo en CineTec'),
+                         foto_perfil=session.get('foto_perfil', 'https://cdn-icons-png.flaticon.com/512/3135/3135715.png'),
+                         peliculas=peliculas,
+                         promedios=promedios,
+                         total_votos=total_votos,
+                         favoritos=session.get('favoritos', []),
+                         calificaciones_usuario={})
     
 # ==================== REGISTRO ====================
-@app.route("/register", methods=["POST"])
+@bp.route("/register", methods=["POST"])
+@limitar("register")
 def register():
     usuario = request.form.get("usuario", "").strip()
     nombre = request.form.get("nombre", "").strip()
     email = request.form.get("email", "").strip()
     password = request.form.get("password", "").strip()
     
-    print(f"\n📝 Intento de registro: {usuario}")
+    logger.info("Intento de registro: %s", usuario)
     
     # Validaciones
     if not all([usuario, nombre, email, password]):
         flash("Todos los campos son requeridos", "error")
-        return redirect(url_for('registrow'))
+        return redirect(url_for('.registrow'))
     
     if not validate_username(usuario):
         flash("Usuario inválido. Solo letras, números y guiones bajos (3-20 caracteres)", "error")
-        return redirect(url_for('registrow'))
+        return redirect(url_for('.registrow'))
     
     if not validate_name(nombre):
         flash("Nombre inválido. Solo letras y espacios", "error")
-        return redirect(url_for('registrow'))
+        return redirect(url_for('.registrow'))
     
     if not validate_email(email):
         flash("Email inválido. Debe tener formato: usuario@dominio.com", "error")
-        return redirect(url_for('registrow'))
+        return redirect(url_for('.registrow'))
     
     if len(password) < 8:
         flash("La contraseña debe tener al menos 8 caracteres", "error")
-        return redirect(url_for('registrow'))
+        return redirect(url_for('.registrow'))
     
     client = get_mongo_client()
     if not client:
         flash("Error de conexión a la base de datos. Intenta más tarde.", "error")
-        return redirect(url_for('registrow'))
+        return redirect(url_for('.registrow'))
     
     try:
         db = client.cineTecDB
         
-        # Verificar si usuario ya existe
-        if db.usuarios.find_one({"usuario": usuario}):
-            flash("El usuario ya existe", "error")
+        # Sin el índice único de email (hay repetidos antiguos) se comprueba a mano
+        if not indice_disponible("usuarios.email_1") and db.usuarios.find_one({"email": email}, {"_id": 1}):
             client.close()
-            return redirect(url_for('registrow'))
-        
-        # Verificar si email ya existe
-        if db.usuarios.find_one({"email": email}):
             flash("El email ya está registrado", "error")
+            return redirect(url_for('.registrow'))
+        
+        try:
+            password_hash = hash_con_limite(password)
+        except HashSaturado:
             client.close()
-            return redirect(url_for('registrow'))
-        
-        # Crear nuevo usuario
-        nuevo_usuario = {
-            "usuario": usuario,
-            "nombre": nombre,
-            "email": email,
-            "password": hash_password(password),
-            "descripcion": "Hola, soy nuevo en CineTec!",
-            "foto_perfil": "https://cdn-icons-png.flaticon.com/512/3135/3135715.png",
-            "fecha_registro": datetime.now(),
-            "favoritos": [],
-            "rol": "usuario"
-        }
+            flash("Hay muchos registros en este momento, intenta en unos segundos", "error")
+            return redirect(url_for('.registrow'))
         
-        db.usuarios.insert_one(nuevo_usuario)
+        # Los índices únicos de usuario y email detectan los repetidos en el mismo insert
+        try:
+            db.usuarios.insert_one(documento_usuario(usuario, nombre, email, password_hash))
+        except DuplicateKeyError as e:
+            # Sin detalles en el error (servidores antiguos) se mira qué clave existe
+            campo = campo_duplicado(e.details)
+            if campo is None:
+                campo = "usuario" if db.usuarios.find_one({"usuario": usuario}, {"_id": 1}) else "email"
+            client.close()
+            if campo == "email":
+                flash("El email ya está registrado", "error")
+            else:
+                flash("El usuario ya existe", "error")
+            return redirect(url_for('.registrow'))
         client.close()
         
-        print(f"✅ Registro exitoso: {usuario}")
+        logger.info("Registro exitoso: %s", usuario)
         flash("¡Registro exitoso! Ahora puedes iniciar sesión", "success")
-        return redirect(url_for('iniciopy'))
+        return redirect(url_for('.iniciopy'))
         
     except Exception as e:
         client.close()
-        print(f"❌ Error en registro: {e}")
+        logger.exception("Error en registro: %s", e)
         flash(f"Error en el registro: {str(e)}", "error")
-        return redirect(url_for('registrow'))
+        return redirect(url_for('.registrow'))
 
 # ==================== ACTUALIZAR ESTADO ====================
-@app.route("/update_profile", methods=["POST"])
+@bp.route("/update_profile", methods=["POST"])
 def update_profile():
     if 'usuario' not in session:
         return jsonify({"success": False, "error": "No autorizado"}), 401
@@ -459,7 +488,7 @@ def update_profile():
     
     client = get_mongo_client()
     if not client:
-        return jsonify({"success": False, "error": "Error de conexión a la base de datos"}), 500
+        return error_conexion("Error de conexión a la base de datos")
     
     try:
         db = client.cineTecDB
@@ -471,6 +500,8 @@ def update_profile():
         )
         
         if resultado.modified_count > 0 or resultado.matched_count > 0:
+            user_views.fijar_perfil(db, session['usuario'], descripcion=descripcion)
+            
             # Actualizar sesión
             session['descripcion'] = descripcion
             
@@ -492,7 +523,8 @@ def update_profile():
         return jsonify({"success": False, "error": str(e)}), 500
 
 # ==================== SUBIR FOTO ====================
-@app.route("/upload_photo", methods=["POST"])
+@bp.route("/upload_photo", methods=["POST"])
+@limitar("upload_photo")
 def upload_photo():
     if 'usuario' not in session:
         return jsonify({"success": False, "error": "No autorizado"}), 401
@@ -520,7 +552,7 @@ def upload_photo():
             
             client = get_mongo_client()
             if not client:
-                return jsonify({"success": False, "error": "Error de conexión a la base de datos"}), 500
+                return error_conexion("Error de conexión a la base de datos")
             
             db = client.cineTecDB
             
@@ -553,7 +585,8 @@ def upload_photo():
     return jsonify({"success": False, "error": "Formato de archivo no permitido. Solo se permiten: PNG, JPG, JPEG, GIF"}), 400
 
 # ==================== CALIFICAR PELÍCULA ====================
-@app.route("/rate_movie", methods=["POST"])
+@bp.route("/rate_movie", methods=["POST"])
+@limitar("rate_movie")
 def rate_movie():
     if 'usuario' not in session:
         return jsonify({"success": False, "error": "No autorizado"}), 401
@@ -574,13 +607,13 @@ def rate_movie():
     
     client = get_mongo_client()
     if not client:
-        return jsonify({"success": False, "error": "Error de conexión"}), 500
+        return error_conexion("Error de conexión")
     
     try:
         db = client.cineTecDB
         
-        # Guardar calificación del usuario
-        db.calificaciones.update_one(
+        # Guardar calificación del usuario (devuelve la anterior para los rankings)
+        anterior = db.calificaciones.find_one_and_update(
             {
                 "usuario": session['usuario'],
                 "pelicula": pelicula
@@ -592,11 +625,18 @@ def rate_movie():
                     "nombre_usuario": session.get('nombre', session['usuario'])
                 }
             },
-            upsert=True
+            projection={"calificacion": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
         )
+        calificacion_anterior = anterior['calificacion'] if anterior else None
+        leaderboards.registrar_calificacion(pelicula, calificacion, calificacion_anterior)
+        rating_stats.registrar_cambio(db, session['usuario'], pelicula, calificacion, calificacion_anterior)
+        user_views.fijar_calificaciones(db, session['usuario'], {pelicula: calificacion})
+        cache_compartida.invalidar(CLAVE_RATINGS)
         
         # Recalcular promedio de la película
-        calificaciones = list(db.calificaciones.find({"pelicula": pelicula}))
+        calificaciones = list(db.calificaciones.find({"pelicula": pelicula}, {"calificacion": 1, "_id": 0}))
         
         if calificaciones:
             total = sum(c['calificacion'] for c in calificaciones)
@@ -616,8 +656,63 @@ def rate_movie():
         client.close()
         return jsonify({"success": False, "error": str(e)}), 500
 
+# ==================== CALIFICAR VARIAS PELÍCULAS ====================
+MAX_CALIFICACIONES_LOTE = 500
+
+@bp.route("/rate_movies", methods=["POST"])
+@limitar("rate_movies")
+def rate_movies():
+    """Guarda varias calificaciones del usuario en una sola petición"""
+    if 'usuario' not in session:
+        return jsonify({"success": False, "error": "No autorizado"}), 401
+    
+    data = request.get_json(silent=True) or {}
+    calificaciones = data.get('calificaciones') if isinstance(data, dict) else data
+    
+    if not isinstance(calificaciones, list) or not calificaciones:
+        return jsonify({"success": False, "error": "Datos incompletos"}), 400
+    
+    if len(calificaciones) > MAX_CALIFICACIONES_LOTE:
+        return jsonify({"success": False, "error": f"Máximo {MAX_CALIFICACIONES_LOTE} calificaciones por petición"}), 400
+    
+    # El usuario siempre es el de la sesión, nunca el enviado en el cuerpo
+    filas = [
+        {
+            "usuario": session['usuario'],
+            "nombre_usuario": session.get('nombre', session['usuario']),
+            "pelicula": c.get('pelicula') if isinstance(c, dict) else None,
+            "calificacion": c.get('calificacion') if isinstance(c, dict) else None
+        }
+        for c in calificaciones
+    ]
+    
+    client = get_mongo_client()
+    if not client:
+        return error_conexion("Error de conexión")
+    
+    try:
+        db = client.cineTecDB
+        stats, resumenes, usuarios, escritas = importar_calificaciones(db, filas)
+        actualizar_derivados(db, resumenes, usuarios, cache_compartida)
+        client.close()
+        
+        # Solo cuenta como actividad lo que se escribió: una fila por usuario y película
+        for titulo, resumen in resumenes.items():
+            leaderboards.fijar_resumen(titulo, resumen['suma'], resumen['total_votos'], escritas[titulo])
+        
+        return jsonify({
+            "success": True,
+            "message": f"{stats['procesadas'] - stats['invalidas'] - stats['repetidas'] - stats['errores']} calificaciones guardadas",
+            "stats": stats,
+            "ratings": resumenes
+        })
+        
+    except Exception as e:
+        client.close()
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # ==================== FAVORITOS - TOGGLE ====================
-@app.route("/toggle_favorite", methods=["POST"])
+@bp.route("/toggle_favorite", methods=["POST"])
 def toggle_favorite():
     """Agrega o elimina una película de favoritos en MongoDB"""
     if 'usuario' not in session:
@@ -631,13 +726,13 @@ def toggle_favorite():
     
     client = get_mongo_client()
     if not client:
-        return jsonify({"success": False, "error": "Error de conexión"}), 500
+        return error_conexion("Error de conexión")
     
     try:
         db = client.cineTecDB
         
         # Obtener el usuario actual
-        usuario = db.usuarios.find_one({"usuario": session['usuario']})
+        usuario = db.usuarios.find_one({"usuario": session['usuario']}, {"favoritos": 1})
         if not usuario:
             client.close()
             return jsonify({"success": False, "error": "Usuario no encontrado"}), 404
@@ -655,6 +750,15 @@ def toggle_favorite():
             favoritos.append(pelicula)
             mensaje = f'"{pelicula}" agregada a favoritos'
             es_favorita = True
+            # El evento se guarda con su fecha para que la recarga de los rankings lo conserve;
+            # volver a marcarla dentro de la ventana no suma otra vez
+            evento = db.actividad_favoritos.update_one(
+                {"usuario": session['usuario'], "pelicula": pelicula},
+                {"$setOnInsert": {"fecha": datetime.now()}},
+                upsert=True
+            )
+            if evento.upserted_id is not None:
+                leaderboards.registrar_actividad(pelicula, PESO_FAVORITO)
         
         # Actualizar en la base de datos
         db.usuarios.update_one(
@@ -662,6 +766,8 @@ def toggle_favorite():
             {"$set": {"favoritos": favoritos}}
         )
         
+        user_views.fijar_perfil(db, session['usuario'], favoritos=favoritos)
+        
         # Actualizar en la sesión
         session['favoritos'] = favoritos
         
@@ -678,7 +784,7 @@ def toggle_favorite():
         return jsonify({"success": False, "error": str(e)}), 500
 
 # ==================== OBTENER FAVORITOS ====================
-@app.route("/get_favorites", methods=["GET"])
+@bp.route("/get_favorites", methods=["GET"])
 def get_favorites():
     """Obtiene las películas favoritas del usuario desde MongoDB"""
     try:
@@ -694,17 +800,14 @@ def get_favorites():
         
         client = get_mongo_client()
         if not client:
-            return jsonify({
-                'success': False,
-                'error': 'Error de conexión a MongoDB'
-            }), 500
+            return error_conexion('Error de conexión a MongoDB')
         
         db = client.cineTecDB
         
-        # Buscar usuario en MongoDB
-        usuario = db.usuarios.find_one({'usuario': usuario_actual})
+        # Solo los favoritos: el resto de la vista no se usa aquí
+        vista = user_views.obtener(db, usuario_actual, campos=("favoritos",))
         
-        if not usuario:
+        if not vista:
             client.close()
             return jsonify({
                 'success': False,
@@ -712,7 +815,7 @@ def get_favorites():
             }), 404
         
         # Obtener lista de favoritos del usuario
-        favoritos_usuario = usuario.get('favoritos', [])
+        favoritos_usuario = vista['favoritos']
         
         # Si no hay favoritos, retornar lista vacía
         if not favoritos_usuario:
@@ -724,34 +827,24 @@ def get_favorites():
                 'message': 'No tienes películas favoritas todavía'
             })
         
+        # Promedios desde la caché compartida en lugar de una agregación por favorita
+        try:
+            ratings = resumen_calificaciones(db)
+        except Exception as e:
+            logger.warning("Error obteniendo calificaciones: %s", e)
+            ratings = resumen_calificaciones_viejo()
+        
         # Obtener información completa de cada película favorita
         peliculas_favoritas = []
         
         for pelicula_nombre in favoritos_usuario:
             if pelicula_nombre in PELICULAS_INFO:
                 pelicula_info = PELICULAS_INFO[pelicula_nombre].copy()
+                pelicula_info['portada'] = cover_url(pelicula_nombre)
                 
-                # Obtener calificación promedio de la película desde la colección de calificaciones
-                try:
-                    calificacion_data = db.calificaciones.aggregate([
-                        {'$match': {'pelicula': pelicula_nombre}},
-                        {'$group': {
-                            '_id': '$pelicula',
-                            'promedio': {'$avg': '$calificacion'},
-                            'total_votos': {'$sum': 1}
-                        }}
-                    ])
-                    
-                    calificacion_result = list(calificacion_data)
-                    if calificacion_result:
-                        pelicula_info['calificacion_promedio'] = calificacion_result[0]['promedio']
-                        pelicula_info['total_votos'] = calificacion_result[0]['total_votos']
-                    else:
-                        pelicula_info['calificacion_promedio'] = 0
-                        pelicula_info['total_votos'] = 0
-                except:
-                    pelicula_info['calificacion_promedio'] = 0
-                    pelicula_info['total_votos'] = 0
+                rating = ratings.get(pelicula_nombre, {})
+                pelicula_info['calificacion_promedio'] = rating.get('promedio', 0)
+                pelicula_info['total_votos'] = rating.get('total_votos', 0)
                 
                 peliculas_favoritas.append(pelicula_info)
         
@@ -764,7 +857,7 @@ def get_favorites():
         })
         
     except Exception as e:
-        print(f"❌ Error en get_favorites: {str(e)}")
+        logger.exception("Error en get_favorites: %s", e)
         if 'client' in locals():
             client.close()
         return jsonify({
@@ -773,45 +866,28 @@ def get_favorites():
         }), 500
 
 # ==================== OBTENER TODAS LAS CALIFICACIONES ====================
-@app.route("/get_all_ratings", methods=["GET"])
+@bp.route("/get_all_ratings", methods=["GET"])
 def get_all_ratings():
     client = get_mongo_client()
     if not client:
-        return jsonify({"success": False, "error": "Error de conexión"}), 500
+        # Sin base de datos devolvemos los últimos promedios conocidos
+        return jsonify({'success': True, 'ratings': resumen_calificaciones_viejo(), 'degradado': True})
     
     try:
         db = client.cineTecDB
         
-        # Agregar pipeline de agregación para obtener promedios
-        pipeline = [
-            {
-                '$group': {
-                    '_id': '$pelicula',
-                    'promedio': {'$avg': '$calificacion'},
-                    'total_votos': {'$sum': 1}
-                }
-            }
-        ]
-        
-        resultados = list(db.calificaciones.aggregate(pipeline))
-        
-        ratings = {}
-        for resultado in resultados:
-            ratings[resultado['_id']] = {
-                'promedio': round(resultado['promedio'], 1),
-                'total_votos': resultado['total_votos']
-            }
+        ratings = resumen_calificaciones(db)
         
         client.close()
         return jsonify({'success': True, 'ratings': ratings})
         
     except Exception as e:
-        print(f"❌ Error en get_all_ratings: {str(e)}")
+        logger.exception("Error en get_all_ratings: %s", e)
         client.close()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # ==================== OBTENER DATOS DEL USUARIO ====================
-@app.route("/get_user_preferences", methods=["GET"])
+@bp.route("/get_user_preferences", methods=["GET"])
 def get_user_preferences():
     """Obtiene todas las preferencias del usuario desde MongoDB"""
     try:
@@ -822,64 +898,55 @@ def get_user_preferences():
         
         client = get_mongo_client()
         if not client:
-            return jsonify({'success': False, 'error': 'Error de conexión'}), 500
+            # Modo degradado: datos de la sesión y últimos promedios conocidos
+            return jsonify({
+                'success': True,
+                'degradado': True,
+                'descripcion': session.get('descripcion', 'Hola, soy nuevo en CineTec'),
+                'foto_perfil': session.get('foto_perfil', 'https://cdn-icons-png.flaticon.com/512/3135/3135715.png'),
+                'favoritos': session.get('favoritos', []),
+                'calificaciones': {},
+                'promedios': {titulo: r['promedio'] for titulo, r in resumen_calificaciones_viejo().items()},
+                'total_votos': {titulo: r['total_votos'] for titulo, r in resumen_calificaciones_viejo().items()}
+            })
         
         db = client.cineTecDB
         
-        # Obtener datos del usuario
-        usuario_data = db.usuarios.find_one({'usuario': usuario_actual})
+        # Datos, favoritos y calificaciones del usuario en una sola lectura
+        vista = user_views.obtener(db, usuario_actual)
         
-        if not usuario_data:
+        if not vista:
             client.close()
             return jsonify({'success': False, 'error': 'Usuario no encontrado'}), 404
         
-        # Obtener favoritos
-        favoritos = usuario_data.get('favoritos', [])
-        
-        # Obtener calificaciones del usuario
-        calificaciones_usuario = {}
-        calificaciones = db.calificaciones.find({'usuario': usuario_actual})
-        for calif in calificaciones:
-            calificaciones_usuario[calif['pelicula']] = calif['calificacion']
+        foto_actual = foto_de_perfil(db, usuario_actual)
         
         # Obtener promedios generales de todas las películas
-        promedios = {}
-        total_votos = {}
-        pipeline = [
-            {
-                '$group': {
-                    '_id': '$pelicula',
-                    'promedio': {'$avg': '$calificacion'},
-                    'total_votos': {'$sum': 1}
-                }
-            }
-        ]
-        
-        resultados = list(db.calificaciones.aggregate(pipeline))
-        for resultado in resultados:
-            promedios[resultado['_id']] = round(resultado['promedio'], 1)
-            total_votos[resultado['_id']] = resultado['total_votos']
+        ratings = resumen_calificaciones(db)
+        promedios = {titulo: r['promedio'] for titulo, r in ratings.items()}
+        total_votos = {titulo: r['total_votos'] for titulo, r in ratings.items()}
         
         client.close()
         
         return jsonify({
             'success': True,
-            'descripcion': usuario_data.get('descripcion', 'Hola, soy nuevo en CineTec'),
-            'foto_perfil': usuario_data.get('foto_perfil', 'https://cdn-icons-png.flaticon.com/512/3135/3135715.png'),
-            'favoritos': favoritos,
-            'calificaciones': calificaciones_usuario,
+            'descripcion': vista['descripcion'],
+            'foto_perfil': foto_actual,
+            'favoritos': vista['favoritos'],
+            'calificaciones': vista['calificaciones'],
             'promedios': promedios,
             'total_votos': total_votos
         })
         
     except Exception as e:
-        print(f"❌ Error en get_user_preferences: {str(e)}")
+        logger.exception("Error en get_user_preferences: %s", e)
         if 'client' in locals():
             client.close()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # ==================== COMENTARIOS ====================
-@app.route("/add_comment", methods=["POST"])
+@bp.route("/add_comment", methods=["POST"])
+@limitar("add_comment")
 def add_comment():
     if 'usuario' not in session:
         return jsonify({"success": False, "error": "No autorizado"}), 401
@@ -896,7 +963,7 @@ def add_comment():
     
     client = get_mongo_client()
     if not client:
-        return jsonify({"success": False, "error": "Error de conexión"}), 500
+        return error_conexion("Error de conexión")
     
     try:
         db = client.cineTecDB
@@ -908,13 +975,13 @@ def add_comment():
             "comentario": comentario,
             "fecha": datetime.now(),
             "likes": 0,
-            "dislikes": 0
+            "dislikes": 0,
+            "score": 0
         }
         
-        resultado = db.comentarios.insert_one(nuevo_comentario)
-        
-        nuevo_comentario['_id'] = str(resultado.inserted_id)
-        nuevo_comentario['fecha'] = nuevo_comentario['fecha'].strftime("%d/%m/%Y %H:%M")
+        # insert_one añade el _id al propio diccionario
+        db.comentarios.insert_one(nuevo_comentario)
+        leaderboards.registrar_actividad(pelicula, PESO_COMENTARIO)
         
         client.close()
         
@@ -928,50 +995,576 @@ def add_comment():
         client.close()
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route("/get_comments/<pelicula>", methods=["GET"])
+# Campos que usa la interfaz (la película ya viene en la URL)
+PROYECCION_COMENTARIO = {"usuario": 1, "nombre_usuario": 1, "comentario": 1,
+                         "fecha": 1, "likes": 1, "dislikes": 1, "score": 1}
+
+COMENTARIOS_POR_PAGINA = 20
+
+def _codificar_cursor_fecha(fecha, comentario_id):
+    return base64.urlsafe_b64encode(f"{fecha.isoformat()}|{comentario_id}".encode()).decode()
+
+def _decodificar_cursor_fecha(cursor):
+    fecha, comentario_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(fecha), ObjectId(comentario_id)
+
+@bp.route("/get_comments/<pelicula>", methods=["GET"])
 def get_comments(pelicula):
+    """Comentarios de una película, 20 por página; ?antes=<siguiente> continúa hacia atrás"""
+    antes = None
+    if request.args.get('antes'):
+        try:
+            antes = _decodificar_cursor_fecha(request.args['antes'])
+        except Exception:
+            return jsonify({"success": False, "error": "Cursor inválido"}), 400
+    
     client = get_mongo_client()
     if not client:
-        return jsonify({"success": False, "error": "Error de conexión"}), 500
+        return error_conexion("Error de conexión")
     
     try:
         db = client.cineTecDB
         
-        comentarios = list(db.comentarios.find({"pelicula": pelicula})
-                          .sort("fecha", -1)
-                          .limit(20))
+        # orden=score usa el índice (pelicula, score, fecha); solo muestra los comentarios activos
+        if request.args.get('orden') == 'score':
+            comentarios = list(db.comentarios.find({"pelicula": pelicula}, PROYECCION_COMENTARIO)
+                              .sort([("score", -1), ("fecha", -1)])
+                              .limit(COMENTARIOS_POR_PAGINA))
+            siguiente = None
+        else:
+            filtro = {"pelicula": pelicula}
+            if antes:
+                filtro["$or"] = [
+                    {"fecha": {"$lt": antes[0]}},
+                    {"fecha": antes[0], "_id": {"$lt": antes[1]}}
+                ]
+            comentarios = list(db.comentarios.find(filtro, PROYECCION_COMENTARIO)
+                              .sort([("fecha", -1), ("_id", -1)])
+                              .limit(COMENTARIOS_POR_PAGINA))
+            
+            # Al acabarse los comentarios activos se sigue por el archivo
+            if len(comentarios) < COMENTARIOS_POR_PAGINA:
+                if comentarios:
+                    antes = (comentarios[-1]['fecha'], comentarios[-1]['_id'])
+                fecha, ultimo_id = antes or (datetime.max, ObjectId("f" * 24))
+                comentarios += leer_archivo(db, pelicula, fecha, ultimo_id,
+                                            COMENTARIOS_POR_PAGINA - len(comentarios))
+            
+            siguiente = None
+            if len(comentarios) == COMENTARIOS_POR_PAGINA:
+                siguiente = _codificar_cursor_fecha(comentarios[-1]['fecha'], comentarios[-1]['_id'])
         
-        # Formatear comentarios
-        comentarios_formateados = []
+        # Sumar reacciones que aún no se han escrito en MongoDB
         for comentario in comentarios:
-            comentario['_id'] = str(comentario['_id'])
-            comentario['fecha'] = comentario['fecha'].strftime("%d/%m/%Y %H:%M")
-            comentarios_formateados.append(comentario)
+            for campo, delta in contador_reacciones.pendientes(comentario['_id']).items():
+                comentario[campo] = comentario.get(campo, 0) + delta
+        
+        client.close()
+        
+        return jsonify({
+            "success": True,
+            "comentarios": comentarios,
+            "siguiente": siguiente
+        })
+        
+    except Exception as e:
+        client.close()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# ==================== BÚSQUEDA DE COMENTARIOS ====================
+# Usa el índice de texto comentarios_texto (idioma español, con stemming; lo
+# crea database.asegurar_indices al conectar):
+# "actuación" encuentra también "actuaciones". Se pagina por cursor
+# (relevancia, _id) en lugar de skip para no recorrer páginas anteriores.
+MAX_RESULTADOS_BUSQUEDA = 50
+
+def _codificar_cursor(relevancia, comentario_id):
+    return base64.urlsafe_b64encode(f"{relevancia!r}:{comentario_id}".encode()).decode()
+
+def _decodificar_cursor(cursor):
+    relevancia, comentario_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+    return float(relevancia), ObjectId(comentario_id)
+
+@bp.route("/search_comments", methods=["GET"])
+@limitar("search_comments")
+def search_comments():
+    """Busca texto en los comentarios de todas las películas, ordenado por relevancia"""
+    texto = request.args.get('q', '').strip()
+    if len(texto) < 2 or len(texto) > 100:
+        return jsonify({"success": False, "error": "La búsqueda debe tener entre 2 y 100 caracteres"}), 400
+    
+    try:
+        limite = min(max(int(request.args.get('limite', 20)), 1), MAX_RESULTADOS_BUSQUEDA)
+    except ValueError:
+        return jsonify({"success": False, "error": "Límite inválido"}), 400
+    
+    filtro = {"$text": {"$search": texto}}
+    if request.args.get('pelicula'):
+        filtro["pelicula"] = request.args['pelicula']
+    
+    pipeline = [
+        {"$match": filtro},
+        {"$addFields": {"relevancia": {"$meta": "textScore"}}}
+    ]
+    if request.args.get('cursor'):
+        try:
+            relevancia, ultimo_id = _decodificar_cursor(request.args['cursor'])
+        except Exception:
+            return jsonify({"success": False, "error": "Cursor inválido"}), 400
+        pipeline.append({"$match": {"$or": [
+            {"relevancia": {"$lt": relevancia}},
+            {"relevancia": relevancia, "_id": {"$lt": ultimo_id}}
+        ]}})
+    pipeline += [
+        {"$sort": {"relevancia": -1, "_id": -1}},
+        {"$limit": limite + 1},
+        {"$project": {"usuario": 1, "nombre_usuario": 1, "pelicula": 1, "comentario": 1,
+                      "fecha": 1, "likes": 1, "dislikes": 1, "relevancia": 1}}
+    ]
+    
+    client = get_mongo_client()
+    if not client:
+        return error_conexion("Error de conexión")
+    
+    try:
+        db = client.cineTecDB
+        resultados = list(db.comentarios.aggregate(pipeline))
+        client.close()
+        
+        siguiente = None
+        if len(resultados) > limite:
+            resultados = resultados[:limite]
+            siguiente = _codificar_cursor(resultados[-1]['relevancia'], resultados[-1]['_id'])
+        
+        # El cursor usa la relevancia exacta; en la respuesta basta con 3 decimales
+        for comentario in resultados:
+            comentario['relevancia'] = round(comentario['relevancia'], 3)
+        
+        return jsonify({
+            "success": True,
+            "comentarios": resultados,
+            "siguiente": siguiente
+        })
+        
+    except Exception as e:
+        client.close()
+        logger.exception("Error buscando comentarios")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# ==================== REACCIONES A COMENTARIOS ====================
+# Los likes/dislikes se acumulan en memoria (contador_reacciones) y se
+# escriben con $inc en lote
+DELTAS_REACCION = {
+    "like": {"likes": 1, "score": 1},
+    "dislike": {"dislikes": 1, "score": -1}
+}
+
+@bp.route("/react_comment", methods=["POST"])
+@limitar("react_comment")
+def react_comment():
+    """Da like o dislike a un comentario (una reacción por usuario; repetirla la quita)"""
+    if 'usuario' not in session:
+        return jsonify({"success": False, "error": "No autorizado"}), 401
+    
+    data = request.get_json(silent=True) or {}
+    tipo = data.get('tipo')
+    
+    if tipo not in DELTAS_REACCION:
+        return jsonify({"success": False, "error": "Reacción inválida"}), 400
+    
+    try:
+        comentario_id = ObjectId(data.get('comentario_id'))
+    except Exception:
+        return jsonify({"success": False, "error": "Comentario inválido"}), 400
+    
+    client = get_mongo_client()
+    if not client:
+        return error_conexion("Error de conexión")
+    
+    try:
+        db = client.cineTecDB
         
+        comentario = db.comentarios.find_one({"_id": comentario_id}, {"likes": 1, "dislikes": 1, "score": 1})
+        if not comentario:
+            client.close()
+            return jsonify({"success": False, "error": "Comentario no encontrado"}), 404
+        
+        filtro = {"comentario_id": comentario_id, "usuario": session['usuario']}
+        anterior = db.reacciones_comentarios.find_one_and_update(
+            filtro,
+            {"$set": {"tipo": tipo, "fecha": datetime.now()}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        
+        deltas = dict(DELTAS_REACCION[tipo])
+        reaccion = tipo
+        if anterior and anterior['tipo'] == tipo:
+            # Repetir la misma reacción la quita
+            db.reacciones_comentarios.delete_one(filtro)
+            deltas = {campo: -delta for campo, delta in DELTAS_REACCION[tipo].items()}
+            reaccion = None
+        elif anterior:
+            # Cambiar de reacción: deshacer la anterior
+            for campo, delta in DELTAS_REACCION[anterior['tipo']].items():
+                deltas[campo] = deltas.get(campo, 0) - delta
+        
+        contador_reacciones.incrementar(comentario_id, deltas)
         client.close()
         
+        pendientes = contador_reacciones.pendientes(comentario_id)
         return jsonify({
             "success": True,
-            "comentarios": comentarios_formateados
+            "reaccion": reaccion,
+            "likes": comentario.get('likes', 0) + pendientes.get('likes', 0),
+            "dislikes": comentario.get('dislikes', 0) + pendientes.get('dislikes', 0)
         })
         
     except Exception as e:
         client.close()
         return jsonify({"success": False, "error": str(e)}), 500
 
+# ==================== PORTADAS ====================
+# Con ?v= igual a la clave de la portada actual la URL nunca cambia de
+# contenido y se cachea un año; sin versión (o con una vieja) solo unos minutos
+CACHE_PORTADA_VERSIONADA = 'public, max-age=31536000, immutable'
+CACHE_PORTADA_SIN_VERSION = 'public, max-age=300'
+
+def cover_url(titulo, ancho=ANCHO_POR_DEFECTO):
+    """URL de la portada cacheada; v cambia si cambia la imagen de origen"""
+    info = PELICULAS_INFO.get(titulo)
+    if not info or not info.get('portada'):
+        return ''
+    return url_for('.cover', titulo=titulo, w=ancho, v=clave_portada(info['portada']))
+
+bp.add_app_template_global(cover_url, 'cover_url')
+
+@bp.route("/cover/<titulo>", methods=["GET"])
+def cover(titulo):
+    """Sirve una variante redimensionada de la portada desde la caché local"""
+    info = PELICULAS_INFO.get(titulo)
+    if not info or not info.get('portada'):
+        return jsonify({"success": False, "error": "Película no encontrada"}), 404
+    
+    ancho = request.args.get('w', ANCHO_POR_DEFECTO, type=int)
+    formato = request.args.get('fmt')
+    if formato not in FORMATOS:
+        formato = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+    
+    try:
+        ruta = cache_covers.variante(info['portada'], ancho, formato)
+    except Exception as e:
+        # Si no se puede descargar o procesar, el navegador va al origen
+        logger.warning("Error cacheando portada de %s: %s", titulo, e)
+        return redirect(info['portada'])
+    
+    respuesta = send_file(ruta, mimetype=FORMATOS[formato], etag=etag_archivo(ruta), conditional=True)
+    if request.args.get('v') == clave_portada(info['portada']):
+        respuesta.headers['Cache-Control'] = CACHE_PORTADA_VERSIONADA
+    else:
+        respuesta.headers['Cache-Control'] = CACHE_PORTADA_SIN_VERSION
+    respuesta.headers['Vary'] = 'Accept'
+    return respuesta
+
+# ==================== ESTADÍSTICAS DE CALIFICACIONES ====================
+@bp.route("/movie_stats/<pelicula>", methods=["GET"])
+def movie_stats(pelicula):
+    """Histograma de 1 a 5 estrellas de una película (precalculado)"""
+    client = get_mongo_client()
+    if not client:
+        return error_conexion("Error de conexión")
+    
+    try:
+        doc = client.cineTecDB.estadisticas_peliculas.find_one({"_id": pelicula})
+        client.close()
+        return jsonify({"success": True, "pelicula": pelicula, **rating_stats.formatear(doc)})
+        
+    except Exception as e:
+        client.close()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@bp.route("/user_stats", methods=["GET"])
+def user_stats():
+    """Distribución de las calificaciones que ha dado el usuario actual"""
+    if 'usuario' not in session:
+        return jsonify({"success": False, "error": "No autorizado"}), 401
+    
+    client = get_mongo_client()
+    if not client:
+        return error_conexion("Error de conexión")
+    
+    try:
+        doc = client.cineTecDB.estadisticas_usuarios.find_one({"_id": session['usuario']})
+        client.close()
+        return jsonify({"success": True, "usuario": session['usuario'], **rating_stats.formatear(doc)})
+        
+    except Exception as e:
+        client.close()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# ==================== RANKINGS ====================
+# Se actualizan en memoria (leaderboards) en cada calificación, comentario y favorito
+MAX_RANKING = 50
+
+def _cargar_rankings():
+    client = get_mongo_client()
+    if not client:
+        return False
+    try:
+        leaderboards.cargar(client.cineTecDB)
+        return True
+    except Exception as e:
+        logger.warning("Error cargando rankings: %s", e)
+        return False
+    finally:
+        client.close()
+
+def _recargar_rankings(app):
+    with app.app_context():
+        try:
+            _cargar_rankings()
+        finally:
+            leaderboards.liberar_recarga()
+
+def rankings_listos():
+    """Carga los rankings la primera vez; False si no hay base de datos
+
+    La recarga periódica corre en un hilo aparte: mientras tanto se sirven los
+    rankings actuales, mejor datos algo viejos que hacer esperar a la petición.
+    """
+    if not leaderboards.necesita_carga():
+        return True
+    if leaderboards.cargado():
+        if leaderboards.reservar_recarga():
+            threading.Thread(target=_recargar_rankings, args=(current_app._get_current_object(),),
+                             name="recarga-rankings", daemon=True).start()
+        return True
+    return _cargar_rankings()
+
+@bp.route("/top", methods=["GET"])
+def top():
+    """Películas mejor calificadas por promedio bayesiano"""
+    if not rankings_listos():
+        return error_conexion("Error de conexión")
+    n = min(max(request.args.get('n', 10, type=int), 1), MAX_RANKING)
+    return jsonify({"success": True, "peliculas": leaderboards.top(n)})
+
+@bp.route("/trending", methods=["GET"])
+def trending():
+    """Películas con más actividad reciente (calificaciones, comentarios y favoritos)"""
+    if not rankings_listos():
+        return error_conexion("Error de conexión")
+    n = min(max(request.args.get('n', 10, type=int), 1), MAX_RANKING)
+    return jsonify({"success": True, "peliculas": leaderboards.trending(n)})
+
 # ==================== LOGOUT ====================
-@app.route("/logout")
+@bp.route("/logout")
 def logout():
-    print(f"\n👋 Logout para: {session.get('usuario', 'N/A')}")
+    logger.info("Logout para: %s", session.get('usuario', 'N/A'))
     session.clear()
     flash("Has cerrado sesión correctamente", "success")
-    return redirect(url_for('index'))
+    return redirect(url_for('.index'))
+
+# ==================== PERFILADO BAJO DEMANDA ====================
+def es_admin():
+    return session.get('rol') == 'admin'
+
+@bp.before_app_request
+def iniciar_perfilado():
+    if profiling.debe_perfilar(request.headers.get('X-Profile'), es_admin()):
+        g.perfilador = profiling.PerfiladorMuestreo(threading.get_ident()).iniciar()
+
+@bp.after_app_request
+def terminar_perfilado(response):
+    perfilador = g.pop('perfilador', None)
+    if perfilador is not None:
+        perfilador.detener()
+        try:
+            nombre = profiling.guardar_perfil(perfilador, request.path, g.get('request_id', 'sin-id'))
+            response.headers['X-Profile-Id'] = nombre
+        except OSError as e:
+            logger.warning("No se pudo guardar el perfil: %s", e)
+    return response
+
+@bp.route("/admin/profiles", methods=["GET"])
+def admin_profiles():
+    """Lista los perfiles recientes (solo administradores)"""
+    if not es_admin():
+        return jsonify({"success": False, "error": "No autorizado"}), 403
+    return jsonify({"success": True, "perfiles": profiling.listar_perfiles()})
+
+@bp.route("/admin/profiles/<nombre>", methods=["GET"])
+def admin_profile_download(nombre):
+    """Descarga un perfil: .collapsed (speedscope/flamegraph) o .json (resumen por fase)"""
+    if not es_admin():
+        return jsonify({"success": False, "error": "No autorizado"}), 403
+    if not nombre.endswith(('.collapsed', '.json')):
+        nombre += '.collapsed'
+    return send_from_directory(profiling.PROFILE_DIR, nombre, as_attachment=True)
+
+# ==================== ANALÍTICA ====================
+# Solo lee el último snapshot generado con analytics.py, nunca MongoDB
+@bp.route("/admin/analytics/diario", methods=["GET"])
+def admin_analytics_diario():
+    """Votos, comentarios, usuarios activos y registros por día (?desde=&hasta= AAAA-MM-DD)"""
+    if not es_admin():
+        return jsonify({"success": False, "error": "No autorizado"}), 403
+    datos = analytics.cargar()
+    if datos is None:
+        return jsonify({"success": False, "error": "Todavía no hay snapshots de analítica"}), 404
+    try:
+        dias = analytics.serie_diaria(datos, request.args.get('desde'), request.args.get('hasta'))
+    except ValueError:
+        return jsonify({"success": False, "error": "Fecha inválida (usa AAAA-MM-DD)"}), 400
+    return jsonify({"success": True, "generado": str(datos['generado']), "dias": dias})
+
+@bp.route("/admin/analytics/peliculas", methods=["GET"])
+def admin_analytics_peliculas():
+    """Películas más comentadas (?orden=votos para las más votadas)"""
+    if not es_admin():
+        return jsonify({"success": False, "error": "No autorizado"}), 403
+    datos = analytics.cargar()
+    if datos is None:
+        return jsonify({"success": False, "error": "Todavía no hay snapshots de analítica"}), 404
+    orden = request.args.get('orden', 'comentarios')
+    if orden not in ('comentarios', 'votos'):
+        return jsonify({"success": False, "error": "Orden inválido"}), 400
+    try:
+        limite = min(max(int(request.args.get('limite', 20)), 1), 100)
+    except ValueError:
+        return jsonify({"success": False, "error": "Límite inválido"}), 400
+    return jsonify({
+        "success": True,
+        "generado": str(datos['generado']),
+        "peliculas": analytics.resumen_peliculas(datos, orden, limite)
+    })
+
+# ==================== CALENTAMIENTO DEL WORKER ====================
+# gunicorn_config.post_fork llama a calentar_worker() antes de que el worker
+# acepte tráfico; /ready responde 200 solo cuando terminó
+
+def calentar_worker(app=None):
+    """Abre el pool de MongoDB, compila las plantillas y llena las cachés"""
+    app = app or _app_por_defecto()
+    with app.app_context():
+        return _calentar(app)
+
+def _calentar(app):
+    pasos = {}
+    
+    inicio = time.perf_counter()
+    for nombre in app.jinja_env.list_templates():
+        app.jinja_env.get_template(nombre)
+    pasos['plantillas'] = round((time.perf_counter() - inicio) * 1000, 1)
+    
+    inicio = time.perf_counter()
+    client = get_mongo_client()
+    pasos['mongo'] = round((time.perf_counter() - inicio) * 1000, 1) if client else 'error'
+    
+    if client:
+        db = client.cineTecDB
+        for nombre, paso in (
+            ('calificaciones', lambda: resumen_calificaciones(db)),
+            ('rankings', lambda: leaderboards.cargar(db)),
+        ):
+            inicio = time.perf_counter()
+            try:
+                paso()
+                pasos[nombre] = round((time.perf_counter() - inicio) * 1000, 1)
+            except Exception as e:
+                logger.warning("Error calentando %s: %s", nombre, e)
+                pasos[nombre] = 'error'
+        client.close()
+    
+    # Solo está listo si todos los pasos funcionaron; si no, /ready lo reintenta
+    estado_calentamiento['pasos'] = pasos
+    estado_calentamiento['listo'] = 'error' not in pasos.values()
+    if estado_calentamiento['listo']:
+        logger.info("Worker %d listo: %s", os.getpid(), pasos)
+    else:
+        logger.warning("Worker %d sin calentar del todo: %s", os.getpid(), pasos)
+    return pasos
+
+@bp.route("/ready")
+def ready():
+    """Readiness: 200 cuando el worker terminó de calentar y MongoDB está disponible"""
+    if not estado_calentamiento['listo']:
+        # Con el circuito abierto get_mongo_client falla al instante: no se espera el timeout
+        _calentar(current_app)
+    listo = estado_calentamiento['listo'] and breaker_mongo.estado != 'abierto'
+    return jsonify({
+        "status": "ready" if listo else "not_ready",
+        "pid": os.getpid(),
+        "calentamiento": estado_calentamiento['pasos'],
+        "mongo": breaker_mongo.estado
+    }), 200 if listo else 503
 
 # ==================== HEALTH CHECK ====================
-@app.route("/health")
+@bp.route("/health")
 def health_check():
     return jsonify({"status": "ok", "message": "Servidor funcionando"}), 200
 
+# ==================== FÁBRICA DE LA APLICACIÓN ====================
+def create_app(config=None):
+    """Crea una app Flask con todas las rutas; config se aplica sobre app.config
+    
+    config['MONGO_CLIENT'] sustituye al cliente de MONGODB_URI (p. ej. una base
+    local en pruebas); config['SHARED_CACHE_DIR'] y config['RATE_LIMITS'] hacen
+    lo mismo con la caché compartida y los límites de peticiones, y
+    config['COVER_CACHE_DIR'] y config['COVER_FETCHER'] (url -> bytes) con la
+    caché de portadas.
+    """
+    app = Flask(__name__)
+    app.secret_key = os.getenv("SECRET_KEY", "clave_temporal_123")
+    app.config.update(config or {})
+    # ObjectId y datetime se serializan directamente en jsonify()
+    app.json = OrjsonProvider(app)
+    configurar_logging(app)
+    
+    inyectado = app.config.get('MONGO_CLIENT')
+    directorio_cache = app.config.get('SHARED_CACHE_DIR')
+    if directorio_cache is None and inyectado is not None:
+        # Una base distinta no debe leer los resúmenes cacheados de la real
+        directorio_cache = tempfile.mkdtemp(prefix="cinetec-cache-")
+    
+    recursos = {
+        'mongo_client': inyectado,
+        'breaker_mongo': CircuitBreaker(
+            "MongoDB",
+            umbral_fallos=int(os.getenv("MONGO_BREAKER_FALLOS", 3)),
+            tiempo_reintento=float(os.getenv("MONGO_BREAKER_REINTENTO", 15))
+        ),
+        'cache_compartida': CacheCompartida(directorio_cache),
+        'leaderboards': Leaderboards(),
+        'cache_covers': CacheCovers(
+            app.config.get('COVER_CACHE_DIR') or COVER_CACHE_DIR,
+            app.config.get('COVER_FETCHER') or descargar_url
+        ),
+        'calentamiento': {'listo': False, 'pasos': {}},
+        # None hasta la primera conexión; luego {"coleccion.indice": error}
+        'indices_fallidos': None,
+    }
+    # El hilo de flush no tiene contexto de app: se le pasa la conexión de esta app
+    recursos['contador_reacciones'] = ContadorBuffer(lambda: _conectar(recursos), "comentarios")
+    app.extensions['cinetec'] = recursos
+    configurar_limites(app)
+    
+    app.register_blueprint(bp)
+    return app
+
+_apps = {}
+
+def _app_por_defecto():
+    if 'app' not in _apps:
+        _apps['app'] = create_app()
+    return _apps['app']
+
+def __getattr__(nombre):
+    # server:app (gunicorn) se crea en el primer acceso, no al importar el módulo
+    if nombre == 'app':
+        return _app_por_defecto()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
 # ==================== INICIAR APLICACIÓN ====================
 if __name__ == "__main__":
     print("=" * 60)
@@ -984,6 +1577,9 @@ if __name__ == "__main__":
     print(f"🔧 Puerto: {port}")
     print("=" * 60)
     
+    app = _app_por_defecto()
+    calentar_worker(app)
+    
     app.run(
         host="0.0.0.0",
         port=port,
@@ -0,0 +1,173 @@
+# shared_cache.py
+# Caché compartida entre los workers de gunicorn de una misma máquina.
+#
+# Los valores se guardan como JSON en archivos de un directorio en memoria
+# (/dev/shm), así que viven una sola vez en el page cache del sistema sin
+# importar cuántos workers haya. Una tabla de versiones mapeada con mmap
+# (un uint64 por slot) dice qué archivo sigue vigente:
+#
+#   - guardar() sube la versión del slot y escribe el archivo con esa versión
+#   - invalidar() solo sube la versión: todos los workers ven el dato como viejo
+#   - obtener() devuelve el valor si la versión del archivo coincide con la tabla
+#     y no ha pasado SHARED_CACHE_TTL desde que se guardó
+#
+# El TTL cubre a quien escribe en MongoDB sin pasar por la app ni por esta
+# máquina; los scripts que sí corren aquí (import_ratings.py) invalidan la
+# clave al terminar.
+#
+# Dos claves pueden compartir slot; en ese caso invalidar una también invalida
+# la otra, lo que solo cuesta un fallo de caché extra.
+#
+# SemaforoCompartido limita cuántos workers hacen algo a la vez (rutas
+# costosas, hashes de contraseñas) con un archivo bloqueado por plaza.
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+logger = logging.getLogger("cinetec.shared_cache")
+
+SLOTS = 1024
+TTL_SEGUNDOS = float(os.getenv("SHARED_CACHE_TTL", "300"))
+
+# Clave del resumen {pelicula: {promedio, total_votos}} que usan la app y los scripts
+CLAVE_RATINGS = "ratings"
+_FORMATO = "<Q"
+_TAM = struct.calcsize(_FORMATO)
+
+
+def directorio_compartido(nombre):
+    """Directorio en memoria común a todos los workers de la máquina"""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, f"cinetec-{nombre}-{os.getuid()}")
+
+
+class CacheCompartida:
+    def __init__(self, directorio=None, slots=SLOTS, ttl=TTL_SEGUNDOS):
+        self.directorio = directorio or os.getenv("SHARED_CACHE_DIR") or directorio_compartido("cache")
+        self.slots = slots
+        self.ttl = ttl
+        self._mapa = None
+        self._ruta_lock = os.path.join(self.directorio, "escritura.lock")
+        self._lock_fd = None
+        self._lock_pid = None
+
+    # ---------- versiones ----------
+    @property
+    def _versiones(self):
+        # Se abre en el primer uso para que importar la app no toque el disco
+        if self._mapa is None:
+            os.makedirs(self.directorio, exist_ok=True)
+            fd = os.open(os.path.join(self.directorio, "versiones.bin"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(fd).st_size < self.slots * _TAM:
+                    os.ftruncate(fd, self.slots * _TAM)
+                # MAP_SHARED: lo que escribe un worker lo ven todos, también tras el fork
+                self._mapa = mmap.mmap(fd, self.slots * _TAM, mmap.MAP_SHARED)
+            finally:
+                os.close(fd)
+        return self._mapa
+
+    def _slot(self, clave):
+        return (zlib.crc32(clave.encode("utf-8")) % self.slots) * _TAM
+
+    def version(self, clave):
+        """Versión actual de la clave (leerla antes de ir a la base de datos)"""
+        return struct.unpack_from(_FORMATO, self._versiones, self._slot(clave))[0]
+
+    def _subir_version(self, clave):
+        nueva = self.version(clave) + 1
+        struct.pack_into(_FORMATO, self._versiones, self._slot(clave), nueva)
+        return nueva
+
+    def _bloquear(self):
+        # flock es por descriptor abierto: tras el fork cada worker necesita el suyo
+        if self._lock_pid != os.getpid():
+            os.makedirs(self.directorio, exist_ok=True)
+            self._lock_fd = os.open(self._ruta_lock, os.O_RDWR | os.O_CREAT, 0o600)
+            self._lock_pid = os.getpid()
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+
+    def _desbloquear(self):
+        fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    # ---------- datos ----------
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{zlib.crc32(clave.encode('utf-8')):08x}.json")
+
+    def obtener(self, clave, permitir_viejo=False):
+        """Valor vigente de la clave, o None. Con permitir_viejo devuelve el último guardado"""
+        try:
+            with open(self._ruta(clave), "rb") as f:
+                datos = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if datos.get("clave") != clave:
+            return None
+        if permitir_viejo:
+            return datos.get("valor")
+        if datos.get("version") != self.version(clave) or datos.get("expira", 0) < time.time():
+            return None
+        return datos.get("valor")
+
+    def guardar(self, clave, valor, version_leida=None):
+        """Guarda valor si nadie invalidó la clave desde version_leida; devuelve True si se guardó"""
+        self._bloquear()
+        try:
+            if version_leida is not None and self.version(clave) != version_leida:
+                # Otro worker escribió mientras calculábamos: nuestro dato ya es viejo
+                return False
+            version = self._subir_version(clave)
+            ruta = self._ruta(clave)
+            temporal = f"{ruta}.{os.getpid()}.tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump({"clave": clave, "version": version, "expira": time.time() + self.ttl,
+                           "valor": valor}, f, ensure_ascii=False)
+            os.replace(temporal, ruta)
+            return True
+        except OSError as e:
+            logger.warning("No se pudo guardar %s en la caché compartida: %s", clave, e)
+            return False
+        finally:
+            self._desbloquear()
+
+    def invalidar(self, clave):
+        """Marca la clave como vieja para todos los workers"""
+        self._bloquear()
+        try:
+            self._subir_version(clave)
+        finally:
+            self._desbloquear()
+
+
+class SemaforoCompartido:
+    """Semáforo entre procesos: una plaza es un archivo bloqueado con flock
+
+    Si un worker muere, el sistema libera sus bloqueos al cerrar el proceso.
+    """
+
+    def __init__(self, directorio, nombre, plazas):
+        self.rutas = [os.path.join(directorio, f"{nombre}.{i}.lock") for i in range(plazas)]
+        os.makedirs(directorio, exist_ok=True)
+
+    def adquirir(self):
+        """Descriptor de la plaza ocupada, o None si todas están ocupadas"""
+        for ruta in self.rutas:
+            fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def liberar(self, fd):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
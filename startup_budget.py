@@ -0,0 +1,91 @@
+# startup_budget.py
+# Presupuesto de tiempo de arranque.
+#
+# Mide en intérpretes nuevos cuánto tarda importar server.py, crear la app y
+# cargar cada script de mantenimiento, y falla si alguno pasa su presupuesto
+# o si un script arrastra Flask (los scripts solo necesitan database.py).
+#
+# Uso:
+#   python startup_budget.py
+#   python startup_budget.py --repeticiones 7 --factor 2   (máquina más lenta)
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# (nombre, código a medir, presupuesto en ms, ¿puede cargar Flask?)
+PRESUPUESTOS = [
+    ("import server", "import server", 600, True),
+    ("create_app()", "import server; server.create_app()", 650, True),
+    ("database", "import database", 350, False),
+    ("peliculas", "import peliculas", 20, False),
+    ("covers", "import covers", 350, False),
+    ("import_files", "import import_files", 50, False),
+    ("import_ratings", "import import_ratings", 350, False),
+    ("rating_stats", "import rating_stats", 350, False),
+    ("user_views", "import user_views", 350, False),
+    ("comment_archive", "import comment_archive", 350, False),
+    ("analytics", "import analytics", 350, False),
+    ("provision_users", "import provision_users", 350, False),
+    ("passwords", "import passwords", 50, False),
+]
+
+_MEDIR = """
+import json, sys, time
+inicio = time.perf_counter()
+exec({codigo!r})
+print(json.dumps({{"ms": (time.perf_counter() - inicio) * 1000, "flask": "flask" in sys.modules}}))
+"""
+
+
+def medir(codigo, repeticiones):
+    """Mediana en ms de ejecutar codigo en un intérprete nuevo, y si cargó Flask"""
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    tiempos, flask = [], False
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", _MEDIR.format(codigo=codigo)],
+            cwd=directorio, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        resultado = json.loads(salida)
+        tiempos.append(resultado["ms"])
+        flask = flask or resultado["flask"]
+    return statistics.median(tiempos), flask
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de arranque")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Mediciones por objetivo (se usa la mediana)")
+    parser.add_argument("--factor", type=float, default=float(os.getenv("STARTUP_BUDGET_FACTOR", "1")),
+                        help="Multiplica todos los presupuestos")
+    args = parser.parse_args()
+
+    print(f"⏱️ Midiendo arranque ({args.repeticiones} repeticiones, factor {args.factor})...")
+    fallos = 0
+    for nombre, codigo, presupuesto, permite_flask in PRESUPUESTOS:
+        try:
+            ms, flask = medir(codigo, args.repeticiones)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ {nombre:<16} no se pudo importar: {e.stderr.strip().splitlines()[-1]}")
+            fallos += 1
+            continue
+        limite = presupuesto * args.factor
+        problemas = []
+        if ms > limite:
+            problemas.append(f"supera {limite:.0f} ms")
+        if flask and not permite_flask:
+            problemas.append("carga Flask")
+        fallos += bool(problemas)
+        estado = "❌" if problemas else "✅"
+        print(f"{estado} {nombre:<16} {ms:7.1f} ms  (presupuesto {limite:.0f} ms){'  ' + ', '.join(problemas) if problemas else ''}")
+
+    if fallos:
+        print(f"❌ {fallos} objetivos fuera de presupuesto")
+        sys.exit(1)
+    print("✅ Todo dentro del presupuesto")
+
+
+if __name__ == "__main__":
+    main()
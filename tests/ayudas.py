@@ -0,0 +1,22 @@
+# Pasos repetidos en varias pruebas
+import sys
+
+
+def registrar(http, usuario, email=None, password="contraseña123"):
+    return http.post("/register", data={
+        "usuario": usuario, "nombre": "Prueba", "email": email or f"{usuario}@cinetec.test",
+        "password": password
+    })
+
+
+def entrar(http, usuario, password="contraseña123"):
+    """Registra (si hace falta) e inicia sesión; devuelve la respuesta del login"""
+    registrar(http, usuario, password=password)
+    return http.post("/login", data={"usuario": usuario, "password": password})
+
+
+def ejecutar_cli(monkeypatch, modulo, base, *argumentos):
+    """Ejecuta main() de un script con base (mongomock) en lugar de MONGODB_URI"""
+    monkeypatch.setattr(modulo, "cliente_cli", lambda **opciones: base)
+    monkeypatch.setattr(sys, "argv", [f"{modulo.__name__}.py", *map(str, argumentos)])
+    modulo.main()
@@ -0,0 +1,43 @@
+# Fixtures comunes: cada prueba crea apps con create_app() sobre su propia
+# base en memoria (mongomock), su caché compartida y sus semáforos.
+import os
+import tempfile
+
+import pytest
+
+# scrypt con coste bajo: las pruebas no miden la seguridad del hash
+os.environ.setdefault("PASSWORD_SCRYPT_N", "1024")
+os.environ.pop("MONGODB_URI", None)
+os.environ.setdefault("PASSWORD_LOCK_DIR", tempfile.mkdtemp(prefix="cinetec-passwords-"))
+
+mongomock = pytest.importorskip("mongomock")
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def crear_app(tmp_path):
+    """Fábrica de apps aisladas: crear_app(cliente=None, **config)"""
+    creadas = []
+
+    def _crear(cliente=None, **config):
+        cliente = cliente or mongomock.MongoClient()
+        app = server.create_app({
+            "TESTING": True,
+            "MONGO_CLIENT": cliente,
+            "SHARED_CACHE_DIR": str(tmp_path / f"cache-{len(creadas)}"),
+            "RATE_LIMIT_DIR": str(tmp_path / f"limites-{len(creadas)}"),
+            **config
+        })
+        creadas.append(app)
+        return app
+
+    yield _crear
+    for app in creadas:
+        app.extensions["cinetec"]["contador_reacciones"].flush()
+
+
+@pytest.fixture
+def app(crear_app):
+    return crear_app()
+
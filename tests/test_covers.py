@@ -0,0 +1,58 @@
+import io
+
+import pytest
+
+from covers import clave_portada
+from peliculas import PELICULAS_INFO
+
+Image = pytest.importorskip("PIL.Image")
+
+TITULO = next(titulo for titulo, info in PELICULAS_INFO.items() if info.get("portada"))
+PORTADA = PELICULAS_INFO[TITULO]["portada"]
+
+
+@pytest.fixture
+def descargas():
+    return []
+
+
+@pytest.fixture
+def http(crear_app, tmp_path, descargas):
+    def fetcher(url):
+        # Imagen local en lugar de salir a internet
+        descargas.append(url)
+        salida = io.BytesIO()
+        Image.new("RGB", (600, 900), "red").save(salida, format="PNG")
+        return salida.getvalue()
+
+    return crear_app(COVER_FETCHER=fetcher, COVER_CACHE_DIR=str(tmp_path / "covers")).test_client()
+
+
+def test_negocia_formato_y_responde_304(http, descargas):
+    version = clave_portada(PORTADA)
+    webp = http.get(f"/cover/{TITULO}?w=160&v={version}", headers={"Accept": "image/webp,*/*"})
+    assert webp.status_code == 200
+    assert webp.mimetype == "image/webp"
+    assert "Accept" in webp.headers["Vary"]
+    assert Image.open(io.BytesIO(webp.data)).size == (160, 240)
+
+    jpeg = http.get(f"/cover/{TITULO}?w=160&v={version}", headers={"Accept": "image/*"})
+    assert jpeg.status_code == 200 and jpeg.mimetype == "image/jpeg"
+    assert descargas == [PORTADA]
+
+    repetida = http.get(f"/cover/{TITULO}?w=160&v={version}", headers={
+        "Accept": "image/webp", "If-None-Match": webp.headers["ETag"]
+    })
+    assert repetida.status_code == 304
+
+
+def test_solo_es_inmutable_con_la_version_actual(http):
+    version = clave_portada(PORTADA)
+    assert "immutable" in http.get(f"/cover/{TITULO}?v={version}").headers["Cache-Control"]
+    for consulta in ("", "?v=vieja"):
+        cabecera = http.get(f"/cover/{TITULO}{consulta}").headers["Cache-Control"]
+        assert "immutable" not in cabecera and "max-age=300" in cabecera
+
+
+def test_portada_desconocida(http):
+    assert http.get("/cover/No existe").status_code == 404
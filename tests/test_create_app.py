@@ -0,0 +1,42 @@
+import logging
+
+import mongomock
+
+import server
+from app_logging import ColaPorProcesoHandler
+from tests.ayudas import entrar
+
+
+def test_apps_con_bases_distintas_no_se_mezclan(crear_app):
+    base_a, base_b = mongomock.MongoClient(), mongomock.MongoClient()
+    http_a = crear_app(base_a).test_client()
+    http_b = crear_app(base_b).test_client()
+
+    assert entrar(http_a, "ana").location.endswith("/pelispy")
+    http_a.post("/rate_movie", json={"pelicula": "Matrix", "calificacion": 5})
+
+    assert base_a.cineTecDB.usuarios.count_documents({}) == 1
+    assert base_b.cineTecDB.usuarios.count_documents({}) == 0
+    assert http_b.post("/login", data={"usuario": "ana", "password": "contraseña123"}).location.endswith("/iniciopy")
+    assert http_a.get("/get_all_ratings").get_json()["ratings"] == {"Matrix": {"promedio": 5.0, "total_votos": 1}}
+    assert http_b.get("/get_all_ratings").get_json()["ratings"] == {}
+
+
+def test_cada_app_tiene_sus_recursos(crear_app):
+    app_a, app_b = crear_app(), crear_app()
+    for nombre in ("breaker_mongo", "cache_compartida", "contador_reacciones", "leaderboards", "calentamiento"):
+        assert app_a.extensions["cinetec"][nombre] is not app_b.extensions["cinetec"][nombre]
+    assert app_a.extensions["rate_limit"] is not app_b.extensions["rate_limit"]
+    # El logger es del proceso: la segunda app no reemplaza el handler de la primera
+    assert app_a.extensions["app_logging"] is app_b.extensions["app_logging"]
+    handlers = [h for h in logging.getLogger("cinetec").handlers if isinstance(h, ColaPorProcesoHandler)]
+    assert handlers == [app_a.extensions["app_logging"]]
+
+
+def test_app_sin_cliente_no_hereda_el_inyectado(crear_app, monkeypatch):
+    monkeypatch.delenv("MONGODB_URI", raising=False)
+    crear_app()
+    app = server.create_app({"TESTING": True})
+    assert app.extensions["cinetec"]["mongo_client"] is None
+    with app.app_context():
+        assert server.get_mongo_client() is None
@@ -0,0 +1,62 @@
+import json
+
+import mongomock
+import pytest
+
+import import_ratings
+from provision_users import documento_usuario
+from shared_cache import CacheCompartida
+from tests.ayudas import ejecutar_cli
+
+
+@pytest.fixture
+def base():
+    base = mongomock.MongoClient()
+    base.cineTecDB.calificaciones.create_index([("usuario", 1), ("pelicula", 1)], unique=True)
+    base.cineTecDB.usuarios.insert_one(documento_usuario("ana", "Ana", "ana@cinetec.test", "x"))
+    return base
+
+
+def test_filas_repetidas_en_un_lote_gana_la_ultima(base):
+    filas = [
+        {"usuario": "ana", "pelicula": "Matrix", "calificacion": 3},
+        {"usuario": "ana", "pelicula": "Matrix", "calificacion": 5},
+    ]
+    stats, resumenes, usuarios, escritas = import_ratings.importar_calificaciones(base.cineTecDB, filas)
+
+    assert stats["repetidas"] == 1 and stats["errores"] == 0
+    assert escritas == {"Matrix": 1}
+    assert resumenes["Matrix"]["total_votos"] == 1
+    assert usuarios == {"ana"}
+    assert base.cineTecDB.calificaciones.find_one({"usuario": "ana"})["calificacion"] == 5
+
+
+def test_cli_actualiza_histogramas_y_vistas(base, monkeypatch, tmp_path):
+    monkeypatch.setenv("SHARED_CACHE_DIR", str(tmp_path / "cache"))
+    archivo = tmp_path / "calificaciones.ndjson"
+    archivo.write_text("\n".join(json.dumps(f) for f in [
+        {"usuario": "ana", "pelicula": "Matrix", "calificacion": 4},
+        {"usuario": "ana", "pelicula": "Titanic", "calificacion": 2},
+        {"usuario": "luis", "pelicula": "Matrix", "calificacion": 5},
+    ]))
+    ejecutar_cli(monkeypatch, import_ratings, base, archivo)
+
+    db = base.cineTecDB
+    assert db.estadisticas_peliculas.find_one({"_id": "Matrix"})["hist"] == {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1}
+    assert db.estadisticas_usuarios.find_one({"_id": "ana"})["total"] == 2
+    assert db.vistas_usuario.find_one({"_id": "ana"})["calificaciones"] == {"Matrix": 4, "Titanic": 2}
+
+
+def test_importacion_grande_reconstruye_todo(base, monkeypatch, tmp_path):
+    monkeypatch.setattr(import_ratings, "MAX_USUARIOS_PARCIAL", 1)
+    db = base.cineTecDB
+    # Histograma desfasado de antes de la importación
+    db.estadisticas_peliculas.insert_one({"_id": "Titanic", "hist": {"1": 9}, "total": 9, "suma": 9})
+
+    filas = [{"usuario": u, "pelicula": "Matrix", "calificacion": 3} for u in ("ana", "luis")]
+    _, resumenes, usuarios, _ = import_ratings.importar_calificaciones(db, filas)
+    import_ratings.actualizar_derivados(db, resumenes, usuarios, CacheCompartida(str(tmp_path)))
+
+    assert db.estadisticas_peliculas.find_one({"_id": "Matrix"})["total"] == 2
+    assert db.estadisticas_peliculas.find_one({"_id": "Titanic"}) is None
+    assert db.vistas_usuario.find_one({"_id": "ana"})["calificaciones"] == {"Matrix": 3}
@@ -0,0 +1,37 @@
+from datetime import date, datetime, timezone
+
+from bson import ObjectId
+
+from tests.ayudas import entrar
+
+
+def test_fechas_en_iso_8601(app):
+    datos = {
+        "fecha": datetime(2024, 5, 1, 18, 30, 12),
+        "utc": datetime(2024, 5, 1, 18, 30, tzinfo=timezone.utc),
+        "dia": date(2024, 5, 1),
+        "id": ObjectId("0123456789abcdef01234567"),
+    }
+    assert app.json.loads(app.json.dumps(datos)) == {
+        "fecha": "2024-05-01T18:30:12",
+        "utc": "2024-05-01T18:30:00+00:00",
+        "dia": "2024-05-01",
+        "id": "0123456789abcdef01234567",
+    }
+
+
+def test_comentarios_conservan_los_segundos(app):
+    http = app.test_client()
+    entrar(http, "ana")
+    nuevo = http.post("/add_comment", json={"pelicula": "Matrix", "comentario": "Hola"}).get_json()["comentario"]
+    guardado = http.get("/get_comments/Matrix").get_json()["comentarios"][0]
+    # MongoDB guarda milisegundos: se compara hasta los segundos
+    assert datetime.fromisoformat(guardado["fecha"]).replace(microsecond=0) == \
+        datetime.fromisoformat(nuevo["fecha"]).replace(microsecond=0)
+
+
+def test_mensajes_flash_sobreviven_a_la_cookie_de_sesion(app):
+    http = app.test_client()
+    http.post("/login", data={"usuario": "", "password": ""})
+    pagina = http.get("/iniciopy").get_data(as_text=True)
+    assert "Usuario y contraseña requeridos" in pagina
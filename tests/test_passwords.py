@@ -0,0 +1,45 @@
+import passwords
+from shared_cache import SemaforoCompartido
+from tests.ayudas import entrar, registrar
+
+
+def test_login_rechazado_si_no_hay_plazas_de_hash(app, monkeypatch, tmp_path):
+    http = app.test_client()
+    registrar(http, "ana")
+    monkeypatch.setattr(passwords, "limite", passwords.LimiteHash(plazas=1, directorio=str(tmp_path)))
+
+    # Otro worker ocupa la única plaza
+    semaforo = SemaforoCompartido(str(tmp_path), "hash", 1)
+    plaza = semaforo.adquirir()
+    try:
+        respuesta = http.post("/login", data={"usuario": "ana", "password": "contraseña123"})
+        assert respuesta.location.endswith("/iniciopy")
+    finally:
+        semaforo.liberar(plaza)
+
+    assert entrar(http, "ana").location.endswith("/pelispy")
+
+
+def test_hash_malformado_no_verifica():
+    sal = "c2Fs"
+    for almacenado in (
+        f"scrypt$r=8,p=1${sal}${sal}",          # falta n
+        f"scrypt$n${sal}${sal}",                # parámetro sin valor
+        f"scrypt$n=abc,r=8,p=1${sal}${sal}",    # no es número
+        f"pbkdf2_sha256$mil${sal}${sal}",
+        "scrypt$n=1024",                         # faltan partes
+        f"bcrypt$12${sal}${sal}",
+    ):
+        assert passwords.verificar_password("contraseña", almacenado) is False
+    assert passwords.verificar_password("contraseña", passwords.hash_password("contraseña"))
+
+
+def test_por_defecto_queda_un_worker_libre(monkeypatch):
+    monkeypatch.setattr(passwords.os, "cpu_count", lambda: 8)
+    for workers, plazas in (("2", 1), ("1", 1), ("5", 4), ("", 1)):
+        monkeypatch.setenv("WEB_CONCURRENCY", workers)
+        assert passwords.plazas_por_defecto() == plazas
+    # Nunca más hashes a la vez que núcleos
+    monkeypatch.setattr(passwords.os, "cpu_count", lambda: 2)
+    monkeypatch.setenv("WEB_CONCURRENCY", "9")
+    assert passwords.plazas_por_defecto() == 2
@@ -0,0 +1,19 @@
+import os
+
+import profiling
+
+
+def test_request_id_no_escapa_del_directorio(tmp_path):
+    directorio = tmp_path / "profiles"
+    nombre = profiling.guardar_perfil(profiling.PerfiladorMuestreo(0), "/pelispy", "../../fuera/x", str(directorio))
+
+    assert "/" not in nombre and ".." not in nombre
+    assert sorted(os.listdir(directorio)) == [f"{nombre}.collapsed", f"{nombre}.json"]
+    assert not (tmp_path / "fuera").exists()
+
+
+def test_x_request_id_invalido_se_reemplaza(app):
+    http = app.test_client()
+    assert http.get("/health", headers={"X-Request-ID": "abc-123"}).headers["X-Request-ID"] == "abc-123"
+    for invalido in ("../../etc", "a" * 65, "id con espacios"):
+        assert http.get("/health", headers={"X-Request-ID": invalido}).headers["X-Request-ID"] != invalido
@@ -0,0 +1,64 @@
+import threading
+from datetime import datetime
+
+import leaderboards
+from tests.ayudas import entrar
+
+
+def puntuaciones(http):
+    return {p["titulo"]: p["puntuacion"] for p in http.get("/trending").get_json()["peliculas"]}
+
+
+def test_filas_repetidas_cuentan_una_vez_en_tendencia(app):
+    http = app.test_client()
+    entrar(http, "ana")
+    assert puntuaciones(http) == {}
+
+    lote = [{"pelicula": "Avatar", "calificacion": 5}] * 490 + [{"pelicula": "Matrix", "calificacion": 9}] * 10
+    respuesta = http.post("/rate_movies", json={"calificaciones": lote}).get_json()
+
+    assert respuesta["success"] and respuesta["stats"]["repetidas"] == 489
+    assert puntuaciones(http) == {"Avatar": 1.0}
+
+
+def test_los_favoritos_sobreviven_a_la_recarga(app):
+    http = app.test_client()
+    entrar(http, "ana")
+    puntuaciones(http)
+
+    http.post("/toggle_favorite", json={"pelicula": "Titanic"})
+    http.post("/toggle_favorite", json={"pelicula": "Titanic"})
+    http.post("/toggle_favorite", json={"pelicula": "Titanic"})
+    assert puntuaciones(http) == {"Titanic": 3.0}
+
+    app.extensions["cinetec"]["leaderboards"].cargar(app.extensions["cinetec"]["mongo_client"].cineTecDB)
+    assert puntuaciones(http) == {"Titanic": 3.0}
+
+
+def test_la_recarga_periodica_no_bloquea_la_peticion(app, monkeypatch):
+    http = app.test_client()
+    entrar(http, "ana")
+    puntuaciones(http)
+    http.post("/toggle_favorite", json={"pelicula": "Titanic"})
+
+    monkeypatch.setattr(leaderboards, "RECARGA_SEGUNDOS", 0)
+    db = app.extensions["cinetec"]["mongo_client"].cineTecDB
+    db.comentarios.insert_one({"pelicula": "Matrix", "comentario": "Otra", "fecha": datetime.now()})
+    liberada = threading.Event()
+    cargar = leaderboards.Leaderboards.cargar
+
+    def cargar_lento(self, base):
+        liberada.wait(5)
+        cargar(self, base)
+
+    monkeypatch.setattr(leaderboards.Leaderboards, "cargar", cargar_lento)
+
+    # Se responde con los rankings actuales mientras la recarga espera
+    assert puntuaciones(http) == {"Titanic": 3.0}
+    assert puntuaciones(http) == {"Titanic": 3.0}
+    recargas = [t for t in threading.enumerate() if t.name == "recarga-rankings"]
+    assert len(recargas) == 1
+
+    liberada.set()
+    recargas[0].join(5)
+    assert puntuaciones(http) == {"Matrix": 2.0, "Titanic": 3.0}
@@ -0,0 +1,68 @@
+import multiprocessing
+
+import pytest
+
+import rate_limit
+from shared_cache import SemaforoCompartido
+
+
+def intentos_login(http, n, cabeceras):
+    return [
+        http.post("/login", data={"usuario": "nadie", "password": "x"}, headers=cabeceras(i)).status_code
+        for i in range(n)
+    ]
+
+
+def test_x_forwarded_for_no_salta_el_limite(crear_app):
+    http = crear_app(RATE_LIMITS={"login": {"por_minuto": 1, "rafaga": 2}}).test_client()
+    codigos = intentos_login(http, 4, lambda i: {"X-Forwarded-For": f"10.0.0.{i}"})
+    assert codigos.count(429) == 2
+
+
+def test_proxy_de_confianza_separa_clientes(crear_app):
+    http = crear_app(RATE_LIMITS={"login": {"por_minuto": 1, "rafaga": 2}}, TRUSTED_PROXIES=1).test_client()
+    codigos = intentos_login(http, 4, lambda i: {"X-Forwarded-For": f"10.0.0.{i}"})
+    assert 429 not in codigos
+
+
+@pytest.mark.parametrize("valor", ['[1, 2]', '"login"', '{"login": 5}', 'no es json'])
+def test_rate_limits_invalido_usa_los_de_por_defecto(monkeypatch, valor):
+    monkeypatch.setenv("RATE_LIMITS", valor)
+    assert rate_limit.cargar_limites() == rate_limit.LIMITES_POR_DEFECTO
+
+
+def _ocupar(directorio, listo, soltar):
+    plaza = SemaforoCompartido(directorio, "ruta", 1).adquirir()
+    listo.set()
+    soltar.wait(10)
+    SemaforoCompartido(directorio, "ruta", 1).liberar(plaza)
+
+
+def test_semaforo_compartido_entre_procesos(tmp_path):
+    contexto = multiprocessing.get_context("fork")
+    listo, soltar = contexto.Event(), contexto.Event()
+    otro = contexto.Process(target=_ocupar, args=(str(tmp_path), listo, soltar))
+    otro.start()
+    try:
+        assert listo.wait(10)
+        semaforo = SemaforoCompartido(str(tmp_path), "ruta", 1)
+        assert semaforo.adquirir() is None
+    finally:
+        soltar.set()
+        otro.join(10)
+    plaza = semaforo.adquirir()
+    assert plaza is not None
+    semaforo.liberar(plaza)
+
+
+def test_ruta_saturada_responde_503(crear_app):
+    app = crear_app()
+    semaforo = app.extensions["rate_limit"].semaforo("upload_photo")
+    plaza = semaforo.adquirir()
+    try:
+        http = app.test_client()
+        with http.session_transaction() as sesion:
+            sesion["usuario"] = "ana"
+        assert http.post("/upload_photo").status_code == 503
+    finally:
+        semaforo.liberar(plaza)
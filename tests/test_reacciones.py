@@ -0,0 +1,46 @@
+import pytest
+from bson import ObjectId
+
+from tests.ayudas import entrar
+
+
+@pytest.fixture
+def comentario(app):
+    http = app.test_client()
+    entrar(http, "ana")
+    respuesta = http.post("/add_comment", json={"pelicula": "Matrix", "comentario": "Muy buena"})
+    return http, respuesta.get_json()["comentario"]["_id"]
+
+
+def reaccionar(http, comentario_id, tipo):
+    return http.post("/react_comment", json={"comentario_id": comentario_id, "tipo": tipo}).get_json()
+
+
+def contadores(app, comentario_id):
+    app.extensions["cinetec"]["contador_reacciones"].flush()
+    doc = app.extensions["cinetec"]["mongo_client"].cineTecDB.comentarios.find_one({"_id": ObjectId(comentario_id)})
+    return doc["likes"], doc["dislikes"], doc["score"]
+
+
+def test_quitar_y_volver_a_dar_like(app, comentario):
+    http, comentario_id = comentario
+
+    assert reaccionar(http, comentario_id, "like")["likes"] == 1
+    quitado = reaccionar(http, comentario_id, "like")
+    assert quitado["reaccion"] is None and quitado["likes"] == 0
+    assert contadores(app, comentario_id) == (0, 0, 0)
+
+    assert reaccionar(http, comentario_id, "like")["likes"] == 1
+    assert contadores(app, comentario_id) == (1, 0, 1)
+
+
+def test_cambiar_de_like_a_dislike(app, comentario):
+    http, comentario_id = comentario
+
+    reaccionar(http, comentario_id, "like")
+    cambio = reaccionar(http, comentario_id, "dislike")
+    assert cambio["reaccion"] == "dislike"
+    assert contadores(app, comentario_id) == (0, 1, -1)
+
+    reaccionar(http, comentario_id, "dislike")
+    assert contadores(app, comentario_id) == (0, 0, 0)
@@ -0,0 +1,38 @@
+import mongomock
+
+import server
+
+
+class ClienteIntermitente:
+    """mongomock que falla el ping mientras caido sea True"""
+
+    def __init__(self):
+        self.caido = True
+        self._base = mongomock.MongoClient()
+
+    def __getattr__(self, nombre):
+        if nombre == "admin" and self.caido:
+            raise ConnectionError("MongoDB caído")
+        return getattr(self._base, nombre)
+
+
+def test_no_esta_listo_si_mongo_falla_al_calentar(crear_app):
+    cliente = ClienteIntermitente()
+    app = crear_app(cliente)
+    pasos = server.calentar_worker(app)
+
+    assert pasos["mongo"] == "error"
+    http = app.test_client()
+    assert http.get("/ready").status_code == 503
+
+    # Al recuperarse MongoDB, /ready vuelve a calentar y pasa a listo
+    cliente.caido = False
+    respuesta = http.get("/ready")
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()["calentamiento"]["mongo"] != "error"
+
+
+def test_listo_tras_calentar(app):
+    server.calentar_worker(app)
+    assert app.extensions["cinetec"]["calentamiento"]["listo"] is True
+    assert app.test_client().get("/ready").status_code == 200
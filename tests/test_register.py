@@ -0,0 +1,90 @@
+import threading
+
+import mongomock
+
+import passwords
+from tests.ayudas import registrar
+
+EXITO = "¡Registro exitoso! Ahora puedes iniciar sesión"
+USUARIO_REPETIDO = "El usuario ya existe"
+EMAIL_REPETIDO = "El email ya está registrado"
+
+
+def mensajes(http):
+    with http.session_transaction() as sesion:
+        return [mensaje for _, mensaje in sesion.get("_flashes", [])]
+
+
+def test_registros_simultaneos_crean_un_solo_usuario(crear_app, monkeypatch, tmp_path):
+    app = crear_app(RATE_LIMITS={"register": {"por_minuto": 0}})
+    hilos = 16
+    # Plazas de hash para todos: aquí se prueba la carrera en el insert, no la admisión
+    monkeypatch.setattr(passwords, "limite", passwords.LimiteHash(plazas=hilos, directorio=str(tmp_path)))
+    barrera = threading.Barrier(hilos)
+    resultados = [None] * hilos
+
+    def alta(i):
+        # La mitad repite el usuario y la otra mitad solo el email
+        usuario = "concurrente" if i % 2 == 0 else f"concurrente_{i}"
+        http = app.test_client()
+        barrera.wait()
+        registrar(http, usuario, email="concurrente@cinetec.test")
+        resultados[i] = (usuario, mensajes(http))
+
+    trabajadores = [threading.Thread(target=alta, args=(i,)) for i in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+
+    db = app.extensions["cinetec"]["mongo_client"].cineTecDB
+    assert db.usuarios.count_documents({}) == 1
+    ganador = db.usuarios.find_one()["usuario"]
+    for usuario, flashes in resultados:
+        if usuario == ganador:
+            assert flashes in ([EXITO], [USUARIO_REPETIDO])
+        else:
+            assert flashes == [EMAIL_REPETIDO]
+    assert sum(f == [EXITO] for _, f in resultados) == 1
+
+
+def test_registro_repetido_indica_el_campo(app):
+    http = app.test_client()
+    registrar(http, "ana")
+    mensajes(http)
+    registrar(http, "ana", email="otra@cinetec.test")
+    assert mensajes(http)[-1] == USUARIO_REPETIDO
+    registrar(http, "ana_2", email="ana@cinetec.test")
+    assert mensajes(http)[-1] == EMAIL_REPETIDO
+
+
+def test_la_app_crea_el_indice_de_email_en_una_base_existente(crear_app):
+    # Base desplegada antes del índice de email: solo tiene el de usuario
+    cliente = mongomock.MongoClient()
+    cliente.cineTecDB.usuarios.create_index([("usuario", 1)], unique=True)
+    http = crear_app(cliente).test_client()
+
+    registrar(http, "ana", email="compartido@cinetec.test")
+    registrar(http, "bob", email="compartido@cinetec.test")
+
+    assert mensajes(http)[-1] == EMAIL_REPETIDO
+    assert cliente.cineTecDB.usuarios.count_documents({"email": "compartido@cinetec.test"}) == 1
+    assert "email_1" in cliente.cineTecDB.usuarios.index_information()
+
+
+def test_con_emails_repetidos_antiguos_se_comprueba_a_mano(crear_app, caplog):
+    # Los repetidos impiden crear el índice único: el registro no debe añadir más
+    cliente = mongomock.MongoClient()
+    cliente.cineTecDB.usuarios.insert_many([
+        {"usuario": "viejo_1", "email": "repetido@cinetec.test"},
+        {"usuario": "viejo_2", "email": "repetido@cinetec.test"},
+    ])
+    app = crear_app(cliente)
+    http = app.test_client()
+
+    registrar(http, "nuevo", email="repetido@cinetec.test")
+
+    assert mensajes(http)[-1] == EMAIL_REPETIDO
+    assert cliente.cineTecDB.usuarios.count_documents({"email": "repetido@cinetec.test"}) == 2
+    assert "usuarios.email_1" in app.extensions["cinetec"]["indices_fallidos"]
+    assert "No se pudo crear el índice usuarios.email_1" in caplog.text
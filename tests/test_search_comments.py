@@ -0,0 +1,90 @@
+import base64
+
+import mongomock
+from pymongo.errors import OperationFailure
+
+from tests.ayudas import entrar
+
+
+class ComentariosConTexto:
+    """comentarios de mongomock con un $text mínimo (mongomock no lo implementa)
+
+    Como MongoDB, falla si no existe el índice de texto. La relevancia es el
+    número de palabras buscadas que aparecen en el comentario; el resto del
+    pipeline lo ejecuta mongomock.
+    """
+
+    def __init__(self, coleccion):
+        self._coleccion = coleccion
+
+    def __getattr__(self, nombre):
+        return getattr(self._coleccion, nombre)
+
+    def aggregate(self, pipeline):
+        filtro = dict(pipeline[0].get("$match", {}))
+        if "$text" not in filtro:
+            return self._coleccion.aggregate(pipeline)
+        if not any(i["key"][0][1] == "text" for i in self._coleccion.index_information().values()):
+            raise OperationFailure("text index required for $text query", 27)
+
+        palabras = filtro.pop("$text")["$search"].lower().split()
+        puntuados = self._coleccion.database["_busqueda"]
+        puntuados.drop()
+        for doc in self._coleccion.find(filtro):
+            relevancia = sum(p in doc["comentario"].lower() for p in palabras) * 1.1
+            if relevancia:
+                puntuados.insert_one({**doc, "relevancia": relevancia})
+        return puntuados.aggregate(pipeline[2:])
+
+
+class ClienteConTexto:
+    def __init__(self):
+        self._base = mongomock.MongoClient()
+
+    def __getattr__(self, nombre):
+        return getattr(self._base, nombre)
+
+    @property
+    def cineTecDB(self):
+        return BaseConTexto(self._base.cineTecDB)
+
+
+class BaseConTexto:
+    def __init__(self, db):
+        self._db = db
+
+    def __getattr__(self, nombre):
+        if nombre == "comentarios":
+            return ComentariosConTexto(self._db.comentarios)
+        return getattr(self._db, nombre)
+
+    def __getitem__(self, nombre):
+        return getattr(self, nombre)
+
+
+def test_busqueda_en_una_base_existente_sin_indice_de_texto(crear_app):
+    cliente = ClienteConTexto()
+    http = crear_app(cliente).test_client()
+    entrar(http, "ana")
+    for texto in ("Gran actuación y gran guion", "La actuación es floja", "Sin spoilers"):
+        http.post("/add_comment", json={"pelicula": "Matrix", "comentario": texto})
+
+    indice = cliente._base.cineTecDB.comentarios.index_information()["comentarios_texto"]
+    assert indice["key"] == [("comentario", "text")]
+
+    primera = http.get("/search_comments?q=gran actuación&limite=1").get_json()
+    assert primera["success"]
+    assert [c["comentario"] for c in primera["comentarios"]] == ["Gran actuación y gran guion"]
+    assert primera["comentarios"][0]["relevancia"] == 2.2
+
+    segunda = http.get(f"/search_comments?q=gran actuación&limite=1&cursor={primera['siguiente']}").get_json()
+    assert [c["comentario"] for c in segunda["comentarios"]] == ["La actuación es floja"]
+    assert segunda["siguiente"] is None
+
+
+def test_busqueda_valida_parametros(app):
+    http = app.test_client()
+    assert http.get("/search_comments?q=a").status_code == 400
+    assert http.get("/search_comments?q=actuación&limite=x").status_code == 400
+    cursor = base64.urlsafe_b64encode(b"no-es-un-cursor").decode()
+    assert http.get(f"/search_comments?q=actuación&cursor={cursor}").status_code == 400
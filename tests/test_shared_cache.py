@@ -0,0 +1,28 @@
+import json
+
+import mongomock
+
+import import_ratings
+from shared_cache import CLAVE_RATINGS, CacheCompartida
+from tests.ayudas import ejecutar_cli
+
+
+def test_entradas_caducan(tmp_path):
+    cache = CacheCompartida(str(tmp_path), ttl=0)
+    cache.guardar(CLAVE_RATINGS, {"Matrix": 1})
+    assert cache.obtener(CLAVE_RATINGS) is None
+    assert cache.obtener(CLAVE_RATINGS, permitir_viejo=True) == {"Matrix": 1}
+
+
+def test_import_ratings_invalida_los_promedios(crear_app, monkeypatch, tmp_path):
+    base = mongomock.MongoClient()
+    directorio = str(tmp_path / "cache")
+    http = crear_app(base, SHARED_CACHE_DIR=directorio).test_client()
+    assert http.get("/get_all_ratings").get_json()["ratings"] == {}
+
+    archivo = tmp_path / "calificaciones.ndjson"
+    archivo.write_text(json.dumps({"usuario": "ana", "pelicula": "Matrix", "calificacion": 4}) + "\n")
+    monkeypatch.setenv("SHARED_CACHE_DIR", directorio)
+    ejecutar_cli(monkeypatch, import_ratings, base, archivo)
+
+    assert http.get("/get_all_ratings").get_json()["ratings"] == {"Matrix": {"promedio": 4.0, "total_votos": 1}}
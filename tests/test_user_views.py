@@ -0,0 +1,46 @@
+import io
+
+import user_views
+from tests.ayudas import entrar
+
+
+def test_obtener_con_campos_solo_devuelve_los_pedidos(app):
+    http = app.test_client()
+    entrar(http, "ana")
+    db = app.extensions["cinetec"]["mongo_client"].cineTecDB
+    http.post("/toggle_favorite", json={"pelicula": "Matrix"})
+
+    assert user_views.obtener(db, "ana", campos=("favoritos",)) == {"favoritos": ["Matrix"]}
+    # Sin vista se construye completa y se devuelven solo los campos pedidos
+    db.vistas_usuario.delete_many({})
+    assert user_views.obtener(db, "ana", campos=("favoritos",)) == {"favoritos": ["Matrix"]}
+
+    favoritas = http.get("/get_favorites").get_json()["favoritas"]
+    assert [f["titulo"] for f in favoritas] == ["Matrix"]
+
+
+def test_la_foto_no_entra_en_la_vista(app):
+    http = app.test_client()
+    entrar(http, "ana")
+    db = app.extensions["cinetec"]["mongo_client"].cineTecDB
+    http.get("/get_user_preferences")
+
+    imagen = b"\xff\xd8" + b"A" * 1000
+    subida = http.post("/upload_photo", data={"foto": (io.BytesIO(imagen), "foto.jpg")})
+    foto = subida.get_json()["foto_url"]
+
+    assert "foto_perfil" not in db.vistas_usuario.find_one({"_id": "ana"})
+    assert set(user_views.obtener(db, "ana")) == set(user_views.CAMPOS)
+    # Se sigue mostrando, leída de usuarios
+    assert http.get("/get_user_preferences").get_json()["foto_perfil"] == foto
+
+
+def test_verificar_quita_la_foto_de_vistas_antiguas(app):
+    http = app.test_client()
+    entrar(http, "ana")
+    db = app.extensions["cinetec"]["mongo_client"].cineTecDB
+    user_views.obtener(db, "ana")
+    db.vistas_usuario.update_one({"_id": "ana"}, {"$set": {"foto_perfil": "data:image/jpeg;base64,AAAA"}})
+
+    assert user_views.verificar(db, reparar=True)["diferentes"] == 1
+    assert "foto_perfil" not in db.vistas_usuario.find_one({"_id": "ana"})
@@ -0,0 +1,201 @@
+# user_views.py
+# Vista desnormalizada por usuario en la colección vistas_usuario:
+#   {_id: usuario, descripcion, favoritos: [...],
+#    calificaciones: {pelicula: calificacion}}
+#
+# Todo el estado de un usuario sale de una sola lectura por _id en lugar de
+# usuarios + un recorrido de calificaciones. usuarios y calificaciones siguen
+# siendo la fuente de verdad: las rutas que escriben en ellas actualizan la
+# vista justo después, y si falta se reconstruye al leerla. La foto de perfil
+# (base64 de varios MB) no entra en la vista: se lee de usuarios solo donde se
+# muestra.
+#
+# Para detectar y reparar diferencias:
+#   python user_views.py --verificar
+#   python user_views.py --verificar --reparar
+import argparse
+import itertools
+import logging
+
+from pymongo import ReplaceOne
+
+from database import cliente_cli
+
+logger = logging.getLogger("cinetec.user_views")
+
+DESCRIPCION_POR_DEFECTO = "Hola, soy nuevo en CineTec"
+FOTO_POR_DEFECTO = "https://cdn-icons-png.flaticon.com/512/3135/3135715.png"
+CAMPOS = ("descripcion", "favoritos", "calificaciones")
+
+# Los nombres de campo de MongoDB no admiten "." ni "$" inicial
+_ESCAPES = (("\\", "\\\\"), (".", "\\p"), ("$", "\\d"))
+
+
+def escapar(titulo):
+    for original, escapado in _ESCAPES:
+        titulo = titulo.replace(original, escapado)
+    return titulo
+
+
+def desescapar(clave):
+    resultado, i = [], 0
+    while i < len(clave):
+        if clave[i] == "\\" and i + 1 < len(clave):
+            resultado.append({"\\": "\\", "p": ".", "d": "$"}.get(clave[i + 1], clave[i + 1]))
+            i += 2
+        else:
+            resultado.append(clave[i])
+            i += 1
+    return "".join(resultado)
+
+
+def _documento(usuario_data, calificaciones):
+    return {
+        "descripcion": usuario_data.get("descripcion", DESCRIPCION_POR_DEFECTO),
+        "favoritos": usuario_data.get("favoritos", []),
+        "calificaciones": {escapar(p): c for p, c in calificaciones.items()},
+    }
+
+
+def _publica(vista):
+    vista = dict(vista)
+    if "calificaciones" in vista:
+        vista["calificaciones"] = {desescapar(k): v for k, v in vista["calificaciones"].items()}
+    return vista
+
+
+# ==================== LECTURA ====================
+def construir(db, usuario):
+    """Reconstruye la vista desde usuarios y calificaciones; None si el usuario no existe"""
+    usuario_data = db.usuarios.find_one(
+        {"usuario": usuario}, {"descripcion": 1, "favoritos": 1}
+    )
+    if not usuario_data:
+        db.vistas_usuario.delete_one({"_id": usuario})
+        return None
+    calificaciones = {
+        c["pelicula"]: c["calificacion"]
+        for c in db.calificaciones.find({"usuario": usuario}, {"pelicula": 1, "calificacion": 1, "_id": 0})
+    }
+    vista = _documento(usuario_data, calificaciones)
+    db.vistas_usuario.replace_one({"_id": usuario}, vista, upsert=True)
+    return _publica(vista)
+
+
+def obtener(db, usuario, campos=None):
+    """Vista del usuario con una lectura por _id (la crea si aún no existe)
+
+    campos limita lo que se lee (por defecto, todos los de CAMPOS).
+    """
+    campos = campos or CAMPOS
+    proyeccion = {"_id": 0, **{campo: 1 for campo in campos}}
+    vista = db.vistas_usuario.find_one({"_id": usuario}, proyeccion)
+    if vista is None:
+        vista = construir(db, usuario)
+        if vista:
+            vista = {campo: vista[campo] for campo in campos}
+        return vista
+    return _publica(vista)
+
+
+# ==================== ESCRITURA ====================
+def _actualizar(db, usuario, cambios):
+    resultado = db.vistas_usuario.update_one({"_id": usuario}, cambios)
+    if resultado.matched_count == 0:
+        # Sin vista todavía: se construye completa con los datos ya escritos
+        construir(db, usuario)
+
+
+def fijar_calificaciones(db, usuario, calificaciones):
+    """{pelicula: calificacion} recién guardadas en calificaciones"""
+    if calificaciones:
+        _actualizar(db, usuario, {"$set": {
+            f"calificaciones.{escapar(p)}": c for p, c in calificaciones.items()
+        }})
+
+
+def fijar_perfil(db, usuario, **campos):
+    """descripcion y/o favoritos recién guardados en usuarios"""
+    _actualizar(db, usuario, {"$set": campos})
+
+
+# ==================== VERIFICACIÓN ====================
+def verificar(db, reparar=False):
+    """Compara todas las vistas con la fuente de verdad recorriendo ambas colecciones ordenadas"""
+    stats = {"usuarios": 0, "correctas": 0, "faltantes": 0, "diferentes": 0, "huerfanas": 0}
+    operaciones = []
+
+    def vaciar():
+        if reparar and operaciones:
+            db.vistas_usuario.bulk_write(operaciones, ordered=False)
+        operaciones.clear()
+
+    calificaciones = itertools.groupby(
+        db.calificaciones.find({}, {"usuario": 1, "pelicula": 1, "calificacion": 1, "_id": 0})
+        .sort([("usuario", 1), ("pelicula", 1)]),
+        key=lambda c: c["usuario"]
+    )
+    grupo_usuario, grupo = next(calificaciones, (None, iter(())))
+    vistas = db.vistas_usuario.find({}).sort("_id", 1)
+    vista = next(vistas, None)
+    usuarios = set()
+
+    for usuario_data in db.usuarios.find(
+        {}, {"usuario": 1, "descripcion": 1, "favoritos": 1}
+    ).sort("usuario", 1):
+        usuario = usuario_data["usuario"]
+        usuarios.add(usuario)
+        stats["usuarios"] += 1
+
+        # Avanzar calificaciones y vistas hasta este usuario (todo va ordenado)
+        while grupo_usuario is not None and grupo_usuario < usuario:
+            grupo_usuario, grupo = next(calificaciones, (None, iter(())))
+        propias = {}
+        if grupo_usuario == usuario:
+            propias = {c["pelicula"]: c["calificacion"] for c in grupo}
+        while vista is not None and vista["_id"] < usuario:
+            vista = next(vistas, None)
+
+        esperada = _documento(usuario_data, propias)
+        if vista is None or vista["_id"] != usuario:
+            stats["faltantes"] += 1
+        elif {k: v for k, v in vista.items() if k != "_id"} != esperada:
+            stats["diferentes"] += 1
+        else:
+            stats["correctas"] += 1
+            continue
+        operaciones.append(ReplaceOne({"_id": usuario}, esperada, upsert=True))
+        if len(operaciones) >= 1000:
+            vaciar()
+    vaciar()
+
+    huerfanas = [v["_id"] for v in db.vistas_usuario.find({"_id": {"$nin": list(usuarios)}}, {"_id": 1})]
+    stats["huerfanas"] = len(huerfanas)
+    if reparar and huerfanas:
+        db.vistas_usuario.delete_many({"_id": {"$in": huerfanas}})
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vistas por usuario")
+    parser.add_argument("--verificar", action="store_true", help="Compara las vistas con usuarios y calificaciones")
+    parser.add_argument("--reparar", action="store_true", help="Corrige las diferencias encontradas")
+    args = parser.parse_args()
+
+    if not args.verificar:
+        parser.print_help()
+        return
+
+    client = cliente_cli()
+    print("🔍 Verificando vistas de usuario...")
+    stats = verificar(client.cineTecDB, reparar=args.reparar)
+    client.close()
+
+    print(f"✅ {stats['usuarios']} usuarios: {stats['correctas']} correctas, "
+          f"{stats['faltantes']} faltantes, {stats['diferentes']} diferentes, {stats['huerfanas']} huérfanas")
+    if not args.reparar and (stats['faltantes'] or stats['diferentes'] or stats['huerfanas']):
+        print("⚠️ Ejecuta con --reparar para corregirlas")
+
+
+if __name__ == "__main__":
+    main()